@@ -0,0 +1,284 @@
+"""
+Account Export Module
+Full account dump as NDJSON: one {"type": ..., "data": {...}} record per line, in the order
+header, user, website (each hosted one followed by its hosting metadata), revision, generation.
+The export pages through each table with a server-side cursor and yields fixed-size chunks, so
+memory stays constant whatever the account size; the import streams the request body and
+bulk-loads the same records in batches, in the caller's transaction.
+"""
+import json
+import os
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Integer, String, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from database import AsyncSessionLocal
+from models import User, Website, WebsiteRevision, GenerationHistory, Template
+from hosting_manager import HostingManager
+from search import index_website_ids
+from generation_usage import apply_usage, usage_deltas
+
+FORMAT = "account-export"
+FORMAT_VERSION = 1
+
+EXPORT_BATCH_SIZE = int(os.getenv("ACCOUNT_EXPORT_BATCH_SIZE", "200"))
+IMPORT_BATCH_SIZE = int(os.getenv("ACCOUNT_IMPORT_BATCH_SIZE", "500"))
+CHUNK_BYTES = 64 * 1024
+MAX_LINE_BYTES = 32 * 1024 * 1024
+
+# Credentials and external identities stay out of the dump
+USER_EXCLUDED_COLUMNS = {"hashed_password", "google_id", "github_id"}
+# Profile fields restored onto the importing account
+USER_IMPORTED_COLUMNS = ("full_name", "avatar_url", "bio")
+# Website fields taken from the export; everything else (status, visibility, custom domain, hosting,
+# counters, version, timestamps) starts from its default, so imported sites are drafts to deploy again
+WEBSITE_IMPORTED_COLUMNS = (
+    "id", "slug", "name", "description", "template_id", "content", "settings", "custom_css", "custom_js",
+    "meta_title", "meta_description", "meta_keywords",
+)
+
+class AccountImportError(ValueError):
+    """Malformed or incompatible export"""
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+def _record(kind: str, data: Dict[str, Any]) -> bytes:
+    return json.dumps({"type": kind, "data": data}, default=_encode, ensure_ascii=False).encode() + b"\n"
+
+# === EXPORT ===
+
+async def _stream_rows(db: AsyncSession, statement) -> AsyncIterator[Dict[str, Any]]:
+    """Rows fetched EXPORT_BATCH_SIZE at a time from a server-side cursor"""
+    result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    async for partition in result.mappings().partitions():
+        for row in partition:
+            yield dict(row)
+
+def _account_statements(user_id: str):
+    websites = Website.__table__
+    revisions = WebsiteRevision.__table__
+    generations = GenerationHistory.__table__
+    owned = select(websites.c.id).where(websites.c.owner_id == user_id)
+    return [
+        ("website", select(websites).where(websites.c.owner_id == user_id).order_by(websites.c.id)),
+        ("revision", select(revisions).where(revisions.c.website_id.in_(owned))
+            .order_by(revisions.c.website_id, revisions.c.number)),
+        ("generation", select(generations).where(generations.c.user_id == user_id).order_by(generations.c.id)),
+    ]
+
+async def export_account(user_id: str, hosting_manager: HostingManager) -> AsyncIterator[bytes]:
+    """NDJSON chunks of about CHUNK_BYTES; uses its own session since it outlives the request handler"""
+    async with AsyncSessionLocal() as db:
+        user_table = User.__table__
+        user = (await db.execute(
+            select(*(c for c in user_table.c if c.name not in USER_EXCLUDED_COLUMNS)).where(user_table.c.id == user_id)
+        )).mappings().one()
+
+        buffer = bytearray(_record("header", {
+            "format": FORMAT, "version": FORMAT_VERSION, "exported_at": datetime.utcnow(), "user_id": user_id
+        }))
+        buffer += _record("user", dict(user))
+
+        for kind, statement in _account_statements(user_id):
+            async for row in _stream_rows(db, statement):
+                buffer += _record(kind, row)
+                if kind == "website" and row["is_hosted"] and row["hosting_subdomain"]:
+                    metadata = await run_in_threadpool(hosting_manager.get_site_info, row["hosting_subdomain"])
+                    if metadata:
+                        buffer += _record("hosting", {"website_id": row["id"], **metadata})
+                if len(buffer) >= CHUNK_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+
+        if buffer:
+            yield bytes(buffer)
+
+# === IMPORT ===
+
+async def read_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str, Dict[str, Any]]]:
+    """(line number, type, data) of each record of a streamed NDJSON body"""
+    pending = b""
+    number = 0
+
+    def parse(line: bytes):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise AccountImportError(f"Line {number}: invalid JSON ({e})")
+        if not isinstance(record, dict) or not isinstance(record.get("type"), str) or not isinstance(record.get("data"), dict):
+            raise AccountImportError(f"Line {number}: expected an object with 'type' and 'data'")
+        return number, record["type"], record["data"]
+
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise AccountImportError(f"Line {number + len(lines) + 1}: longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield parse(line)
+
+    if pending.strip():
+        number += 1
+        yield parse(pending)
+
+def _check_type(column, value: Any):
+    if value is None:
+        return
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        expected = bool
+    elif isinstance(column_type, Integer):
+        expected = int
+    elif isinstance(column_type, String):
+        expected = str
+    else:
+        return
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ValueError(f"{column.name} must be {'a string' if expected is str else expected.__name__}")
+
+def _decode(table, data: Dict[str, Any], columns: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    Every column of the table (executemany needs the same keys in each row): ISO dates parsed back,
+    values type-checked, missing columns and those outside `columns` (if given) set to their default
+    """
+    row = {}
+    for column in table.c:
+        if column.name not in data or (columns is not None and column.name not in columns):
+            default = column.default
+            if default is not None and default.is_callable:
+                row[column.name] = default.arg(None)
+            else:
+                row[column.name] = default.arg if default is not None and default.is_scalar else None
+            continue
+        value = data[column.name]
+        if isinstance(column.type, (DateTime, Date)) and value is not None:
+            if not isinstance(value, str):
+                raise ValueError(f"{column.name} must be an ISO date")
+            value = datetime.fromisoformat(value)
+            if type(column.type) is Date:
+                value = value.date()
+        else:
+            _check_type(column, value)
+        row[column.name] = value
+    return row
+
+class AccountImporter:
+    """Loads export records into the account of `user`; the caller commits once everything is fed"""
+
+    TABLES = {"website": Website.__table__, "revision": WebsiteRevision.__table__, "generation": GenerationHistory.__table__}
+    COLUMNS = {"website": WEBSITE_IMPORTED_COLUMNS}
+
+    def __init__(self, db: AsyncSession, user: User):
+        self.db = db
+        self.user = user
+        self.kind: Optional[str] = None
+        self.batch: List[Dict[str, Any]] = []
+        self.imported_websites: Set[str] = set()
+        self.imported = {"website": 0, "revision": 0, "generation": 0}
+        self.skipped = {"website": 0, "revision": 0, "generation": 0, "hosting": 0}
+        self.seen_header = False
+
+    async def feed(self, number: int, kind: str, data: Dict[str, Any]):
+        if not self.seen_header:
+            if kind != "header" or data.get("format") != FORMAT:
+                raise AccountImportError(f"Line {number}: not an account export")
+            if data.get("version") != FORMAT_VERSION:
+                raise AccountImportError(f"Line {number}: unsupported export version {data.get('version')!r}")
+            self.seen_header = True
+            return
+
+        if kind == "user":
+            for column in USER_IMPORTED_COLUMNS:
+                if data.get(column) is not None:
+                    setattr(self.user, column, data[column])
+        elif kind == "hosting":
+            self.skipped["hosting"] += 1
+        elif kind in self.TABLES:
+            if kind != self.kind:
+                await self.flush()
+                self.kind = kind
+            try:
+                row = _decode(self.TABLES[kind], data, self.COLUMNS.get(kind))
+            except ValueError as e:
+                raise AccountImportError(f"Line {number}: {e}")
+            if kind == "website" and not row["name"]:
+                raise AccountImportError(f"Line {number}: website without a name")
+            self.batch.append(row)
+            if len(self.batch) >= IMPORT_BATCH_SIZE:
+                await self.flush()
+        else:
+            raise AccountImportError(f"Line {number}: unknown record type {kind!r}")
+
+    async def flush(self):
+        if self.batch:
+            rows, self.batch = self.batch, []
+            load = getattr(self, f"_load_{self.kind}s")
+            await self.db.run_sync(lambda session: load(session.connection(), rows))
+
+    async def finish(self) -> Dict[str, Dict[str, int]]:
+        if not self.seen_header:
+            raise AccountImportError("Empty export")
+        await self.flush()
+        return {"imported": self.imported, "skipped": self.skipped}
+
+    def _new_rows(self, connection, table, rows: List[Dict[str, Any]], kind: str) -> List[Dict[str, Any]]:
+        """Rows whose ID is not taken yet (re-importing the same export is a no-op)"""
+        ids = [row["id"] for row in rows if row.get("id")]
+        existing = set(connection.scalars(select(table.c.id).where(table.c.id.in_(ids))))
+        new_rows = [row for row in rows if row.get("id") and row["id"] not in existing]
+        self.skipped[kind] += len(rows) - len(new_rows)
+        return new_rows
+
+    def _load_websites(self, connection, rows: List[Dict[str, Any]]):
+        table = Website.__table__
+        rows = self._new_rows(connection, table, rows, "website")
+        if not rows:
+            return
+
+        template_ids = {row["template_id"] for row in rows if row.get("template_id")}
+        known_templates = set(connection.scalars(select(Template.id).where(Template.id.in_(template_ids))))
+        taken_slugs = set(connection.scalars(select(table.c.slug).where(table.c.slug.in_([row.get("slug") for row in rows]))))
+        for row in rows:
+            row["owner_id"] = self.user.id
+            if row.get("template_id") not in known_templates:
+                row["template_id"] = None
+            if not row.get("slug") or row["slug"] in taken_slugs:
+                row["slug"] = f"{row.get('slug') or 'site'}-{row['id'][:8]}"
+
+        connection.execute(table.insert(), rows)
+        website_ids = [row["id"] for row in rows]
+        index_website_ids(connection, website_ids)
+        self.imported_websites.update(website_ids)
+        self.imported["website"] += len(rows)
+
+    def _load_revisions(self, connection, rows: List[Dict[str, Any]]):
+        # History of websites that were not imported (already present, or foreign) is dropped
+        new_rows = [row for row in rows if row.get("website_id") in self.imported_websites]
+        self.skipped["revision"] += len(rows) - len(new_rows)
+        if new_rows:
+            connection.execute(WebsiteRevision.__table__.insert(), new_rows)
+            self.imported["revision"] += len(new_rows)
+
+    def _load_generations(self, connection, rows: List[Dict[str, Any]]):
+        rows = self._new_rows(connection, GenerationHistory.__table__, rows, "generation")
+        if not rows:
+            return
+
+        for row in rows:
+            row["user_id"] = self.user.id
+            if row.get("website_id") not in self.imported_websites:
+                row["website_id"] = None
+
+        connection.execute(GenerationHistory.__table__.insert(), rows)
+        # Core insert: no ORM flush to roll the usage up
+        apply_usage(connection, usage_deltas(SimpleNamespace(**row) for row in rows))
+        self.imported["generation"] += len(rows)
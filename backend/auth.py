@@ -2,15 +2,22 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+import uuid
 from dotenv import load_dotenv
 
-from database import get_db
+from database import get_async_db
 from models import User
 from schemas import TokenData
+from slug_allocator import insert_with_unique_value
+from counters import user_last_login
+from principal_cache import principal_cache
+from password_hasher import password_hasher, PasswordHasherBusy
+from auth_sessions import revoked_sessions
 
 # Load environment variables
 load_dotenv()
@@ -20,8 +27,9 @@ SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (work factor 2^BCRYPT_ROUNDS; older hashes are upgraded on login)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # Token security
 security = HTTPBearer()
@@ -34,6 +42,27 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+async def hash_password(password: str) -> str:
+    """get_password_hash on the password hashing pool (503 when it is saturated)"""
+    try:
+        return await password_hasher.run(pwd_context.hash, password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
+async def verify_and_update_password(plain_password: str, hashed_password: str):
+    """(valid, new hash if the stored one uses outdated parameters) on the password hashing pool"""
+    try:
+        return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -46,42 +75,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[TokenData]:
-    """Verify and decode a JWT token"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verified claims of a JWT token, None if invalid, expired or without subject"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        token_data = TokenData(user_id=user_id)
-        return token_data
     except JWTError:
         return None
+    return payload if payload.get("sub") is not None else None
+
+def verify_token(token: str) -> Optional[TokenData]:
+    """Verify and decode a JWT token"""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return TokenData(user_id=payload["sub"])
 
-def get_user(db: Session, user_id: str) -> Optional[User]:
+async def get_user(db: AsyncSession, user_id: str) -> Optional[User]:
     """Get user by ID"""
-    return db.query(User).filter(User.id == user_id).first()
+    return await db.scalar(select(User).where(User.id == user_id))
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email"""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Get user by username"""
-    return db.query(User).filter(User.username == username).first()
+    return await db.scalar(select(User).where(User.username == username))
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user with email and password"""
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -92,23 +129,35 @@ async def get_current_user(
     
     try:
         token = credentials.credentials
-        token_data = verify_token(token)
-        if token_data is None:
+        principal = principal_cache.get(token)
+        if principal is not None:
+            # Warm client: no token decoding, no query
+            claims = principal.claims
+            user = await db.merge(principal.user, load=False)
+        else:
+            claims = decode_token(token)
+            if claims is None:
+                raise credentials_exception
+
+            user = await get_user(db, user_id=claims["sub"])
+            if user is None:
+                raise credentials_exception
+            principal = principal_cache.put(token, claims, user)
+
+        # Access tokens of a logged out (or compromised) session die with it
+        if revoked_sessions.is_revoked(claims.get("sid")):
             raise credentials_exception
-        
-        user = get_user(db, user_id=token_data.user_id)
-        if user is None:
-            raise credentials_exception
-            
+
         if not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Inactive user"
             )
             
-        # Update last login
-        user.last_login = datetime.utcnow()
-        db.commit()
+        # Update last login (throttled and batched: authenticated reads stay read-only)
+        last_seen = user_last_login.touch(user.id, principal.last_login if principal else user.last_login)
+        if principal is not None and last_seen is not None:
+            principal.last_login = last_seen
         
         return user
     except Exception as e:
@@ -120,23 +169,23 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def create_user(db: Session, user_create) -> User:
+async def create_user(db: AsyncSession, user_create) -> User:
     """Create a new user"""
     # Check if user already exists
-    if get_user_by_email(db, user_create.email):
+    if await get_user_by_email(db, user_create.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    if get_user_by_username(db, user_create.username):
+    if await get_user_by_username(db, user_create.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already taken"
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await hash_password(user_create.password)
     db_user = User(
         email=user_create.email,
         username=user_create.username,
@@ -145,42 +194,36 @@ def create_user(db: Session, user_create) -> User:
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 # OAuth2 functions (for Phase 2)
-def create_user_from_oauth(db: Session, email: str, name: str, username: str, provider: str, provider_id: str) -> User:
+async def create_user_from_oauth(db: AsyncSession, email: str, name: str, username: str, provider: str, provider_id: str) -> User:
     """Create a user from OAuth provider data"""
     # Generate a random password for OAuth users
     import secrets
     random_password = secrets.token_urlsafe(32)
-    hashed_password = get_password_hash(random_password)
+    hashed_password = await hash_password(random_password)
     
-    # Make sure username is unique
-    original_username = username
-    counter = 1
-    while get_user_by_username(db, username):
-        username = f"{original_username}_{counter}"
-        counter += 1
-    
-    db_user = User(
-        email=email,
-        username=username,
-        full_name=name,
-        hashed_password=hashed_password,
-        is_verified=True  # OAuth users are considered verified
-    )
+    user_id = str(uuid.uuid4())
+    values = {
+        "id": user_id,
+        "email": email,
+        "full_name": name,
+        "hashed_password": hashed_password,
+        "is_verified": True  # OAuth users are considered verified
+    }
     
     # Set provider-specific ID
     if provider == "google":
-        db_user.google_id = provider_id
+        values["google_id"] = provider_id
     elif provider == "github":
-        db_user.github_id = provider_id
+        values["github_id"] = provider_id
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    # Insert with a unique username (username, username_1, ...)
+    await insert_with_unique_value(db, User, values, "username", username, separator="_")
+    await db.commit()
     
-    return db_user
\ No newline at end of file
+    return await get_user(db, user_id)
\ No newline at end of file
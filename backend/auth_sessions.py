@@ -0,0 +1,179 @@
+"""
+Auth Sessions Module
+Refresh tokens backed by the auth_sessions table. A refresh token is "<session id>.<secret>" and the
+row stores only the SHA-256 of the current secret. Every refresh rotates the secret with a single
+compare-and-swap UPDATE; presenting a superseded secret means the token was copied, so the session
+is revoked (reuse detection) and the legitimate holder has to log in again.
+
+Access tokens carry their session id (`sid`). Revoked session ids are held in an in-memory index,
+refreshed from the table every SESSION_REVOCATION_POLL_SECONDS by each worker, so revocation is
+enforced on every request without a query. Entries are kept as long as an access token can live.
+"""
+import os
+import uuid
+import hashlib
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, select, update, delete, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import AuthSession
+
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Same setting as auth.ACCESS_TOKEN_EXPIRE_MINUTES: how long a revoked session must stay in the index
+ACCESS_TOKEN_LIFETIME = timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")))
+# Rows revoked or expired for longer than this are purged
+SESSION_RETENTION = timedelta(days=1)
+
+class RefreshTokenError(Exception):
+    """Unknown, expired, revoked or reused refresh token"""
+
+def _hash(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+def _split(refresh_token: str) -> Tuple[str, str]:
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id or not secret:
+        raise RefreshTokenError("Malformed refresh token")
+    return session_id, secret
+
+# === SESSIONS ===
+
+async def create_session(db: AsyncSession, user_id: str) -> Tuple[str, str]:
+    """New session for a successful login; returns (session id, refresh token). The caller commits."""
+    session_id = str(uuid.uuid4())
+    secret = secrets.token_urlsafe(32)
+    db.add(AuthSession(
+        id=session_id,
+        user_id=user_id,
+        token_hash=_hash(secret),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return session_id, f"{session_id}.{secret}"
+
+async def rotate_session(db: AsyncSession, refresh_token: str) -> Tuple[str, str, str]:
+    """
+    Swap the token for a new one; returns (user id, session id, new refresh token). The caller commits,
+    also when RefreshTokenError is raised, so that a reuse revocation is persisted.
+    """
+    session_id, secret = _split(refresh_token)
+    new_secret = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+
+    table = AuthSession.__table__
+    row = (await db.execute(
+        update(table)
+        .where(
+            table.c.id == session_id,
+            table.c.token_hash == _hash(secret),
+            table.c.revoked_at.is_(None),
+            table.c.expires_at > now
+        )
+        .values(
+            token_hash=_hash(new_secret),
+            generation=table.c.generation + 1,
+            rotated_at=now,
+            expires_at=now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+        .returning(table.c.user_id)
+    )).first()
+    if row is not None:
+        return row.user_id, session_id, f"{session_id}.{new_secret}"
+
+    session = (await db.execute(
+        select(table.c.revoked_at, table.c.expires_at).where(table.c.id == session_id)
+    )).first()
+    if session is not None and session.revoked_at is None and session.expires_at > now:
+        # Live session, superseded secret: the token was used twice
+        await revoke_session(db, session_id, "reuse")
+        raise RefreshTokenError("Refresh token reuse detected, session revoked")
+    raise RefreshTokenError("Invalid or expired refresh token")
+
+async def revoke_session(db: AsyncSession, session_id: str, reason: str, token_hash: Optional[str] = None) -> bool:
+    """Revoke a live session (only if its current token hash matches, when given). The caller commits."""
+    table = AuthSession.__table__
+    statement = (
+        update(table)
+        .where(table.c.id == session_id, table.c.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow(), revoked_reason=reason)
+    )
+    if token_hash is not None:
+        statement = statement.where(table.c.token_hash == token_hash)
+    result = await db.execute(statement)
+    if result.rowcount:
+        db.sync_session.info.setdefault("revoked_sessions", set()).add(session_id)
+    return bool(result.rowcount)
+
+async def logout_session(db: AsyncSession, refresh_token: str) -> bool:
+    """Revoke the session of a refresh token, if it is still the current one"""
+    session_id, secret = _split(refresh_token)
+    return await revoke_session(db, session_id, "logout", token_hash=_hash(secret))
+
+def purge_sessions(db: Session) -> int:
+    """Delete sessions expired or revoked for longer than SESSION_RETENTION"""
+    cutoff = datetime.utcnow() - SESSION_RETENTION
+    table = AuthSession.__table__
+    result = db.execute(delete(table).where(or_(table.c.expires_at < cutoff, table.c.revoked_at < cutoff)))
+    db.commit()
+    return result.rowcount
+
+# === REVOCATION INDEX ===
+
+class RevokedSessionIndex:
+    """Session ids revoked within the access token lifetime (checked on every authenticated request)"""
+
+    # Re-read slightly before the watermark: a revocation may commit after a later one was polled
+    POLL_OVERLAP = timedelta(seconds=60)
+
+    def __init__(self, retention: timedelta = ACCESS_TOKEN_LIFETIME):
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._revoked: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+
+    def is_revoked(self, session_id: Optional[str]) -> bool:
+        return session_id is not None and session_id in self._revoked
+
+    def mark(self, session_id: str, revoked_at: Optional[datetime] = None):
+        with self._lock:
+            self._revoked[session_id] = revoked_at or datetime.utcnow()
+
+    def poll(self, db: Session) -> int:
+        """Load revocations since the last poll and forget those older than the access token lifetime"""
+        now = datetime.utcnow()
+        since = (self._watermark or now - self.retention) - self.POLL_OVERLAP
+        rows = db.execute(
+            select(AuthSession.id, AuthSession.revoked_at).where(AuthSession.revoked_at >= since)
+        ).all()
+
+        with self._lock:
+            for session_id, revoked_at in rows:
+                self._revoked[session_id] = revoked_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            if self._watermark is None:
+                self._watermark = now - self.retention
+
+            cutoff = now - self.retention - self.POLL_OVERLAP
+            for session_id in [s for s, revoked_at in self._revoked.items() if revoked_at < cutoff]:
+                del self._revoked[session_id]
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+revoked_sessions = RevokedSessionIndex()
+
+@event.listens_for(Session, "after_commit")
+def _index_revoked_sessions(session):
+    """This worker enforces its own revocations immediately, the others at their next poll"""
+    for session_id in session.info.pop("revoked_sessions", ()):
+        revoked_sessions.mark(session_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_revoked_sessions(session):
+    session.info.pop("revoked_sessions", None)
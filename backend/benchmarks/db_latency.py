@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tail latency of async endpoints using a sync Session vs an AsyncSession
+
+A few slow queries (simulated with a sleeping SQL function) run concurrently with many fast
+ones against a real uvicorn server. With a sync Session every query blocks the event loop,
+so the fast requests queue behind the slow ones.
+
+Usage: python benchmarks/db_latency.py [--fast 500] [--slow 20] [--slow-ms 200] [--concurrency 50]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+# Isolated SQLite database, configured before the database module is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DEBUG"] = "False"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy import event, text
+
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine, init_db
+
+SLOW_QUERY = text("SELECT bench_sleep(:ms)")
+FAST_QUERY = text("SELECT 1")
+PORT = 8765
+
+def _register_sleep(dbapi_connection, connection_record):
+    # Stands in for a slow query: waits without holding the GIL, like a remote database would
+    dbapi_connection.create_function("bench_sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+event.listen(engine, "connect", _register_sleep)
+event.listen(async_engine.sync_engine, "connect", _register_sleep)
+
+def build_app(mode: str, slow_ms: int) -> FastAPI:
+    app = FastAPI()
+
+    if mode == "sync":
+        def run(query):
+            db = SessionLocal()
+            try:
+                return db.execute(query, {"ms": slow_ms}).scalar()
+            finally:
+                db.close()
+
+        @app.get("/slow")
+        async def slow():
+            return {"value": run(SLOW_QUERY)}
+
+        @app.get("/fast")
+        async def fast():
+            return {"value": run(FAST_QUERY)}
+    else:
+        async def run(query):
+            async with AsyncSessionLocal() as db:
+                return (await db.execute(query, {"ms": slow_ms})).scalar()
+
+        @app.get("/slow")
+        async def slow():
+            return {"value": await run(SLOW_QUERY)}
+
+        @app.get("/fast")
+        async def fast():
+            return {"value": await run(FAST_QUERY)}
+
+    return app
+
+def serve(app: FastAPI):
+    """Start uvicorn in a background thread"""
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+async def run_load(fast_requests: int, slow_requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    limits = httpx.Limits(max_connections=concurrency + slow_requests)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=120) as client:
+        async def fast():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/fast")
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        async def slow(delay: float):
+            await asyncio.sleep(delay)
+            response = await client.get("/slow")
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        fast_tasks = [asyncio.create_task(fast()) for _ in range(fast_requests)]
+        # Spread the slow requests over the first half of the run
+        slow_tasks = [asyncio.create_task(slow(i * 0.05)) for i in range(slow_requests)]
+        await asyncio.gather(*fast_tasks, *slow_tasks)
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+        "max": latencies[-1],
+        "throughput": len(latencies) / elapsed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fast", type=int, default=500, help="Fast requests (measured)")
+    parser.add_argument("--slow", type=int, default=20, help="Slow requests mixed in")
+    parser.add_argument("--slow-ms", type=int, default=200, help="Duration of each slow query")
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    init_db()
+    print(f"{'mode':<8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'req/s':>10}")
+    for mode in ("sync", "async"):
+        server, thread = serve(build_app(mode, args.slow_ms))
+        try:
+            result = asyncio.run(run_load(args.fast, args.slow, args.concurrency))
+        finally:
+            server.should_exit = True
+            thread.join()
+        print(f"{mode:<8}{result['p50']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}{result['throughput']:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark: bcrypt hashes per second for each work factor, on one thread and on
+the worker count of the hashing pool, to choose BCRYPT_ROUNDS and PASSWORD_HASH_WORKERS.
+
+Usage: python benchmarks/password_hashing.py [--rounds 10 11 12 13] [--seconds 3] [--threads N]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+from passlib.context import CryptContext
+
+def measure(context: CryptContext, threads: int, seconds: float) -> int:
+    """Hashes completed by `threads` threads hashing in a loop for `seconds`"""
+    deadline = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def worker(index: int):
+        while time.perf_counter() < deadline:
+            context.hash("benchmark-passw0rd")
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(counts)
+
+def main() -> int:
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt work factors")
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each measurement")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or cores,
+                        help="Concurrent hashing threads (default: PASSWORD_HASH_WORKERS or the core count)")
+    args = parser.parse_args()
+
+    print(f"{cores} core(s), {args.threads} thread(s), {args.seconds:.0f}s per measurement")
+    print(f"{'rounds':>6}  {'ms/hash':>8}  {'1 thread/s':>10}  {f'{args.threads} threads/s':>12}  {'per core/s':>10}")
+    for rounds in args.rounds:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        context.hash("warm-up")
+
+        single = measure(context, 1, args.seconds) / args.seconds
+        pooled = measure(context, args.threads, args.seconds) / args.seconds
+        per_core = pooled / min(args.threads, cores)
+        print(f"{rounds:>6}  {1000 / single:>8.1f}  {single:>10.1f}  {pooled:>12.1f}  {per_core:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
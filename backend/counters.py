@@ -0,0 +1,156 @@
+"""
+Buffered counters
+Increments of an integer column are aggregated in memory per row key and flushed periodically
+as atomic `UPDATE ... SET col = col + :delta` statements (one executemany per counter).
+With COUNTERS_EXACT=True every increment is applied immediately in the caller's transaction.
+LastSeenBuffer does the same for "latest timestamp" columns such as users.last_login.
+"""
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Table, bindparam, func, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, Template
+
+COUNTERS_EXACT = os.getenv("COUNTERS_EXACT", "False") == "True"
+LAST_LOGIN_UPDATE_INTERVAL_SECONDS = float(os.getenv("LAST_LOGIN_UPDATE_INTERVAL_SECONDS", "300"))
+
+class CounterBuffer:
+    """Per-row deltas for one integer column"""
+
+    def __init__(self, table: Table, column_name: str, key_column_name: str = "id", exact: Optional[bool] = None):
+        self.table = table
+        self.column_name = column_name
+        self.key_column_name = key_column_name
+        self.exact = COUNTERS_EXACT if exact is None else exact
+
+        self._lock = threading.Lock()
+        self._deltas: Dict[str, int] = defaultdict(int)
+
+        column = table.c[column_name]
+        key_column = table.c[key_column_name]
+        self._update_stmt = (
+            update(table)
+            .where(key_column == bindparam("b_key"))
+            .values({column_name: func.coalesce(column, 0) + bindparam("b_delta")})
+        )
+
+    def record(self, key: str, delta: int = 1):
+        """Buffer an increment (O(1), no database access)"""
+        with self._lock:
+            self._deltas[key] += delta
+
+    async def increment(self, db: AsyncSession, key: str, delta: int = 1):
+        """Increment through the buffer, or immediately in `db`'s transaction in exact mode"""
+        if self.exact:
+            await db.execute(self._update_stmt, {"b_key": key, "b_delta": delta})
+        else:
+            self.record(key, delta)
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._deltas)
+
+    def take(self) -> Dict[str, int]:
+        """Swap out the buffered deltas"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+        return deltas
+
+    def restore(self, deltas: Dict[str, int]):
+        """Put deltas back after a failed flush so they are retried"""
+        with self._lock:
+            for key, delta in deltas.items():
+                self._deltas[key] += delta
+
+    def apply(self, db: Session, deltas: Dict[str, int]):
+        """One batched UPDATE for all keys (the caller commits)"""
+        if deltas:
+            db.execute(self._update_stmt, [{"b_key": key, "b_delta": delta} for key, delta in deltas.items()])
+
+    def flush(self, db: Session) -> int:
+        """Write buffered deltas; returns the number of rows updated"""
+        deltas = self.take()
+        if not deltas:
+            return 0
+
+        try:
+            self.apply(db, deltas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.restore(deltas)
+            raise
+        return len(deltas)
+
+class LastSeenBuffer(CounterBuffer):
+    """
+    Latest timestamp per row instead of a sum: a row is touched at most once per `interval`
+    (judged from the value the caller already loaded), and concurrent touches coalesce to the newest.
+    """
+
+    def __init__(self, table: Table, column_name: str, interval: float, key_column_name: str = "id"):
+        super().__init__(table, column_name, key_column_name, exact=False)
+        self.interval = timedelta(seconds=interval)
+        self._deltas = {}
+
+        column = table.c[column_name]
+        # b_delta carries the timestamp; never move a value written by another worker backwards
+        self._update_stmt = (
+            update(table)
+            .where(table.c[key_column_name] == bindparam("b_key"), or_(column.is_(None), column < bindparam("b_delta")))
+            .values({column_name: bindparam("b_delta")})
+        )
+
+    def record(self, key: str, value: datetime):
+        with self._lock:
+            current = self._deltas.get(key)
+            if current is None or value > current:
+                self._deltas[key] = value
+
+    def touch(self, key: str, last_seen: Optional[datetime]) -> Optional[datetime]:
+        """Buffer the current time if `last_seen` is older than the interval; returns it when buffered"""
+        now = datetime.utcnow()
+        if last_seen is None or now - last_seen >= self.interval:
+            self.record(key, now)
+            return now
+        return None
+
+    def take(self) -> Dict[str, datetime]:
+        with self._lock:
+            values, self._deltas = self._deltas, {}
+        return values
+
+    def restore(self, values: Dict[str, datetime]):
+        for key, value in values.items():
+            self.record(key, value)
+
+class CounterRegistry:
+    """All buffered counters of the process, flushed together by the background job"""
+
+    def __init__(self):
+        self.counters: List[CounterBuffer] = []
+
+    def register(self, counter: CounterBuffer) -> CounterBuffer:
+        self.counters.append(counter)
+        return counter
+
+    def flush_all(self, db: Session) -> int:
+        flushed = 0
+        for counter in self.counters:
+            try:
+                flushed += counter.flush(db)
+            except Exception as e:
+                print(f"Counter flush failed for {counter.table.name}.{counter.column_name}: {e}")
+        return flushed
+
+counters = CounterRegistry()
+
+template_usage = counters.register(CounterBuffer(Template.__table__, "usage_count"))
+template_ratings = counters.register(CounterBuffer(Template.__table__, "rating_count"))
+user_last_login = counters.register(LastSeenBuffer(User.__table__, "last_login", LAST_LOGIN_UPDATE_INTERVAL_SECONDS))
@@ -1,9 +1,17 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool, QueuePool, AsyncAdaptedQueuePool
+from typing import Dict, Any, List, Optional
 import os
+import hashlib
+import itertools
+import threading
+import time
 from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import Response
 
 # Load environment variables
 load_dotenv()
@@ -11,25 +19,152 @@ load_dotenv()
 # Database URL - Using SQLite for MVP, PostgreSQL for production
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_website_generator.db")
 
-# Create engine
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite configuration for development
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=True if os.getenv("DEBUG") == "True" else False
-    )
-else:
-    # PostgreSQL configuration for production
-    engine = create_engine(
-        DATABASE_URL,
-        echo=True if os.getenv("DEBUG") == "True" else False
+def _async_database_url(url: str) -> str:
+    """Same database through an asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    for prefix in ("postgresql+psycopg2:", "postgresql:", "postgres:"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+asyncpg:", 1)
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(DATABASE_URL))
+
+# Read replicas (comma-separated URLs, same schema as the primary); empty means every query uses the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# After a write, the same client reads from the primary for this long so it never sees replication lag
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+DB_ECHO = True if os.getenv("DEBUG") == "True" else False
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+
+# SQLite tuning
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+class PoolMetrics:
+    """Connection checkout counters and wait times"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+class _InstrumentedPoolMixin:
+    """Records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool: keep counting for the same engine
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def _engine_options(url: str, pool_class) -> Dict[str, Any]:
+    if url.startswith("sqlite") and _is_memory_sqlite(url):
+        # In-memory SQLite only exists inside a single connection
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+
+    options = {
+        "poolclass": pool_class,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT
+    }
+    if url.startswith("sqlite"):
+        # SQLite configuration for development: one connection per concurrent session, WAL mode
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # PostgreSQL configuration for production
+        options.update({"pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": DB_POOL_PRE_PING})
+    return options
+
+# Create engines: the sync engine serves scripts and background jobs, the async engine serves the API
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, **_engine_options(DATABASE_URL, InstrumentedQueuePool))
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, echo=DB_ECHO, **_engine_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+)
+
+if DATABASE_URL.startswith("sqlite") and not _is_memory_sqlite(DATABASE_URL):
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+if ASYNC_DATABASE_URL.startswith("sqlite") and not _is_memory_sqlite(ASYNC_DATABASE_URL):
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+replica_engines = [
+    create_async_engine(
+        _async_database_url(url), echo=DB_ECHO,
+        **_engine_options(_async_database_url(url), InstrumentedAsyncQueuePool)
     )
+    for url in DATABASE_REPLICA_URLS
+]
+for replica_url, replica_engine in zip(DATABASE_REPLICA_URLS, replica_engines):
+    if replica_url.startswith("sqlite") and not _is_memory_sqlite(replica_url):
+        event.listen(replica_engine.sync_engine, "connect", _set_sqlite_pragmas)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay loaded after commit: lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -44,8 +179,153 @@ def get_db():
     finally:
         db.close()
 
+class ReplicaRouter:
+    """Chooses the engine of read-only sessions and remembers which clients wrote recently"""
+
+    def __init__(self, engines: List[Any], window: float, max_tracked: int = 100_000):
+        self.engines = engines
+        self.window = window
+        self.max_tracked = max_tracked
+        self._round_robin = itertools.cycle(range(len(engines))) if engines else None
+        self._lock = threading.Lock()
+        self._last_write: Dict[str, float] = {}
+
+    def note_write(self, key: str) -> float:
+        now = time.time()
+        with self._lock:
+            self._last_write[key] = now
+            if len(self._last_write) > self.max_tracked:
+                # Entries older than the window no longer affect routing
+                self._last_write = {k: t for k, t in self._last_write.items() if now - t < self.window}
+        return now
+
+    def wrote_recently(self, key: str, client_last_write: Optional[float] = None) -> bool:
+        """True if this worker saw a write from `key`, or the client reports one, inside the window"""
+        now = time.time()
+        last_write = max(self._last_write.get(key, 0.0), client_last_write or 0.0)
+        return now - last_write < self.window
+
+    def read_engine(self, key: str, client_last_write: Optional[float] = None):
+        if not self.engines or self.wrote_recently(key, client_last_write):
+            return async_engine
+        with self._lock:
+            return self.engines[next(self._round_robin)]
+
+replica_router = ReplicaRouter(replica_engines, READ_YOUR_WRITES_SECONDS)
+
+LAST_WRITE_HEADER = "X-Last-Write"
+
+def _consistency_key(request: Request) -> str:
+    """Identifies a client for read-your-writes: its credentials, or its address when anonymous"""
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode()).hexdigest()[:32]
+
+def _client_last_write(request: Request) -> Optional[float]:
+    try:
+        return float(request.headers[LAST_WRITE_HEADER])
+    except (KeyError, ValueError):
+        return None
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement_writes(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_flush")
+def _track_flush_writes(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _note_committed_writes(session):
+    on_write = session.info.get("on_write")
+    if session.info.pop("wrote", False) and on_write is not None:
+        on_write()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_writes(session):
+    session.info.pop("wrote", None)
+
+async def get_async_db(request: Request = None, response: Response = None):
+    """Dependency to get an async database session on the primary"""
+    async with AsyncSessionLocal() as db:
+        if request is not None and replica_engines:
+            key = _consistency_key(request)
+
+            def on_write():
+                last_write = replica_router.note_write(key)
+                if response is not None:
+                    # Clients echo it back so other workers route their reads to the primary too
+                    response.headers[LAST_WRITE_HEADER] = f"{last_write:.3f}"
+
+            db.info["on_write"] = on_write
+        yield db
+
+async def get_read_db(request: Request = None):
+    """
+    Dependency for read-only endpoints: a session on a replica, or on the primary if
+    no replica is configured or the client wrote within READ_YOUR_WRITES_SECONDS
+    """
+    if request is None or not replica_engines:
+        bind = async_engine
+    else:
+        bind = replica_router.read_engine(_consistency_key(request), _client_last_write(request))
+
+    async with AsyncSessionLocal(bind=bind) as db:
+        yield db
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    stats = {"pool": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "idle": pool.checkedin(),
+            **pool.metrics.snapshot()
+        })
+    return stats
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Current pool occupancy plus checkout wait metrics for both engines"""
+    return {
+        "sync": _pool_stats(engine.pool),
+        "async": _pool_stats(async_engine.pool),
+        "replicas": [_pool_stats(replica.pool) for replica in replica_engines]
+    }
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def get_alembic_config():
+    """Alembic configuration pointing at backend/migrations"""
+    from alembic.config import Config
+
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def upgrade_database(bind=None):
+    """Apply pending migrations to `bind` (the primary engine by default)"""
+    from alembic import command
+    from sqlalchemy import inspect
+
+    config = get_alembic_config()
+
+    # No transaction of ours around Alembic: it commits each migration itself, and migrations that
+    # build indexes CONCURRENTLY on PostgreSQL need to leave the transaction (autocommit_block)
+    with (bind or engine).connect() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        connection.commit()
+
+        # Databases created by create_all before migrations existed already match the initial revision
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(config, "0001")
+
+        command.upgrade(config, "head")
+
 def init_db():
-    """Initialize database - create all tables"""
+    """Initialize database - apply pending migrations"""
     print("Initializing database...")
-    Base.metadata.create_all(bind=engine)
-    print("Database initialized successfully!")
\ No newline at end of file
+    upgrade_database()
+    print("Database initialized successfully!")
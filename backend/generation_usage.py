@@ -0,0 +1,146 @@
+"""
+Generation Usage Module
+Daily rollups of generation_history per (user, day, AI service, model), upserted in the transaction
+that records the generation. Quota checks and the usage dashboard read a user's buckets for the
+period (at most days x services x models rows, through the primary key) instead of the history.
+generation_history is append-only: rollups follow inserts, and are not reduced when history is purged.
+"""
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User, GenerationHistory, GenerationUsage
+from slug_allocator import dialect_insert
+
+METRICS = ("generations", "tokens_used", "cost")
+
+# Monthly quotas of each subscription plan (None = unlimited); plans not listed are unlimited
+SUBSCRIPTION_PLANS = {
+    "free": {"generations": 20, "tokens_used": 50_000, "cost": 100},
+    "pro": {"generations": 500, "tokens_used": 2_000_000, "cost": 2000},
+    "team": {"generations": 2000, "tokens_used": 10_000_000, "cost": 10_000},
+    "enterprise": {"generations": None, "tokens_used": None, "cost": None},
+}
+
+# Per-plan overrides of one metric ("plan=value,...", "plan=none" lifts the limit)
+LIMIT_SETTINGS = {
+    "generations": "GENERATION_MONTHLY_LIMITS",
+    "tokens_used": "TOKEN_MONTHLY_LIMITS",
+    "cost": "COST_MONTHLY_LIMITS_CENTS",
+}
+
+BucketKey = Tuple[str, date, str, str]
+
+def parse_limits(value: str) -> Dict[str, Optional[int]]:
+    limits = {}
+    for part in value.split(","):
+        plan, _, limit = part.strip().partition("=")
+        limit = limit.strip().lower()
+        if plan and limit.isdigit():
+            limits[plan] = int(limit)
+        elif plan and limit in ("none", "unlimited"):
+            limits[plan] = None
+    return limits
+
+def load_plan_limits() -> Dict[str, Dict[str, Optional[int]]]:
+    """SUBSCRIPTION_PLANS with the environment overrides applied"""
+    plans = {plan: dict(limits) for plan, limits in SUBSCRIPTION_PLANS.items()}
+    for metric, setting in LIMIT_SETTINGS.items():
+        for plan, limit in parse_limits(os.getenv(setting, "")).items():
+            plans.setdefault(plan, dict.fromkeys(METRICS))[metric] = limit
+    return plans
+
+PLAN_LIMITS = load_plan_limits()
+
+def plan_limits(plan: Optional[str]) -> Dict[str, Optional[int]]:
+    return dict(PLAN_LIMITS.get(plan or "free", dict.fromkeys(METRICS)))
+
+def month_start(today: Optional[date] = None) -> date:
+    return (today or datetime.utcnow().date()).replace(day=1)
+
+# === ROLLUP MAINTENANCE ===
+
+def bucket_key(generation) -> BucketKey:
+    created_at = generation.created_at or datetime.utcnow()
+    return (generation.user_id, created_at.date(), generation.ai_service, generation.model_used or "")
+
+def usage_deltas(generations: Iterable) -> Dict[BucketKey, Dict[str, int]]:
+    """Per-bucket increments for GenerationHistory objects or rows with the same attributes"""
+    deltas: Dict[BucketKey, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+    for generation in generations:
+        delta = deltas[bucket_key(generation)]
+        delta["generations"] += 1
+        delta["tokens_used"] += generation.tokens_used or 0
+        delta["cost"] += generation.cost or 0
+    return deltas
+
+def apply_usage(connection, deltas: Dict[BucketKey, Dict[str, int]]):
+    """Add increments to the rollup buckets, creating missing ones (the caller commits)"""
+    if not deltas:
+        return
+
+    table = GenerationUsage.__table__
+    rows = [
+        {"user_id": user_id, "day": day, "ai_service": ai_service, "model_used": model_used, **delta}
+        for (user_id, day, ai_service, model_used), delta in deltas.items()
+    ]
+    statement = dialect_insert(connection.dialect.name, table)
+    if hasattr(statement, "on_conflict_do_update"):
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "day", "ai_service", "model_used"],
+            set_={metric: table.c[metric] + statement.excluded[metric] for metric in METRICS}
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        key = [table.c[column] == row[column] for column in ("user_id", "day", "ai_service", "model_used")]
+        result = connection.execute(
+            table.update().where(*key).values({metric: table.c[metric] + row[metric] for metric in METRICS})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+@event.listens_for(Session, "after_flush")
+def _roll_up_generations(session, flush_context):
+    """Generations inserted through the ORM update their buckets in the same transaction"""
+    deltas = usage_deltas(obj for obj in session.new if isinstance(obj, GenerationHistory))
+    if deltas:
+        apply_usage(session.connection(), deltas)
+
+# === READS ===
+
+async def usage_totals(db: AsyncSession, user_id: str, since: date) -> Dict[str, int]:
+    """Sums of a user's buckets from `since` (one primary-key range scan)"""
+    row = (await db.execute(
+        select(*(func.coalesce(func.sum(getattr(GenerationUsage, metric)), 0) for metric in METRICS))
+        .where(GenerationUsage.user_id == user_id, GenerationUsage.day >= since)
+    )).one()
+    return dict(zip(METRICS, row))
+
+async def usage_buckets(db: AsyncSession, user_id: str, since: date) -> List[GenerationUsage]:
+    return (await db.scalars(
+        select(GenerationUsage)
+        .where(GenerationUsage.user_id == user_id, GenerationUsage.day >= since)
+        .order_by(GenerationUsage.day, GenerationUsage.ai_service, GenerationUsage.model_used)
+    )).all()
+
+async def check_generation_quota(db: AsyncSession, user: User):
+    """Raise 429 when the user has used up one of the monthly limits of their plan"""
+    limits = plan_limits(user.subscription_plan)
+    if all(limit is None for limit in limits.values()):
+        return
+
+    used = await usage_totals(db, user.id, month_start())
+    exceeded = [metric for metric, limit in limits.items() if limit is not None and used[metric] >= limit]
+    if exceeded:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Monthly generation quota exceeded ({', '.join(exceeded)})"
+        )
@@ -3,9 +3,10 @@ Gestionnaire d'hébergement intégré pour les sites web
 Phase 1 MVP - Hébergement basique avec sous-domaines
 """
 import os
+import re
 import shutil
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -15,28 +16,43 @@ import json
 
 from website_exporter import WebsiteExporter
 
+# Sous-domaines acceptés : ceux produits par slugify (minuscules, chiffres, tirets)
+SUBDOMAIN_PATTERN = re.compile(r"^[a-z0-9](?:[a-z0-9-]*[a-z0-9])?$")
+
 class HostingManager:
     """Gestionnaire d'hébergement intégré basique"""
     
     def __init__(self):
         # Configuration des chemins d'hébergement
-        self.hosting_root = Path("/app/hosted_sites")
+        self.hosting_root = Path(os.getenv("HOSTING_ROOT", "/app/hosted_sites"))
         self.hosting_root.mkdir(exist_ok=True)
         
         # Configuration de base
         self.base_domain = os.getenv("HOSTING_BASE_DOMAIN", "localhost:3001")
         self.use_ssl = os.getenv("USE_SSL", "false").lower() == "true"
         
+    def site_path(self, subdomain: str) -> Optional[Path]:
+        """Dossier d'un site, ou None si le sous-domaine est invalide ou sort de hosting_root"""
+        if not subdomain or not SUBDOMAIN_PATTERN.match(subdomain):
+            return None
+        root = self.hosting_root.resolve()
+        site_path = (root / subdomain).resolve()
+        if site_path == root or not site_path.is_relative_to(root):
+            return None
+        return site_path
+
     def is_subdomain_available(self, subdomain: str) -> bool:
         """Vérifie si un sous-domaine est disponible"""
-        subdomain_path = self.hosting_root / subdomain
-        return not subdomain_path.exists()
+        subdomain_path = self.site_path(subdomain)
+        return subdomain_path is not None and not subdomain_path.exists()
         
     def generate_subdomain(self, website_name: str, user_id: str) -> str:
         """Génère un sous-domaine unique basé sur le nom du site"""
         from slugify import slugify
         
         base_subdomain = slugify(website_name.lower())
+        if not SUBDOMAIN_PATTERN.match(base_subdomain):
+            base_subdomain = "site"
         
         # Si le sous-domaine est disponible, l'utiliser
         if self.is_subdomain_available(base_subdomain):
@@ -91,7 +107,9 @@ class HostingManager:
                     )
                 
                 # Créer le dossier de déploiement
-                deploy_path = self.hosting_root / subdomain
+                deploy_path = self.site_path(subdomain)
+                if deploy_path is None:
+                    raise ValueError(f"Sous-domaine invalide : {subdomain!r}")
                 deploy_path.mkdir(exist_ok=True)
                 
                 # Copier les fichiers du site
@@ -140,9 +158,9 @@ class HostingManager:
     def undeploy_website(self, subdomain: str) -> Dict[str, Any]:
         """Supprime un site de l'hébergement"""
         try:
-            deploy_path = self.hosting_root / subdomain
+            deploy_path = self.site_path(subdomain)
             
-            if deploy_path.exists():
+            if deploy_path is not None and deploy_path.exists():
                 shutil.rmtree(deploy_path)
                 return {
                     "success": True,
@@ -175,10 +193,33 @@ class HostingManager:
                 "error": str(e)
             }
     
+    def get_site_file(self, subdomain: str, file_path: str = "") -> Optional[Path]:
+        """Résout le fichier statique demandé pour un site (None si absent ou hors du dossier du site)"""
+        site_path = self.site_path(subdomain)
+        if site_path is None:
+            return None
+
+        # Ni remontée (..), ni fichiers cachés (.site_metadata.json) à aucun niveau du chemin
+        parts = PurePosixPath(file_path.replace("\\", "/")).parts
+        if any(part.startswith(".") or part.startswith("/") for part in parts):
+            return None
+
+        target = (site_path / (file_path or "index.html")).resolve()
+
+        if target.is_dir():
+            target = target / "index.html"
+
+        if not target.is_relative_to(site_path) or target.name.startswith("."):
+            return None
+
+        return target if target.is_file() else None
+    
     def get_site_info(self, subdomain: str) -> Optional[Dict[str, Any]]:
         """Récupère les informations d'un site déployé"""
         try:
-            deploy_path = self.hosting_root / subdomain
+            deploy_path = self.site_path(subdomain)
+            if deploy_path is None:
+                return None
             metadata_path = deploy_path / ".site_metadata.json"
             
             if metadata_path.exists():
@@ -211,10 +252,10 @@ class HostingManager:
         # Pour le MVP, on simule l'activation SSL
         # Dans une version production, ceci utiliserait Let's Encrypt ou un autre CA
         try:
-            deploy_path = self.hosting_root / subdomain
-            metadata_path = deploy_path / ".site_metadata.json"
+            deploy_path = self.site_path(subdomain)
+            metadata_path = deploy_path / ".site_metadata.json" if deploy_path is not None else None
             
-            if metadata_path.exists():
+            if metadata_path is not None and metadata_path.exists():
                 with open(metadata_path, 'r') as f:
                     metadata = json.load(f)
                 
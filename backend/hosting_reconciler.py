@@ -0,0 +1,158 @@
+"""
+Hosting Reconciler Module
+Finds hosted_sites/ directories that no hosted website refers to any more and deletes them
+once they are older than a grace period. The hosting root is listed once per pass; each batch
+then checks the next `batch_size` subdomains of that listing against the database.
+"""
+import os
+import json
+import shutil
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy.orm import Session
+
+from models import Website
+from hosting_manager import HostingManager
+
+class HostingReconciler:
+    """Incremental garbage collector for orphaned hosted sites"""
+
+    def __init__(
+        self,
+        hosting_manager: Optional[HostingManager] = None,
+        batch_size: Optional[int] = None,
+        grace_period: Optional[timedelta] = None
+    ):
+        self.hosting_manager = hosting_manager or HostingManager()
+        self.hosting_root = self.hosting_manager.hosting_root
+        self.batch_size = batch_size or int(os.getenv("HOSTING_GC_BATCH_SIZE", "200"))
+        if grace_period is None:
+            grace_period = timedelta(seconds=int(os.getenv("HOSTING_GC_GRACE_SECONDS", "86400")))
+        self.grace_period = grace_period
+
+        # Listing of the current pass and position in it (last subdomain handed out)
+        self._listing: List[str] = []
+        self._position = 0
+        self.cursor: Optional[str] = None
+
+    def _scan(self) -> List[str]:
+        """Subdomain directories of the hosting root, sorted (one scandir per pass)"""
+        with os.scandir(self.hosting_root) as entries:
+            return sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+
+    def _next_batch(self) -> List[str]:
+        """The next `batch_size` subdomains of the pass, starting a new pass when the last one ended"""
+        if self._position == 0:
+            self._listing = self._scan()
+        batch = self._listing[self._position:self._position + self.batch_size]
+        self._position += len(batch)
+        return batch
+
+    def _last_activity(self, subdomain: str) -> datetime:
+        """Last known deployment (site metadata, or the directory's modification time)"""
+        deploy_path = self.hosting_root / subdomain
+        last_activity = datetime.utcfromtimestamp(deploy_path.stat().st_mtime)
+
+        metadata_path = deploy_path / ".site_metadata.json"
+        try:
+            with open(metadata_path, 'r') as f:
+                deployed_at = json.load(f).get("deployed_at")
+            if deployed_at:
+                last_activity = max(last_activity, datetime.fromisoformat(deployed_at))
+        except (OSError, ValueError):
+            pass
+
+        return last_activity
+
+    def reconcile_batch(self, db: Session, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Process the next batch of subdomains of the current pass.
+
+        Returns:
+            Batch report (live sites, orphans deleted or still within the grace period)
+        """
+        subdomains = self._next_batch()
+
+        hosted = set()
+        if subdomains:
+            rows = db.query(Website.hosting_subdomain).filter(
+                Website.hosting_subdomain.in_(subdomains),
+                Website.is_hosted == True
+            ).all()
+            hosted = {row.hosting_subdomain for row in rows}
+
+        now = datetime.utcnow()
+        reclaimed, pending = [], []
+
+        for subdomain in subdomains:
+            if subdomain in hosted:
+                continue
+
+            try:
+                if now - self._last_activity(subdomain) < self.grace_period:
+                    # Possibly a deployment in progress: files are written before the database commit
+                    pending.append(subdomain)
+                    continue
+
+                if not dry_run:
+                    shutil.rmtree(self.hosting_root / subdomain)
+                reclaimed.append(subdomain)
+            except FileNotFoundError:
+                # Deleted meanwhile (concurrent undeploy)
+                continue
+
+        done = self._position >= len(self._listing)
+        if done:
+            self._listing, self._position = [], 0
+        self.cursor = None if done else subdomains[-1]
+
+        return {
+            "scanned": len(subdomains),
+            "live": len(hosted),
+            "reclaimed": reclaimed,
+            "pending": pending,
+            "cursor": self.cursor,
+            "done": done,
+            "dry_run": dry_run
+        }
+
+    def reconcile_all(self, db: Session, dry_run: bool = False) -> Dict[str, Any]:
+        """Run one complete pass, batch by batch"""
+        self._listing, self._position, self.cursor = [], 0, None
+        summary = {"scanned": 0, "live": 0, "reclaimed": [], "pending": [], "dry_run": dry_run}
+
+        while True:
+            report = self.reconcile_batch(db, dry_run=dry_run)
+            summary["scanned"] += report["scanned"]
+            summary["live"] += report["live"]
+            summary["reclaimed"].extend(report["reclaimed"])
+            summary["pending"].extend(report["pending"])
+
+            # Release the identity map between batches
+            db.expunge_all()
+
+            if report["done"]:
+                return summary
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Delete orphaned hosted sites")
+    parser.add_argument("--dry-run", action="store_true", help="List orphans without deleting them")
+    parser.add_argument("--grace-seconds", type=int, default=None, help="Grace period before deletion")
+    args = parser.parse_args()
+
+    grace_period = timedelta(seconds=args.grace_seconds) if args.grace_seconds is not None else None
+
+    db = SessionLocal()
+    try:
+        reconciler = HostingReconciler(grace_period=grace_period)
+        summary = reconciler.reconcile_all(db, dry_run=args.dry_run)
+        action = "to delete" if args.dry_run else "deleted"
+        print(f"🔍 {summary['scanned']} directories scanned, {summary['live']} live sites")
+        print(f"🗑️  {len(summary['reclaimed'])} orphans {action}: {', '.join(summary['reclaimed']) or '-'}")
+        print(f"⏳ {len(summary['pending'])} orphans within the grace period")
+    finally:
+        db.close()
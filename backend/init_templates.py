@@ -2,196 +2,231 @@
 """
 Script pour initialiser la base de données avec des templates de base
 """
-import json
-from sqlalchemy.orm import Session
-from database import SessionLocal, init_db
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import select, bindparam
+from database import engine, init_db
 from models import Template
+from slug_allocator import dialect_insert
+from template_catalog import bump_catalog_version
+from search import index_template_ids
+from template_tags import sync_template_tags
 
-def create_sample_templates():
-    """Crée des templates d'exemple pour l'MVP"""
-    
-    templates_data = [
-        {
-            "name": "Portfolio Moderne",
-            "slug": "portfolio-moderne",
-            "description": "Template élégant pour présenter votre portfolio professionnel",
-            "category": "portfolio",
-            "structure": {
-                "sections": ["header", "hero", "about", "portfolio", "contact", "footer"],
-                "layout": "single-page",
-                "color_scheme": "modern"
+SAMPLE_TEMPLATES = [
+    {
+        "name": "Portfolio Moderne",
+        "slug": "portfolio-moderne",
+        "description": "Template élégant pour présenter votre portfolio professionnel",
+        "category": "portfolio",
+        "structure": {
+            "sections": ["header", "hero", "about", "portfolio", "contact", "footer"],
+            "layout": "single-page",
+            "color_scheme": "modern"
+        },
+        "default_content": {
+            "hero": {
+                "title": "Votre Nom",
+                "subtitle": "Développeur Full Stack",
+                "description": "Passionné par la création d'expériences numériques exceptionnelles"
             },
-            "default_content": {
-                "hero": {
-                    "title": "Votre Nom",
-                    "subtitle": "Développeur Full Stack",
-                    "description": "Passionné par la création d'expériences numériques exceptionnelles"
-                },
-                "about": {
-                    "title": "À propos",
-                    "content": "Développeur expérimenté avec une expertise en technologies modernes..."
-                },
-                "portfolio": {
-                    "title": "Mes Projets",
-                    "projects": []
-                }
+            "about": {
+                "title": "À propos",
+                "content": "Développeur expérimenté avec une expertise en technologies modernes..."
             },
-            "tags": ["moderne", "portfolio", "professionnel"],
-            "is_featured": True
+            "portfolio": {
+                "title": "Mes Projets",
+                "projects": []
+            }
         },
-        {
-            "name": "Site d'Entreprise",
-            "slug": "site-entreprise",
-            "description": "Template professionnel pour votre entreprise ou startup",
-            "category": "business",
-            "structure": {
-                "sections": ["header", "hero", "services", "about", "team", "contact", "footer"],
-                "layout": "multi-page",
-                "color_scheme": "corporate"
+        "tags": ["moderne", "portfolio", "professionnel"],
+        "is_featured": True
+    },
+    {
+        "name": "Site d'Entreprise",
+        "slug": "site-entreprise",
+        "description": "Template professionnel pour votre entreprise ou startup",
+        "category": "business",
+        "structure": {
+            "sections": ["header", "hero", "services", "about", "team", "contact", "footer"],
+            "layout": "multi-page",
+            "color_scheme": "corporate"
+        },
+        "default_content": {
+            "hero": {
+                "title": "Votre Entreprise",
+                "subtitle": "Solution innovante pour votre business",
+                "description": "Découvrez nos services professionnels"
             },
-            "default_content": {
-                "hero": {
-                    "title": "Votre Entreprise",
-                    "subtitle": "Solution innovante pour votre business",
-                    "description": "Découvrez nos services professionnels"
-                },
-                "services": {
-                    "title": "Nos Services",
-                    "services": []
-                },
-                "about": {
-                    "title": "Notre Histoire",
-                    "content": "Depuis notre création, nous nous engageons à..."
-                }
+            "services": {
+                "title": "Nos Services",
+                "services": []
             },
-            "tags": ["entreprise", "business", "corporate"],
-            "is_featured": True
+            "about": {
+                "title": "Notre Histoire",
+                "content": "Depuis notre création, nous nous engageons à..."
+            }
         },
-        {
-            "name": "Blog Personnel",
-            "slug": "blog-personnel",
-            "description": "Template clean et moderne pour votre blog",
-            "category": "blog",
-            "structure": {
-                "sections": ["header", "hero", "posts", "about", "sidebar", "footer"],
-                "layout": "blog",
-                "color_scheme": "minimal"
-            },
-            "default_content": {
-                "hero": {
-                    "title": "Mon Blog",
-                    "subtitle": "Partagez vos idées avec le monde",
-                    "description": "Découvrez mes derniers articles et réflexions"
-                },
-                "about": {
-                    "title": "À propos de l'auteur",
-                    "content": "Passionné par [votre domaine]..."
-                }
+        "tags": ["entreprise", "business", "corporate"],
+        "is_featured": True
+    },
+    {
+        "name": "Blog Personnel",
+        "slug": "blog-personnel",
+        "description": "Template clean et moderne pour votre blog",
+        "category": "blog",
+        "structure": {
+            "sections": ["header", "hero", "posts", "about", "sidebar", "footer"],
+            "layout": "blog",
+            "color_scheme": "minimal"
+        },
+        "default_content": {
+            "hero": {
+                "title": "Mon Blog",
+                "subtitle": "Partagez vos idées avec le monde",
+                "description": "Découvrez mes derniers articles et réflexions"
             },
-            "tags": ["blog", "personnel", "articles"],
-            "is_featured": False
+            "about": {
+                "title": "À propos de l'auteur",
+                "content": "Passionné par [votre domaine]..."
+            }
         },
-        {
-            "name": "Landing Page",
-            "slug": "landing-page",
-            "description": "Template optimisé pour la conversion",
-            "category": "landing",
-            "structure": {
-                "sections": ["header", "hero", "features", "pricing", "testimonials", "cta", "footer"],
-                "layout": "single-page",
-                "color_scheme": "conversion"
+        "tags": ["blog", "personnel", "articles"],
+        "is_featured": False
+    },
+    {
+        "name": "Landing Page",
+        "slug": "landing-page",
+        "description": "Template optimisé pour la conversion",
+        "category": "landing",
+        "structure": {
+            "sections": ["header", "hero", "features", "pricing", "testimonials", "cta", "footer"],
+            "layout": "single-page",
+            "color_scheme": "conversion"
+        },
+        "default_content": {
+            "hero": {
+                "title": "Votre Produit",
+                "subtitle": "La solution que vous attendiez",
+                "description": "Découvrez comment notre produit peut transformer votre activité"
             },
-            "default_content": {
-                "hero": {
-                    "title": "Votre Produit",
-                    "subtitle": "La solution que vous attendiez",
-                    "description": "Découvrez comment notre produit peut transformer votre activité"
-                },
-                "features": {
-                    "title": "Fonctionnalités",
-                    "features": []
-                },
-                "pricing": {
-                    "title": "Tarifs",
-                    "plans": []
-                }
+            "features": {
+                "title": "Fonctionnalités",
+                "features": []
             },
-            "tags": ["landing", "conversion", "marketing"],
-            "is_featured": True
+            "pricing": {
+                "title": "Tarifs",
+                "plans": []
+            }
         },
-        {
-            "name": "E-commerce Simple",
-            "slug": "ecommerce-simple",
-            "description": "Template pour boutique en ligne",
-            "category": "ecommerce",
-            "structure": {
-                "sections": ["header", "hero", "products", "categories", "about", "contact", "footer"],
-                "layout": "multi-page",
-                "color_scheme": "ecommerce"
+        "tags": ["landing", "conversion", "marketing"],
+        "is_featured": True
+    },
+    {
+        "name": "E-commerce Simple",
+        "slug": "ecommerce-simple",
+        "description": "Template pour boutique en ligne",
+        "category": "ecommerce",
+        "structure": {
+            "sections": ["header", "hero", "products", "categories", "about", "contact", "footer"],
+            "layout": "multi-page",
+            "color_scheme": "ecommerce"
+        },
+        "default_content": {
+            "hero": {
+                "title": "Votre Boutique",
+                "subtitle": "Découvrez nos produits",
+                "description": "Trouvez les meilleurs produits au meilleur prix"
             },
-            "default_content": {
-                "hero": {
-                    "title": "Votre Boutique",
-                    "subtitle": "Découvrez nos produits",
-                    "description": "Trouvez les meilleurs produits au meilleur prix"
-                },
-                "products": {
-                    "title": "Nos Produits",
-                    "products": []
-                },
-                "categories": {
-                    "title": "Catégories",
-                    "categories": []
-                }
+            "products": {
+                "title": "Nos Produits",
+                "products": []
             },
-            "tags": ["ecommerce", "boutique", "vente"],
-            "is_featured": False
+            "categories": {
+                "title": "Catégories",
+                "categories": []
+            }
+        },
+        "tags": ["ecommerce", "boutique", "vente"],
+        "is_featured": False
+    }
+]
+
+# Colonnes réécrites quand un template existe déjà (les statistiques d'usage sont conservées)
+UPSERT_COLUMNS = ("name", "description", "category", "structure", "default_content", "tags", "is_featured", "updated_at")
+
+def upsert_templates(connection, templates_data: List[Dict[str, Any]]) -> int:
+    """
+    Insère ou met à jour les templates par slug, en une seule requête executemany.
+    Idempotent : relancer le script ne crée pas de doublons.
+    """
+    table = Template.__table__
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "is_active": True,
+            "usage_count": 0,
+            "rating_avg": 5,
+            "rating_count": 1,
+            "created_at": now,
+            "updated_at": now,
+            **{column: data.get(column) for column in UPSERT_COLUMNS if column != "updated_at"},
+            "slug": data["slug"],
         }
+        for data in templates_data
     ]
-    
-    db = SessionLocal()
+    if not rows:
+        return 0
+
+    statement = dialect_insert(connection.dialect.name, table)
+    if hasattr(statement, "on_conflict_do_update"):
+        statement = statement.on_conflict_do_update(
+            index_elements=["slug"],
+            set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+        )
+        connection.execute(statement, rows)
+    else:
+        existing = set(connection.scalars(select(table.c.slug).where(table.c.slug.in_([row["slug"] for row in rows]))))
+        new_rows = [row for row in rows if row["slug"] not in existing]
+        if new_rows:
+            connection.execute(table.insert(), new_rows)
+        updates = [
+            {"b_slug": row["slug"], **{column: row[column] for column in UPSERT_COLUMNS}}
+            for row in rows if row["slug"] in existing
+        ]
+        if updates:
+            connection.execute(table.update().where(table.c.slug == bindparam("b_slug")), updates)
+
+    # Index de recherche et de tags, puis les workers en cours rechargent leur catalogue
+    ids = connection.scalars(select(table.c.id).where(table.c.slug.in_([row["slug"] for row in rows]))).all()
+    index_template_ids(connection, ids)
+    sync_template_tags(connection, ids)
+    bump_catalog_version(connection)
+    return len(rows)
+
+def create_sample_templates():
+    """Crée ou met à jour les templates d'exemple pour l'MVP"""
     try:
-        # Vérifier si des templates existent déjà
-        existing_count = db.query(Template).count()
-        if existing_count > 0:
-            print(f"⚠️  {existing_count} templates déjà présents dans la base")
-            return
-        
-        # Créer les templates
-        for template_data in templates_data:
-            template = Template(
-                name=template_data["name"],
-                slug=template_data["slug"],
-                description=template_data["description"],
-                category=template_data["category"],
-                structure=template_data["structure"],
-                default_content=template_data["default_content"],
-                tags=template_data["tags"],
-                is_featured=template_data["is_featured"],
-                is_active=True,
-                usage_count=0,
-                rating_avg=5,
-                rating_count=1
-            )
-            db.add(template)
-        
-        db.commit()
-        print(f"✅ {len(templates_data)} templates créés avec succès!")
-        
-        # Afficher les templates créés
-        templates = db.query(Template).all()
+        with engine.begin() as connection:
+            count = upsert_templates(connection, SAMPLE_TEMPLATES)
+        print(f"✅ {count} templates créés ou mis à jour avec succès!")
+
+        # Afficher les templates disponibles
+        with engine.connect() as connection:
+            templates = connection.execute(
+                select(Template.name, Template.category, Template.slug).order_by(Template.slug)
+            ).all()
         print("\n📋 Templates disponibles:")
         for template in templates:
             print(f"  - {template.name} ({template.category}) - {template.slug}")
-            
+
     except Exception as e:
         print(f"❌ Erreur lors de la création des templates: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     print("🚀 Initialisation des templates...")
     init_db()
     create_sample_templates()
-    print("✨ Initialisation terminée!")
\ No newline at end of file
+    print("✨ Initialisation terminée!")
@@ -0,0 +1,181 @@
+"""
+Partial JSON document updates
+RFC 7396 merge patches and RFC 6902 JSON Patch operations, applied to copies of the document.
+Both return the patched document and the JSON pointers of the subtrees that changed.
+make_json_patch computes the operations turning one document into another.
+"""
+import copy
+import json
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Tuple
+
+class JsonPatchError(ValueError):
+    """The patch cannot be applied to the document"""
+
+# === RFC 7396 MERGE PATCH ===
+
+def _merge(target: Any, patch: Any, pointer: str, changed: List[str]) -> Any:
+    if not isinstance(patch, dict):
+        if patch != target:
+            changed.append(pointer)
+        return copy.deepcopy(patch)
+
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        child = f"{pointer}/{_escape(key)}"
+        if value is None:
+            if key in result:
+                del result[key]
+                changed.append(child)
+        else:
+            result[key] = _merge(result.get(key), value, child, changed)
+    return result
+
+def apply_merge_patch(target: Any, patch: Any, pointer: str = "") -> Tuple[Any, List[str]]:
+    """Apply a merge patch: objects merge recursively, null deletes a key, anything else replaces"""
+    changed: List[str] = []
+    return _merge(target, patch, pointer, changed), changed
+
+# === RFC 6902 JSON PATCH ===
+
+def _escape(token: str) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    node = document
+    for token in tokens:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+    return node
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, last, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(map(_escape, tokens[:-1]))}")
+    return document
+
+def _remove(document: Any, tokens: List[str]) -> Tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _resolve(document, tokens[:-1])
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+        return document, parent.pop(last)
+    if isinstance(parent, list):
+        return document, parent.pop(_list_index(parent, last, allow_end=False))
+    raise JsonPatchError(f"Path not found: /{'/'.join(map(_escape, tokens))}")
+
+def apply_json_patch(document: Any, operations: List[Dict[str, Any]]) -> Tuple[Any, List[str]]:
+    """Apply JSON Patch operations atomically: any failing operation rejects the whole patch"""
+    result = copy.deepcopy(document)
+    changed: List[str] = []
+
+    for operation in operations:
+        op = operation.get("op")
+        path = operation.get("path")
+        if path is None:
+            raise JsonPatchError(f"Operation {op!r} is missing 'path'")
+        tokens = _parse_pointer(path)
+
+        if op == "add":
+            result = _add(result, tokens, copy.deepcopy(operation.get("value")))
+        elif op == "remove":
+            result, _ = _remove(result, tokens)
+        elif op == "replace":
+            _resolve(result, tokens)
+            result, _ = _remove(result, tokens) if tokens else (result, None)
+            result = _add(result, tokens, copy.deepcopy(operation.get("value")))
+        elif op in ("move", "copy"):
+            source = operation.get("from")
+            if source is None:
+                raise JsonPatchError(f"Operation {op!r} is missing 'from'")
+            source_tokens = _parse_pointer(source)
+            if op == "move":
+                if tokens[:len(source_tokens)] == source_tokens and tokens != source_tokens:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                result, value = _remove(result, source_tokens)
+                changed.append(source)
+            else:
+                value = copy.deepcopy(_resolve(result, source_tokens))
+            result = _add(result, tokens, value)
+        elif op == "test":
+            if _resolve(result, tokens) != operation.get("value"):
+                raise JsonPatchError(f"Test failed at {path}")
+            continue
+        else:
+            raise JsonPatchError(f"Unknown operation: {op!r}")
+
+        changed.append(path)
+
+    return result, changed
+
+# === DIFF ===
+
+def _fingerprint(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+def _diff(old: Any, new: Any, pointer: str, operations: List[Dict[str, Any]]):
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": f"{pointer}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{pointer}/{_escape(key)}"
+            if key not in old:
+                operations.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+            else:
+                _diff(old[key], value, child, operations)
+    elif isinstance(old, list) and isinstance(new, list):
+        matcher = SequenceMatcher(None, list(map(_fingerprint, old)), list(map(_fingerprint, new)), autojunk=False)
+        # Walk the edits from the end so the indexes of earlier ones stay valid
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag == "equal":
+                continue
+            if tag == "replace" and i2 - i1 == j2 - j1:
+                for offset in range(i2 - i1):
+                    _diff(old[i1 + offset], new[j1 + offset], f"{pointer}/{i1 + offset}", operations)
+                continue
+            for index in range(i2 - 1, i1 - 1, -1):
+                operations.append({"op": "remove", "path": f"{pointer}/{index}"})
+            for offset, value in enumerate(new[j1:j2]):
+                operations.append({"op": "add", "path": f"{pointer}/{i1 + offset}", "value": copy.deepcopy(value)})
+    elif type(old) is not type(new) or old != new:
+        operations.append({"op": "replace", "path": pointer, "value": copy.deepcopy(new)})
+
+def make_json_patch(old: Any, new: Any) -> List[Dict[str, Any]]:
+    """JSON Patch operations turning `old` into `new` (lists are diffed element-wise, not replaced)"""
+    operations: List[Dict[str, Any]] = []
+    _diff(old, new, "", operations)
+    return operations
@@ -0,0 +1,61 @@
+"""Alembic environment: migrates the database configured by DATABASE_URL"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import Base, engine
+import models  # noqa: F401 - registers the tables on Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def include_name(name, type_, parent_names) -> bool:
+    """Skip the dialect-specific full-text index (FTS5 virtual table and its shadow tables)"""
+    return not (type_ == "table" and name.startswith("search_index"))
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting to the database"""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations on a connection (init_db passes its own through config.attributes)"""
+    connection = config.attributes.get("connection")
+
+    if connection is None:
+        with engine.connect() as connection:
+            _run(connection)
+    else:
+        _run(connection)
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite cannot ALTER most constraints: batch mode copies the table instead
+        render_as_batch=connection.dialect.name == "sqlite",
+        # One transaction per revision, so a revision's autocommit_block only commits its own work
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
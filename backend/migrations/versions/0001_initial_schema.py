@@ -0,0 +1,150 @@
+"""Initial schema (tables previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_verified', sa.Boolean(), nullable=True),
+        sa.Column('google_id', sa.String(), nullable=True),
+        sa.Column('github_id', sa.String(), nullable=True),
+        sa.Column('avatar_url', sa.String(), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('subscription_plan', sa.String(), nullable=True),
+        sa.Column('subscription_status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('last_login', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('google_id'),
+        sa.UniqueConstraint('github_id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'templates',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('structure', sa.JSON(), nullable=False),
+        sa.Column('default_content', sa.JSON(), nullable=True),
+        sa.Column('preview_image', sa.String(), nullable=True),
+        sa.Column('is_premium', sa.Boolean(), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('usage_count', sa.Integer(), nullable=True),
+        sa.Column('rating_avg', sa.Integer(), nullable=True),
+        sa.Column('rating_count', sa.Integer(), nullable=True),
+        sa.Column('creator_id', sa.String(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_featured', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_templates_id', 'templates', ['id'])
+    op.create_index('ix_templates_slug', 'templates', ['slug'], unique=True)
+
+    op.create_table(
+        'api_keys',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('service', sa.String(), nullable=False),
+        sa.Column('key_name', sa.String(), nullable=False),
+        sa.Column('encrypted_key', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('usage_count', sa.Integer(), nullable=True),
+        sa.Column('last_used', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_api_keys_id', 'api_keys', ['id'])
+
+    op.create_table(
+        'websites',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('template_id', sa.String(), nullable=True),
+        sa.Column('content', sa.JSON(), nullable=True),
+        sa.Column('settings', sa.JSON(), nullable=True),
+        sa.Column('custom_css', sa.Text(), nullable=True),
+        sa.Column('custom_js', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('is_public', sa.Boolean(), nullable=True),
+        sa.Column('domain', sa.String(), nullable=True),
+        sa.Column('is_hosted', sa.Boolean(), nullable=True),
+        sa.Column('hosting_subdomain', sa.String(), nullable=True),
+        sa.Column('hosting_url', sa.String(), nullable=True),
+        sa.Column('ssl_enabled', sa.Boolean(), nullable=True),
+        sa.Column('deployed_at', sa.DateTime(), nullable=True),
+        sa.Column('meta_title', sa.String(), nullable=True),
+        sa.Column('meta_description', sa.Text(), nullable=True),
+        sa.Column('meta_keywords', sa.String(), nullable=True),
+        sa.Column('view_count', sa.Integer(), nullable=True),
+        sa.Column('last_published', sa.DateTime(), nullable=True),
+        sa.Column('owner_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_websites_id', 'websites', ['id'])
+    op.create_index('ix_websites_slug', 'websites', ['slug'], unique=True)
+
+    op.create_table(
+        'generation_history',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('website_id', sa.String(), nullable=True),
+        sa.Column('generation_type', sa.String(), nullable=False),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('ai_service', sa.String(), nullable=False),
+        sa.Column('model_used', sa.String(), nullable=True),
+        sa.Column('tokens_used', sa.Integer(), nullable=True),
+        sa.Column('cost', sa.Integer(), nullable=True),
+        sa.Column('user_rating', sa.Integer(), nullable=True),
+        sa.Column('was_used', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['website_id'], ['websites.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_generation_history_id', 'generation_history', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('generation_history')
+    op.drop_table('websites')
+    op.drop_table('api_keys')
+    op.drop_table('templates')
+    op.drop_table('users')
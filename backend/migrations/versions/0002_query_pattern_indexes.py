@@ -0,0 +1,43 @@
+"""Composite indexes matching the endpoint query patterns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:30:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Ownership checks: WHERE id = ? AND owner_id = ?
+    ('ix_websites_owner_id_id', 'websites', ['owner_id', 'id']),
+    # Dashboard listing: WHERE owner_id = ? ORDER BY updated_at DESC, id DESC
+    ('ix_websites_owner_id_updated_at_id', 'websites', ['owner_id', 'updated_at', 'id']),
+    ('ix_websites_template_id_is_hosted', 'websites', ['template_id', 'is_hosted']),
+    ('ix_websites_hosting_subdomain', 'websites', ['hosting_subdomain']),
+    ('ix_templates_is_active_category', 'templates', ['is_active', 'category']),
+    # Gallery listing: WHERE is_active ORDER BY usage_count DESC, id DESC
+    ('ix_templates_is_active_usage_count_id', 'templates', ['is_active', 'usage_count', 'id']),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Build without locking writes on a live database
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""Version counters for the in-process template catalog
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:00:00
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table(
+        'catalog_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(catalog_versions, [{'name': 'templates', 'version': 1, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_versions')
@@ -0,0 +1,24 @@
+"""Version column on websites for optimistic concurrency
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('websites', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('websites') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,35 @@
+"""Delta-compressed revision history of website content
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'website_revisions',
+        sa.Column('website_id', sa.String(), nullable=False),
+        sa.Column('number', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('compacted', sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['website_id'], ['websites.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('website_id', 'number'),
+    )
+    op.create_index('ix_website_revisions_compacted_website_id_created_at', 'website_revisions', ['compacted', 'website_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_website_revisions_compacted_website_id_created_at', table_name='website_revisions')
+    op.drop_table('website_revisions')
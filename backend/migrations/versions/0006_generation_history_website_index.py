@@ -0,0 +1,28 @@
+"""Index generation_history.website_id for bulk website deletes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 13:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_generation_history_website_id', 'generation_history', ['website_id'],
+                            postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index('ix_generation_history_website_id', 'generation_history', ['website_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generation_history_website_id', table_name='generation_history')
@@ -0,0 +1,137 @@
+"""Full-text search index over websites and templates
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 14:00:00
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of the indexing in search.py as of this revision: later model or module changes
+# must not alter what this migration does
+BATCH_SIZE = 1000
+MAX_BODY_CHARS = 20_000
+
+websites = sa.table(
+    'websites',
+    sa.column('id', sa.String), sa.column('name', sa.String), sa.column('description', sa.Text),
+    sa.column('meta_keywords', sa.String), sa.column('content', sa.JSON), sa.column('owner_id', sa.String),
+)
+templates = sa.table(
+    'templates',
+    sa.column('id', sa.String), sa.column('name', sa.String), sa.column('description', sa.Text),
+    sa.column('category', sa.String), sa.column('tags', sa.JSON), sa.column('default_content', sa.JSON),
+)
+search_entries = sa.table(
+    'search_entries',
+    sa.column('id', sa.Integer), sa.column('kind', sa.String), sa.column('doc_id', sa.String),
+)
+
+
+def _collect_text(value, parts, budget):
+    if budget[0] <= 0:
+        return
+    if isinstance(value, str):
+        parts.append(value[:budget[0]])
+        budget[0] -= len(value) + 1
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_text(item, parts, budget)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_text(item, parts, budget)
+
+
+def _body(*values):
+    parts = []
+    budget = [MAX_BODY_CHARS]
+    for value in values:
+        _collect_text(value, parts, budget)
+    return " ".join(parts)
+
+
+def _website_document(row):
+    scope = "o" + re.sub(r"\W", "", row.owner_id)
+    return row.id, scope, row.name or "", _body(row.description, row.meta_keywords, row.content)
+
+
+def _template_document(row):
+    return row.id, "gallery", row.name or "", _body(row.description, row.category, row.tags, row.default_content)
+
+
+def _index_existing_rows(connection):
+    if connection.dialect.name == 'postgresql':
+        insert_document = sa.text(
+            "INSERT INTO search_index (entry_id, document) VALUES (:entry_id, "
+            "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B') "
+            "|| setweight(to_tsvector('simple', :scope), 'D'))"
+        )
+    else:
+        insert_document = sa.text(
+            "INSERT INTO search_index (rowid, scope, title, body) VALUES (:entry_id, :scope, :title, :body)"
+        )
+
+    for kind, table, to_document in (('website', websites, _website_document), ('template', templates, _template_document)):
+        last_id = ""
+        while True:
+            rows = connection.execute(
+                sa.select(table).where(table.c.id > last_id).order_by(table.c.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            documents = [to_document(row) for row in rows]
+            connection.execute(sa.insert(search_entries), [{'kind': kind, 'doc_id': doc_id} for doc_id, *_ in documents])
+            entry_ids = dict(connection.execute(
+                sa.select(search_entries.c.doc_id, search_entries.c.id)
+                .where(search_entries.c.kind == kind, search_entries.c.doc_id.in_([row.id for row in rows]))
+            ).all())
+            connection.execute(insert_document, [
+                {'entry_id': entry_ids[doc_id], 'scope': scope, 'title': title, 'body': body}
+                for doc_id, scope, title, body in documents
+            ])
+            last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.create_table(
+        'search_entries',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('doc_id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_search_entries_kind_doc_id', 'search_entries', ['kind', 'doc_id'], unique=True)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE search_index ("
+            "entry_id INTEGER PRIMARY KEY REFERENCES search_entries (id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX ix_search_index_document ON search_index USING GIN (document)")
+    else:
+        # rowid = search_entries.id; prefix indexes make short "term*" queries cheap
+        op.execute(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "scope, title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        # ORDER BY rank: bm25 with title matches worth ten body matches, scope ignored
+        op.execute("INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')")
+
+    # Index the existing rows
+    _index_existing_rows(op.get_bind())
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE search_index")
+    op.drop_index('ix_search_entries_kind_doc_id', table_name='search_entries')
+    op.drop_table('search_entries')
@@ -0,0 +1,53 @@
+"""Inverted index of template tags
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of template_tags.reindex as of this revision
+templates = sa.table('templates', sa.column('id', sa.String), sa.column('tags', sa.JSON))
+template_tags = sa.table('template_tags', sa.column('tag', sa.String), sa.column('template_id', sa.String))
+
+
+def _normalize_tags(tags):
+    seen = {}
+    for tag in tags or []:
+        if isinstance(tag, str) and tag.strip():
+            seen.setdefault(tag.strip().lower(), None)
+    return list(seen)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'template_tags',
+        sa.Column('tag', sa.String(), nullable=False),
+        sa.Column('template_id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['template_id'], ['templates.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('tag', 'template_id'),
+    )
+    op.create_index('ix_template_tags_template_id_tag', 'template_tags', ['template_id', 'tag'])
+
+    # Index the existing templates
+    connection = op.get_bind()
+    rows = [
+        {'tag': tag, 'template_id': row.id}
+        for row in connection.execute(sa.select(templates.c.id, templates.c.tags))
+        for tag in _normalize_tags(row.tags)
+    ]
+    if rows:
+        connection.execute(sa.insert(template_tags), rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_template_tags_template_id_tag', table_name='template_tags')
+    op.drop_table('template_tags')
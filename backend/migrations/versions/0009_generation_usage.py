@@ -0,0 +1,67 @@
+"""Daily rollups of generation usage per user, service and model
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 16:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Tables as of this revision, so the backfill below does not follow later model changes
+generation_history = sa.table(
+    'generation_history',
+    sa.column('user_id', sa.String), sa.column('created_at', sa.DateTime), sa.column('ai_service', sa.String),
+    sa.column('model_used', sa.String), sa.column('tokens_used', sa.Integer), sa.column('cost', sa.Integer),
+)
+generation_usage = sa.table(
+    'generation_usage',
+    sa.column('user_id', sa.String), sa.column('day', sa.Date), sa.column('ai_service', sa.String),
+    sa.column('model_used', sa.String), sa.column('generations', sa.Integer), sa.column('tokens_used', sa.Integer),
+    sa.column('cost', sa.Integer),
+)
+
+
+def _roll_up_history(connection):
+    history = generation_history.c
+    if connection.dialect.name == 'sqlite':
+        day = sa.func.coalesce(sa.func.date(history.created_at), sa.func.date('now'))
+    else:
+        day = sa.func.coalesce(sa.cast(history.created_at, sa.Date), sa.func.current_date())
+    model_used = sa.func.coalesce(history.model_used, '')
+
+    buckets = sa.select(
+        history.user_id, day, history.ai_service, model_used, sa.func.count(),
+        sa.func.coalesce(sa.func.sum(history.tokens_used), 0), sa.func.coalesce(sa.func.sum(history.cost), 0),
+    ).group_by(history.user_id, day, history.ai_service, model_used)
+    connection.execute(sa.insert(generation_usage).from_select(
+        ['user_id', 'day', 'ai_service', 'model_used', 'generations', 'tokens_used', 'cost'], buckets
+    ))
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_usage',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('ai_service', sa.String(), nullable=False),
+        sa.Column('model_used', sa.String(), nullable=False),
+        sa.Column('generations', sa.Integer(), nullable=False),
+        sa.Column('tokens_used', sa.Integer(), nullable=False),
+        sa.Column('cost', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'ai_service', 'model_used'),
+    )
+
+    # Roll up the existing history
+    _roll_up_history(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table('generation_usage')
@@ -0,0 +1,28 @@
+"""Index generation_history by user for account exports
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 17:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_generation_history_user_id_id', 'generation_history', ['user_id', 'id'],
+                            postgresql_concurrently=True, if_not_exists=True)
+    else:
+        op.create_index('ix_generation_history_user_id_id', 'generation_history', ['user_id', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generation_history_user_id_id', table_name='generation_history')
@@ -0,0 +1,42 @@
+"""Refresh token sessions
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 18:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'auth_sessions',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('token_hash', sa.String(), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('rotated_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(), nullable=True),
+        sa.Column('revoked_reason', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_auth_sessions_user_id', 'auth_sessions', ['user_id'])
+    op.create_index('ix_auth_sessions_revoked_at', 'auth_sessions', ['revoked_at'])
+    op.create_index('ix_auth_sessions_expires_at', 'auth_sessions', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_auth_sessions_expires_at', table_name='auth_sessions')
+    op.drop_index('ix_auth_sessions_revoked_at', table_name='auth_sessions')
+    op.drop_index('ix_auth_sessions_user_id', table_name='auth_sessions')
+    op.drop_table('auth_sessions')
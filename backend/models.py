@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, ForeignKey, JSON, Index, false as sa_false
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -39,6 +39,27 @@ class User(Base):
     websites = relationship("Website", back_populates="owner", cascade="all, delete-orphan")
     templates = relationship("Template", back_populates="creator")
 
+class AuthSession(Base):
+    """Refresh token session: only the hash of the current token secret is stored (see auth_sessions.py)"""
+    __tablename__ = "auth_sessions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash = Column(String, nullable=False)
+    generation = Column(Integer, nullable=False, default=1)  # Rotations so far + 1
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    rotated_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    revoked_reason = Column(String, nullable=True)  # logout, reuse
+
+    __table_args__ = (
+        Index("ix_auth_sessions_user_id", "user_id"),
+        Index("ix_auth_sessions_revoked_at", "revoked_at"),
+        Index("ix_auth_sessions_expires_at", "expires_at"),
+    )
+
 class Website(Base):
     """Website model for generated sites"""
     __tablename__ = "websites"
@@ -75,6 +96,9 @@ class Website(Base):
     # Analytics (basic counters for MVP)
     view_count = Column(Integer, default=0)
     last_published = Column(DateTime, nullable=True)
+
+    # Optimistic concurrency: bumped by every ORM update, checked in the UPDATE's WHERE clause
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Ownership
     owner_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -87,6 +111,32 @@ class Website(Base):
     owner = relationship("User", back_populates="websites")
     template = relationship("Template", back_populates="websites")
 
+    __table_args__ = (
+        Index("ix_websites_owner_id_id", "owner_id", "id"),
+        Index("ix_websites_owner_id_updated_at_id", "owner_id", "updated_at", "id"),
+        Index("ix_websites_template_id_is_hosted", "template_id", "is_hosted"),
+        Index("ix_websites_hosting_subdomain", "hosting_subdomain"),
+    )
+    __mapper_args__ = {"version_id_col": version}
+
+class WebsiteRevision(Base):
+    """
+    Edit history of a website's content, custom_css and custom_js.
+    Full snapshots every few revisions, JSON Patch deltas from the previous revision in between.
+    """
+    __tablename__ = "website_revisions"
+
+    website_id = Column(String, ForeignKey("websites.id", ondelete="CASCADE"), primary_key=True)
+    number = Column(Integer, primary_key=True)  # 1, 2, ... per website (gaps after compaction)
+    kind = Column(String, nullable=False)  # snapshot, delta
+    data = Column(JSON, nullable=False)  # Full document (snapshot) or list of operations (delta)
+    compacted = Column(Boolean, nullable=False, default=False, server_default=sa_false())
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_website_revisions_compacted_website_id_created_at", "compacted", "website_id", "created_at"),
+    )
+
 class Template(Base):
     """Template model for website templates"""
     __tablename__ = "templates"
@@ -125,6 +175,45 @@ class Template(Base):
     creator = relationship("User", back_populates="templates")
     websites = relationship("Website", back_populates="template")
 
+    __table_args__ = (
+        Index("ix_templates_is_active_category", "is_active", "category"),
+        Index("ix_templates_is_active_usage_count_id", "is_active", "usage_count", "id"),
+    )
+
+class TemplateTag(Base):
+    """Inverted index of Template.tags (normalized), kept in sync by template_tags.py"""
+    __tablename__ = "template_tags"
+
+    tag = Column(String, primary_key=True)
+    template_id = Column(String, ForeignKey("templates.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_template_tags_template_id_tag", "template_id", "tag"),
+    )
+
+class CatalogVersion(Base):
+    """Version counters for in-process caches (bumped on every change, polled by each worker)"""
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)  # e.g. "templates"
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SearchEntry(Base):
+    """
+    Key of a document in the full-text index (search_index: FTS5 on SQLite, tsvector on PostgreSQL).
+    The index table itself is dialect-specific and created by migration 0007 only.
+    """
+    __tablename__ = "search_entries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)  # website, template
+    doc_id = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_search_entries_kind_doc_id", "kind", "doc_id", unique=True),
+    )
+
 class APIKey(Base):
     """API Keys for external integrations (Phase 2+)"""
     __tablename__ = "api_keys"
@@ -152,7 +241,7 @@ class GenerationHistory(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     website_id = Column(String, ForeignKey("websites.id"), nullable=True)
     
-    generation_type = Column(String, nullable=False)  # text, image, design, seo
+    generation_type = Column(String, nullable=False)  # text, image, design, seo, website
     prompt = Column(Text, nullable=False)
     result = Column(JSON, nullable=True)  # Generated content
     
@@ -167,4 +256,22 @@ class GenerationHistory(Base):
     was_used = Column(Boolean, default=False)  # Whether the generation was actually used
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_generation_history_website_id", "website_id"),
+        Index("ix_generation_history_user_id_id", "user_id", "id"),
+    )
+
+class GenerationUsage(Base):
+    """Daily rollup of generation_history per user, AI service and model (maintained by generation_usage.py)"""
+    __tablename__ = "generation_usage"
+
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    ai_service = Column(String, primary_key=True)
+    model_used = Column(String, primary_key=True)  # "" when the generation did not record a model
+
+    generations = Column(Integer, nullable=False, default=0)
+    tokens_used = Column(Integer, nullable=False, default=0)
+    cost = Column(Integer, nullable=False, default=0)  # Cost in cents
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Keyset (cursor) pagination helpers
+A cursor is the opaque, URL-safe encoding of the sort key of the last item of a page.
+"""
+import json
+import base64
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key (e.g. updated_at, id) of the last returned row"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def _parse(value: Any, kind: type) -> Any:
+    if kind is datetime:
+        return datetime.fromisoformat(value) if isinstance(value, str) else None
+    if kind is int:
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    return value if isinstance(value, kind) else None
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Decode a cursor produced by encode_cursor whose values have the given types (datetime, int, str)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(values, list) and len(values) == len(types):
+            values = [_parse(value, kind) for value, kind in zip(values, types)]
+    except ValueError:
+        values = None
+
+    if not isinstance(values, list) or len(values) != len(types) or any(value is None for value in values):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return values
+
+def after_cursor(sort_column, id_column, sort_value: Any, id_value: Any):
+    """
+    WHERE clause selecting rows after (sort_value, id_value) in (sort DESC, id DESC) order.
+    Written as OR/AND rather than a row-value comparison so it can use the composite index everywhere.
+    """
+    return or_(
+        sort_column < sort_value,
+        and_(sort_column == sort_value, id_column < id_value)
+    )
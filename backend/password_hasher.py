@@ -0,0 +1,87 @@
+"""
+Password Hasher Module
+bcrypt hashing and verification run in a dedicated thread pool (bcrypt releases the GIL), never on the
+event loop. Admission control: at most PASSWORD_HASH_WORKERS jobs run and PASSWORD_HASH_MAX_QUEUE wait;
+beyond that callers are rejected immediately so a login burst sheds load instead of piling up latency.
+Queue wait and run times are recorded for /api/health/auth.
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class PasswordHasherBusy(RuntimeError):
+    """Every worker is busy and the queue is full"""
+
+class PasswordHasher:
+    """Bounded worker pool for CPU-bound password hashing"""
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.workers = workers or int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else int(
+            os.getenv("PASSWORD_HASH_MAX_QUEUE", str(self.workers * 8))
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0  # Queued and running jobs
+
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) on the pool; raises PasswordHasherBusy when it is saturated"""
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        # Released when the job ends, even if the awaiting request was cancelled meanwhile
+        future = self._executor.submit(job)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _record(self, waited: float, ran: float):
+        with self._lock:
+            self.completed += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._run_total += ran
+            self._run_max = max(self._run_max, ran)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(self._in_flight - self.workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_ms_avg": round(self._wait_total / completed * 1000, 2),
+                "queue_wait_ms_max": round(self._wait_max * 1000, 2),
+                "run_ms_avg": round(self._run_total / completed * 1000, 2),
+                "run_ms_max": round(self._run_max * 1000, 2),
+            }
+
+password_hasher = PasswordHasher()
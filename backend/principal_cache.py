@@ -0,0 +1,127 @@
+"""
+Principal Cache
+Authenticated principals keyed by the SHA-256 of the bearer token: the decoded claims, the user's
+is_active flag and a detached snapshot of the user row. A warm request skips both jwt.decode and the
+users query; entries expire after PRINCIPAL_CACHE_TTL_SECONDS (or with the token), the least recently
+used ones are evicted beyond PRINCIPAL_CACHE_SIZE, and any ORM change to a user (deactivation,
+password, profile) drops that user's entries when its transaction commits.
+Invalidation is per process: other workers converge within the TTL.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from models import User
+
+class Principal:
+    """Cached authentication result for one token"""
+
+    def __init__(self, claims: Dict[str, Any], user: User, expires_at: float):
+        self.user_id = user.id
+        self.claims = claims
+        self.is_active = user.is_active
+        self.last_login: Optional[datetime] = user.last_login
+        self.expires_at = expires_at
+        self.user = _detached_copy(user)
+
+def _detached_copy(user: User) -> User:
+    """Copy of the loaded columns that any session can merge(load=False) without a query"""
+    snapshot = User(**{attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs})
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+class PrincipalCache:
+    """Bounded TTL cache of principals, indexed by user for invalidation"""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+        self.max_size = max_size if max_size is not None else int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Principal]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+
+        key = self.key(token)
+        with self._lock:
+            principal = self._entries.get(key)
+            if principal is None:
+                return None
+            if principal.expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, token: str, claims: Dict[str, Any], user: User) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+
+        # Never outlive the token itself
+        expires_at = min(time.time() + self.ttl, float(claims.get("exp", float("inf"))))
+        principal = Principal(claims, user, expires_at)
+        key = self.key(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = principal
+            self._by_user.setdefault(principal.user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+        return principal
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached token of a user (call after Core writes to users)"""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        principal = self._entries.pop(key, None)
+        if principal is None:
+            return
+        keys = self._by_user.get(principal.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[principal.user_id]
+
+principal_cache = PrincipalCache()
+
+# === INVALIDATION ===
+
+@event.listens_for(Session, "after_flush")
+def _track_user_changes(session, flush_context):
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("changed_users", set()).update(changed)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    """After the commit, so a concurrent request cannot cache the old row again"""
+    for user_id in session.info.pop("changed_users", ()):
+        principal_cache.invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_changes(session):
+    session.info.pop("changed_users", None)
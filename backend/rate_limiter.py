@@ -0,0 +1,381 @@
+"""
+Rate Limiter Module
+Token buckets per client and per route group, checked by an ASGI middleware before the request
+reaches routing, authentication or the database. Each rule allows `capacity` requests per `period`
+(bursts up to capacity, refilled continuously) for one IP address or one authenticated user, so a
+single client draining the bcrypt pool, the exporter or the deploy path is answered with a cheap 429
+while everyone else keeps their own budget. Responses carry RateLimit-Limit / -Remaining / -Reset
+headers, and Retry-After when rejected.
+
+Buckets live in memory per worker (one LRU per rule, idle buckets expire once refilled). With
+RATE_LIMIT_SHARED_FILE set, the workers of a host share a memory-mapped bucket table instead.
+
+Clients are identified by the socket peer address. Behind reverse proxies listed in
+RATE_LIMIT_TRUSTED_PROXIES, the client is the rightmost X-Forwarded-For hop that is not one of them
+(hops added by the client itself are never trusted).
+"""
+import os
+import re
+import math
+import mmap
+import time
+import fcntl
+import struct
+import hashlib
+import ipaddress
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+
+from schemas import ErrorResponse
+from auth import decode_token
+from principal_cache import principal_cache
+
+# name: (key, routes, default limit). key "ip" counts per client address, "user" per authenticated
+# user (per address for anonymous requests). Limits are "<requests>/<second|minute|hour|seconds>".
+RATE_LIMIT_RULES = {
+    "login": ("ip", ("POST /api/auth/login",), "10/minute"),
+    "register": ("ip", ("POST /api/auth/register",), "5/minute"),
+    "refresh": ("ip", ("POST /api/auth/refresh",), "30/minute"),
+    "generate": ("user", ("POST /api/generate/website",), "10/minute"),
+    "export": ("user", ("GET /api/websites/{website_id}/export", "GET /api/account/export"), "10/minute"),
+    "import": ("user", ("POST /api/account/import",), "10/hour"),
+    "deploy": ("user", ("POST /api/websites/{website_id}/deploy", "PUT /api/websites/{website_id}/redeploy"), "10/minute"),
+    # Overall budget of one client across the API
+    "api": ("user", ("* /api/*",), "600/minute"),
+}
+RATE_LIMIT_HEADERS = ("RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "Retry-After")
+# Load balancer probes are never limited
+EXEMPT_PREFIXES = ("/api/health",)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """(capacity, period in seconds) of "10/minute" or "10/30"; capacity 0 disables the rule"""
+    count, _, period = value.strip().partition("/")
+    if not count.strip().isdigit():
+        raise ValueError(f"Invalid rate limit {value!r}")
+    period = period.strip() or "second"
+    try:
+        seconds = float(period)
+    except ValueError:
+        seconds = PERIODS.get(period.rstrip("s"))
+    if not seconds or seconds <= 0:
+        raise ValueError(f"Invalid rate limit period {value!r}")
+    return int(count), float(seconds)
+
+def parse_overrides(value: str) -> Dict[str, str]:
+    """RATE_LIMITS="login=5/minute,api=0" """
+    overrides = {}
+    for part in value.split(","):
+        name, _, limit = part.strip().partition("=")
+        if name and limit:
+            overrides[name.strip()] = limit.strip()
+    return overrides
+
+class RateLimitRule:
+    """One token bucket definition and the routes it applies to"""
+
+    def __init__(self, name: str, key: str, routes: Tuple[str, ...], limit: str):
+        self.name = name
+        self.key = key
+        self.limit = limit
+        self.capacity, self.period = parse_rate(limit)
+        self.rate = self.capacity / self.period  # Tokens refilled per second
+        self.patterns = [self._compile(route) for route in routes]
+
+    @staticmethod
+    def _compile(route: str) -> Tuple[str, "re.Pattern"]:
+        method, _, path = route.partition(" ")
+        prefix = path.endswith("*")
+        segments = path.rstrip("*").split("/")
+        regex = "/".join("[^/]+" if segment.startswith("{") else re.escape(segment) for segment in segments)
+        return method, re.compile(regex + (".*" if prefix else "") + "$")
+
+    def matches(self, method: str, path: str) -> bool:
+        return any((m == "*" or m == method) and pattern.match(path) for m, pattern in self.patterns)
+
+def _refill(tokens: float, stamp: float, now: float, rule: RateLimitRule) -> float:
+    """Tokens of a bucket refilled up to now"""
+    return min(rule.capacity, tokens + max(now - stamp, 0.0) * rule.rate)
+
+def _take_all(levels: List[float]) -> Tuple[bool, List[float]]:
+    """One token from every bucket if each has one, none otherwise: (allowed, tokens left)"""
+    if all(level >= 1 for level in levels):
+        return True, [level - 1 for level in levels]
+    return False, levels
+
+def parse_networks(value: str) -> List[Any]:
+    """RATE_LIMIT_TRUSTED_PROXIES="10.0.0.0/8,127.0.0.1" """
+    networks = []
+    for part in value.split(","):
+        if part.strip():
+            try:
+                networks.append(ipaddress.ip_network(part.strip(), strict=False))
+            except ValueError:
+                raise ValueError(f"Invalid trusted proxy {part.strip()!r}") from None
+    return networks
+
+# === BUCKET STORES ===
+
+class MemoryBuckets:
+    """Buckets of this worker: one LRU per rule, so expired (refilled) buckets are always at the front"""
+
+    name = "memory"
+
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys or int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, "OrderedDict[str, List[float]]"] = {}
+
+    def _bucket(self, rule: RateLimitRule, key: str, now: float) -> List[float]:
+        buckets = self._buckets.setdefault(rule.name, OrderedDict())
+        # A bucket idle for a full period is full again: same as no bucket at all
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if now - oldest[1] < rule.period and len(buckets) < self.max_keys:
+                break
+            buckets.popitem(last=False)
+
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [float(rule.capacity), now]
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def take_all(self, requests: List[Tuple[RateLimitRule, str]], now: float) -> Tuple[bool, List[float]]:
+        """Take one token from each (rule, key) bucket, or from none if one of them is empty"""
+        with self._lock:
+            buckets = [self._bucket(rule, key, now) for rule, key in requests]
+            allowed, levels = _take_all([
+                _refill(bucket[0], bucket[1], now, rule) for (rule, _), bucket in zip(requests, buckets)
+            ])
+            for bucket, level in zip(buckets, levels):
+                bucket[0], bucket[1] = level, now
+            return allowed, levels
+
+    def size(self, rule: RateLimitRule) -> int:
+        return len(self._buckets.get(rule.name, ()))
+
+class SharedBuckets:
+    """
+    Buckets shared by the workers of a host: a fixed table of (fingerprint, tokens, stamp) slots in a
+    memory-mapped file, updated under an exclusive file lock. A key can use one of two slots; when
+    both belong to other keys the least recently used one is taken over, which only ever resets a
+    bucket to full (table size RATE_LIMIT_SHARED_SLOTS keeps that rare).
+    """
+
+    name = "shared"
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(self, path: str, slots: Optional[int] = None):
+        self.slots = slots or int(os.getenv("RATE_LIMIT_SHARED_SLOTS", "65536"))
+        self.path = Path(path)
+        size = self.slots * self.SLOT.size
+        self._file = open(self.path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        # flock excludes other processes; threads of this one share the descriptor
+        self._lock = threading.Lock()
+
+    def _slots(self, rule: RateLimitRule, key: str) -> Tuple[int, int, int]:
+        digest = hashlib.blake2b(f"{rule.name}:{key}".encode(), digest_size=16).digest()
+        fingerprint = int.from_bytes(digest[:8], "little") | 1  # 0 marks an empty slot
+        first = int.from_bytes(digest[8:12], "little") % self.slots
+        second = int.from_bytes(digest[12:16], "little") % self.slots
+        return fingerprint, first, second
+
+    def take_all(self, requests: List[Tuple[RateLimitRule, str]], now: float) -> Tuple[bool, List[float]]:
+        """Take one token from each (rule, key) bucket, or from none if one of them is empty, under one lock"""
+        with self._lock:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                slots = []
+                for rule, key in requests:
+                    fingerprint, first, second = self._slots(rule, key)
+                    candidates = [(index, *self.SLOT.unpack_from(self._mm, index * self.SLOT.size)) for index in (first, second)]
+                    owned = [c for c in candidates if c[1] == fingerprint]
+                    if owned:
+                        index, _, tokens, stamp = owned[0]
+                    else:
+                        index = min(candidates, key=lambda c: c[3])[0]
+                        tokens, stamp = float(rule.capacity), now
+                    slots.append((index, fingerprint, _refill(tokens, stamp, now, rule)))
+
+                allowed, levels = _take_all([level for _, _, level in slots])
+                for (index, fingerprint, _), level in zip(slots, levels):
+                    self.SLOT.pack_into(self._mm, index * self.SLOT.size, fingerprint, level, now)
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        return allowed, levels
+
+    def size(self, rule: RateLimitRule) -> Optional[int]:
+        return None
+
+# === LIMITER ===
+
+class RateLimitDecision:
+    """Outcome of the rules matching one request; headers describe the tightest bucket"""
+
+    def __init__(self, allowed: bool, rule: RateLimitRule, tokens: float):
+        self.allowed = allowed
+        self.rule = rule
+        self.tokens = tokens
+
+    def headers(self) -> Dict[str, str]:
+        rule = self.rule
+        headers = {
+            "RateLimit-Limit": str(rule.capacity),
+            "RateLimit-Remaining": str(int(self.tokens)),
+            "RateLimit-Reset": str(math.ceil((rule.capacity - self.tokens) / rule.rate)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(math.ceil((1 - self.tokens) / rule.rate), 1))
+        return headers
+
+class RateLimiter:
+    """Rule matching and bucket accounting"""
+
+    def __init__(self, rules: Optional[Dict[str, Tuple]] = None, store=None, enabled: Optional[bool] = None,
+                 trusted_proxies: Optional[str] = None):
+        self.enabled = enabled if enabled is not None else os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.trusted_proxies = parse_networks(
+            trusted_proxies if trusted_proxies is not None else os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+        )
+        overrides = parse_overrides(os.getenv("RATE_LIMITS", ""))
+        self.rules = [
+            RateLimitRule(name, key, routes, overrides.get(name, limit))
+            for name, (key, routes, limit) in (rules or RATE_LIMIT_RULES).items()
+        ]
+        self.rules = [rule for rule in self.rules if rule.capacity > 0]
+        if store is None:
+            shared_file = os.getenv("RATE_LIMIT_SHARED_FILE")
+            store = SharedBuckets(shared_file) if shared_file else MemoryBuckets()
+        self.store = store
+        self.allowed: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+        self.rejected: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def client_ip(self, peer: str, forwarded_for: str) -> str:
+        """
+        Address to count a request against: the peer, or behind trusted proxies the last
+        X-Forwarded-For hop before them (the leftmost one if every hop is a trusted proxy)
+        """
+        if not self._trusted(peer):
+            return peer
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    def match(self, method: str, path: str) -> List[RateLimitRule]:
+        if path.startswith(EXEMPT_PREFIXES):
+            return []
+        return [rule for rule in self.rules if rule.matches(method, path)]
+
+    def check(self, rules: List[RateLimitRule], ip: str, user_id: Optional[str]) -> RateLimitDecision:
+        """
+        Take a token from every matching bucket, or from none of them when one is empty (a rejected
+        request does not spend the budget of the other rules)
+        """
+        requests = [(rule, f"user:{user_id}" if rule.key == "user" and user_id else f"ip:{ip}") for rule in rules]
+        allowed, levels = self.store.take_all(requests, time.time())
+        if not allowed:
+            rejected = [(rule, level) for rule, level in zip(rules, levels) if level < 1]
+            for rule, _ in rejected:
+                self.rejected[rule.name] += 1
+            # Retry-After of the bucket that refills last
+            return RateLimitDecision(False, *max(rejected, key=lambda item: (1 - item[1]) / item[0].rate))
+
+        for rule in rules:
+            self.allowed[rule.name] += 1
+        return RateLimitDecision(True, *min(zip(rules, levels), key=lambda item: item[1] / item[0].capacity))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": self.store.name,
+            "rules": {
+                rule.name: {
+                    "key": rule.key,
+                    "limit": rule.limit,
+                    "buckets": self.store.size(rule),
+                    "allowed": self.allowed[rule.name],
+                    "rejected": self.rejected[rule.name],
+                }
+                for rule in self.rules
+            },
+        }
+
+rate_limiter = RateLimiter()
+
+# === MIDDLEWARE ===
+
+def _user_id(scope) -> Optional[str]:
+    """Authenticated user of the request, from the principal cache or the token itself (no query)"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            principal = principal_cache.get(token)
+            if principal is not None:
+                return principal.user_id
+            claims = decode_token(token)
+            return claims["sub"] if claims else None
+    return None
+
+def _forwarded_for(scope) -> str:
+    """X-Forwarded-For of the request, repeated headers joined in order"""
+    return ",".join(
+        value.decode("latin-1") for name, value in scope["headers"] if name == b"x-forwarded-for"
+    )
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware: rejected requests never reach routing, and responses are not buffered"""
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            return await self.app(scope, receive, send)
+
+        rules = self.limiter.match(scope["method"], scope["path"])
+        if not rules:
+            return await self.app(scope, receive, send)
+
+        peer = scope["client"][0] if scope.get("client") else ""
+        ip = self.limiter.client_ip(peer, _forwarded_for(scope)) if self.limiter.trusted_proxies else peer
+        user_id = _user_id(scope) if any(rule.key == "user" for rule in rules) else None
+        decision = self.limiter.check(rules, ip, user_id)
+        headers = decision.headers()
+
+        if not decision.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content=ErrorResponse(error=f"Too many requests, retry in {headers['Retry-After']}s").dict(),
+                headers=headers
+            )
+            return await response(scope, receive, send)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
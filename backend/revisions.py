@@ -0,0 +1,228 @@
+"""
+Website Revisions Module
+History of content, custom_css and custom_js. Every ORM flush that changes them appends a revision:
+a JSON Patch delta from the previous revision, or a full snapshot every REVISION_SNAPSHOT_INTERVAL
+revisions (or when the delta would be larger than half the document). Rebuilding any revision replays
+at most one snapshot plus REVISION_SNAPSHOT_INTERVAL deltas. Old history is thinned by compact_revisions.
+"""
+import os
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, select, insert, delete, func, case, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Website, WebsiteRevision
+from json_patch import make_json_patch, apply_json_patch
+
+TRACKED_FIELDS = ("content", "custom_css", "custom_js")
+TEXT_FIELDS = ("custom_css", "custom_js")
+
+SNAPSHOT_INTERVAL = int(os.getenv("REVISION_SNAPSHOT_INTERVAL", "20"))
+COMPACT_AFTER_DAYS = int(os.getenv("REVISION_COMPACT_AFTER_DAYS", "30"))
+COMPACT_BATCH_SIZE = int(os.getenv("REVISION_COMPACT_BATCH_SIZE", "50"))
+
+_UNKNOWN = object()
+
+# === DOCUMENTS ===
+
+def _to_document(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored form: CSS/JS split into lines so deltas only carry the edited lines"""
+    document = {}
+    for field in TRACKED_FIELDS:
+        value = values.get(field)
+        document[field] = value.splitlines(keepends=True) if field in TEXT_FIELDS and value is not None else value
+    return document
+
+def _from_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        field: "".join(document[field]) if field in TEXT_FIELDS and document[field] is not None else document[field]
+        for field in TRACKED_FIELDS
+    }
+
+def replay(revisions: List[WebsiteRevision]) -> Dict[str, Any]:
+    """Rebuild the stored document of the last revision from a snapshot followed by deltas"""
+    if not revisions or revisions[0].kind != "snapshot":
+        raise ValueError("Revision replay must start from a snapshot")
+
+    document = revisions[0].data
+    for revision in revisions[1:]:
+        if revision.kind == "snapshot":
+            document = revision.data
+        else:
+            document, _ = apply_json_patch(document, revision.data)
+    return document
+
+def _encode(document: Dict[str, Any], previous: Optional[Dict[str, Any]], since_snapshot: int):
+    """(kind, data) for a new revision, or None if nothing changed"""
+    if previous is None:
+        return "snapshot", document
+
+    operations = make_json_patch(previous, document)
+    if not operations:
+        return None
+    if since_snapshot >= SNAPSHOT_INTERVAL or len(json.dumps(operations)) * 2 > len(json.dumps(document)):
+        return "snapshot", document
+    return "delta", operations
+
+# === RECORDING ===
+
+def _latest_document(connection, website_id: str, number: int) -> Dict[str, Any]:
+    """Stored document of revision `number`, replayed from the last snapshot at or before it"""
+    table = WebsiteRevision.__table__
+    snapshot_number = select(func.max(table.c.number)).where(
+        table.c.website_id == website_id,
+        table.c.kind == "snapshot",
+        table.c.number <= number
+    ).scalar_subquery()
+    return replay(connection.execute(
+        select(table.c.kind, table.c.data)
+        .where(table.c.website_id == website_id, table.c.number >= snapshot_number, table.c.number <= number)
+        .order_by(table.c.number)
+    ).all())
+
+def _record(connection, website_id: str, initial: Any, document: Dict[str, Any]):
+    table = WebsiteRevision.__table__
+    last_number, last_snapshot = connection.execute(
+        select(
+            func.max(table.c.number),
+            func.max(case((table.c.kind == "snapshot", table.c.number)))
+        ).where(table.c.website_id == website_id)
+    ).one()
+
+    rows = []
+    if last_number is not None:
+        # Diff against the stored history: the attribute history of an expired instance
+        # (sync sessions expire on commit) does not hold the pre-flush values
+        previous = _latest_document(connection, website_id, last_number)
+    elif initial not in (None, _UNKNOWN):
+        # First edit of a site created without history: keep its initial state as revision 1
+        rows.append({"number": 1, "kind": "snapshot", "data": initial})
+        last_number = last_snapshot = 1
+        previous = initial
+    else:
+        previous = None
+
+    encoded = _encode(document, previous, (last_number or 0) - (last_snapshot or 0) + 1)
+    if encoded is not None:
+        rows.append({"number": (last_number or 0) + 1, "kind": encoded[0], "data": encoded[1]})
+
+    if rows:
+        now = datetime.utcnow()
+        connection.execute(insert(table), [{"website_id": website_id, "created_at": now, **row} for row in rows])
+
+def _initial_document(website: Website) -> Any:
+    """Pre-flush values of the tracked fields from the attribute history, for sites without stored history"""
+    state = inspect(website)
+    values = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if history.added:
+            if not history.deleted:
+                return _UNKNOWN
+            values[field] = history.deleted[0]
+        else:
+            values[field] = getattr(website, field)
+    return _to_document(values)
+
+@event.listens_for(Session, "before_flush")
+def _delete_revisions(session, flush_context, instances):
+    """Drop the history of deleted websites before the website row itself"""
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Website)]
+    if deleted:
+        session.connection().execute(
+            delete(WebsiteRevision.__table__).where(WebsiteRevision.__table__.c.website_id.in_(deleted))
+        )
+
+@event.listens_for(Session, "after_flush")
+def _record_revisions(session, flush_context):
+    """Append a revision in the same transaction as the content change"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Website) and any(getattr(obj, field) is not None for field in TRACKED_FIELDS):
+            changes.append((obj, None))
+    for obj in session.dirty:
+        if isinstance(obj, Website) and obj not in session.deleted:
+            state = inspect(obj)
+            if any(state.attrs[field].history.added for field in TRACKED_FIELDS):
+                changes.append((obj, _initial_document(obj)))
+
+    for website, initial in changes:
+        _record(session.connection(), website.id, initial, _to_document({
+            field: getattr(website, field) for field in TRACKED_FIELDS
+        }))
+
+# === READING ===
+
+def _replay_statement(website_id: str, number: int):
+    snapshot_number = select(func.max(WebsiteRevision.number)).where(
+        WebsiteRevision.website_id == website_id,
+        WebsiteRevision.kind == "snapshot",
+        WebsiteRevision.number <= number
+    ).scalar_subquery()
+    return select(WebsiteRevision).where(
+        WebsiteRevision.website_id == website_id,
+        WebsiteRevision.number >= snapshot_number,
+        WebsiteRevision.number <= number
+    ).order_by(WebsiteRevision.number)
+
+async def get_revision(db: AsyncSession, website_id: str, number: int) -> Optional[Dict[str, Any]]:
+    """content, custom_css and custom_js as of revision `number` (None if it does not exist)"""
+    revisions = (await db.scalars(_replay_statement(website_id, number))).all()
+    if not revisions or revisions[-1].number != number:
+        return None
+    return _from_document(replay(revisions))
+
+# === COMPACTION ===
+
+def _compact_website(db: Session, website_id: str, cutoff: datetime):
+    revisions = db.scalars(
+        select(WebsiteRevision)
+        .where(WebsiteRevision.website_id == website_id, WebsiteRevision.created_at < cutoff)
+        .order_by(WebsiteRevision.number)
+    ).all()
+    if not revisions:
+        return
+
+    # Keep the last revision of each day; the newest old revision is always kept since later deltas build on it
+    documents = {}
+    document = None
+    kept: Dict[Any, WebsiteRevision] = {}
+    for revision in revisions:
+        document = revision.data if revision.kind == "snapshot" else apply_json_patch(document, revision.data)[0]
+        documents[revision.number] = document
+        kept[revision.created_at.date()] = revision
+    kept_numbers = {revision.number for revision in kept.values()}
+
+    previous = None
+    since_snapshot = 0
+    for revision in revisions:
+        if revision.number not in kept_numbers:
+            db.delete(revision)
+            continue
+
+        document = documents[revision.number]
+        kind, data = _encode(document, previous, since_snapshot + 1) or ("delta", [])
+        since_snapshot = 0 if kind == "snapshot" else since_snapshot + 1
+        revision.kind, revision.data, revision.compacted = kind, data, True
+        previous = document
+
+def compact_revisions(db: Session, older_than: Optional[timedelta] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Thin out history older than REVISION_COMPACT_AFTER_DAYS to one revision per day, re-diffing
+    the kept revisions against each other. Processes at most `batch_size` websites; returns that count.
+    """
+    cutoff = datetime.utcnow() - (older_than if older_than is not None else timedelta(days=COMPACT_AFTER_DAYS))
+    website_ids = db.scalars(
+        select(WebsiteRevision.website_id)
+        .where(WebsiteRevision.compacted == False, WebsiteRevision.created_at < cutoff)
+        .distinct()
+        .limit(batch_size or COMPACT_BATCH_SIZE)
+    ).all()
+
+    for website_id in website_ids:
+        _compact_website(db, website_id, cutoff)
+        db.commit()
+    return len(website_ids)
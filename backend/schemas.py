@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 import re
 
 # Base schemas
@@ -52,6 +52,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
     expires_in: int
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[str] = None
@@ -109,6 +114,7 @@ class WebsiteResponse(WebsiteBase):
     meta_title: Optional[str]
     meta_description: Optional[str]
     view_count: int
+    version: int
     owner_id: str
     created_at: datetime
     updated_at: datetime
@@ -117,6 +123,27 @@ class WebsiteResponse(WebsiteBase):
     class Config:
         from_attributes = True
 
+class WebsiteSummary(BaseModel):
+    """Lightweight listing view: no content, settings or custom code"""
+    id: str
+    name: str
+    slug: str
+    description: Optional[str]
+    template_id: Optional[str]
+    status: str
+    is_public: bool
+    is_hosted: bool
+    hosting_subdomain: Optional[str]
+    hosting_url: Optional[str]
+    ssl_enabled: bool
+    deployed_at: Optional[datetime]
+    view_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class WebsitePublicResponse(BaseModel):
     """Public view of website (without sensitive data)"""
     id: str
@@ -133,6 +160,54 @@ class WebsitePublicResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WebsiteSearchResponse(BaseModel):
+    """Best matches first"""
+    query: str
+    items: List[WebsiteSummary]
+
+class WebsiteBulkRequest(BaseModel):
+    action: str = Field(..., pattern="^(delete|archive|retemplate)$")
+    website_ids: List[str] = Field(..., min_length=1)
+    template_id: Optional[str] = None  # Required for retemplate
+
+class WebsiteBulkResult(BaseModel):
+    id: str
+    status: str  # ok, skipped, not_found, failed
+    detail: Optional[str] = None
+
+class WebsiteBulkResponse(BaseModel):
+    action: str
+    succeeded: int
+    skipped: int
+    not_found: int
+    failed: int
+    results: List[WebsiteBulkResult]
+
+class WebsiteRevisionSummary(BaseModel):
+    number: int
+    kind: str  # snapshot, delta
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class WebsiteRevisionResponse(BaseModel):
+    """Tracked fields of a website as of one revision"""
+    number: int
+    content: Optional[Dict[str, Any]]
+    custom_css: Optional[str]
+    custom_js: Optional[str]
+
+class TrafficPoint(BaseModel):
+    timestamp: datetime
+    views: int
+
+class TrafficAnalyticsResponse(BaseModel):
+    website_id: str
+    resolution: str
+    total: int
+    points: List[TrafficPoint]
+
 # Template schemas
 class TemplateBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -178,6 +253,11 @@ class TemplateResponse(TemplateBase):
     class Config:
         from_attributes = True
 
+class TemplateSearchResponse(BaseModel):
+    """Best matches first"""
+    query: str
+    items: List[TemplateResponse]
+
 # Generation schemas (for Phase 2)
 class GenerateContentRequest(BaseModel):
     type: str = Field(..., pattern="^(text|image|design|seo)$")
@@ -194,7 +274,54 @@ class GenerateContentResponse(BaseModel):
     tokens_used: Optional[int]
     created_at: datetime
 
+class GenerationUsageBucket(BaseModel):
+    day: date
+    ai_service: str
+    model_used: str
+    generations: int
+    tokens_used: int
+    cost: int  # Cents
+
+    class Config:
+        from_attributes = True
+
+class GenerationUsageTotals(BaseModel):
+    generations: Optional[int]
+    tokens_used: Optional[int]
+    cost: Optional[int]
+
+class GenerationUsageResponse(BaseModel):
+    """Usage since `since` and the current month against the plan's limits (null limit = unlimited)"""
+    plan: str
+    since: date
+    buckets: List[GenerationUsageBucket]
+    month_start: date
+    month_totals: GenerationUsageTotals
+    month_limits: GenerationUsageTotals
+
+class AccountImportResponse(BaseModel):
+    """Records loaded and skipped per type (already present, orphaned, or hosting metadata)"""
+    imported: Dict[str, int]
+    skipped: Dict[str, int]
+
 # Utility schemas
+class JsonPatchOperation(BaseModel):
+    """RFC 6902 operation; paths are rooted at /content or /settings"""
+    op: str = Field(..., pattern="^(add|remove|replace|move|copy|test)$")
+    path: str
+    from_: Optional[str] = Field(None, alias="from")
+    value: Any = None
+
+class WebsitePatch(BaseModel):
+    """Partial update of content/settings: exactly one of merge_patch (RFC 7396) or operations (RFC 6902)"""
+    version: int  # Version the patch was computed against
+    merge_patch: Optional[Dict[str, Any]] = None  # e.g. {"content": {"hero": {"title": "New"}}}
+    operations: Optional[List[JsonPatchOperation]] = None
+
+class WebsitePatchResponse(BaseModel):
+    website: WebsiteResponse
+    changed_paths: List[str]  # JSON pointers of the subtrees that changed, e.g. /content/hero/title
+
 class MessageResponse(BaseModel):
     message: str
     success: bool = True
@@ -224,4 +351,15 @@ class PaginatedResponse(BaseModel):
             page=page,
             size=size,
             pages=(total + size - 1) // size  # Ceiling division
-        )
\ No newline at end of file
+        )
+
+class CursorPaginatedResponse(BaseModel):
+    """Keyset pagination: pass `next_cursor` back as `cursor` to get the next page"""
+    items: List[Any]
+    next_cursor: Optional[str] = None
+    size: int
+    total: Optional[int] = None  # Only computed when requested (include_total=true)
+
+class TemplateListResponse(CursorPaginatedResponse):
+    """Template page; `facets` counts the matching templates per tag (facets=true)"""
+    facets: Optional[Dict[str, int]] = None
\ No newline at end of file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Full-text search over websites and templates
+search_entries maps (kind, doc_id) to an integer key; the text lives in a dialect-specific index keyed by it:
+an FTS5 virtual table on SQLite, a weighted tsvector with a GIN index on PostgreSQL. Each document also
+carries a scope token (its owner, or the template gallery), so a user's search intersects posting lists
+instead of filtering every match. Documents are re-indexed in the transaction that changes them.
+
+Usage: python search.py reindex   (rebuild the whole index, e.g. after a bulk import)
+"""
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select, text, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Website, Template, SearchEntry
+from slug_allocator import dialect_insert
+
+WEBSITE = "website"
+TEMPLATE = "template"
+TEMPLATE_SCOPE = "gallery"
+
+# Indexed text per document is capped so one huge page cannot slow down every write
+MAX_BODY_CHARS = 20_000
+MAX_QUERY_TERMS = 8
+REINDEX_BATCH_SIZE = 1000
+
+WEBSITE_FIELDS = ("name", "description", "meta_keywords", "content", "owner_id")
+TEMPLATE_FIELDS = ("name", "description", "category", "tags", "default_content")
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# === DOCUMENTS ===
+
+def _collect_text(value: Any, parts: List[str], budget: List[int]):
+    """Every string inside a JSON value, depth first, until the character budget is spent"""
+    if budget[0] <= 0:
+        return
+    if isinstance(value, str):
+        parts.append(value[:budget[0]])
+        budget[0] -= len(value) + 1
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_text(item, parts, budget)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_text(item, parts, budget)
+
+def _body(*values: Any) -> str:
+    parts: List[str] = []
+    budget = [MAX_BODY_CHARS]
+    for value in values:
+        _collect_text(value, parts, budget)
+    return " ".join(parts)
+
+def _scope_token(owner_id: str) -> str:
+    # One alphanumeric token for both tokenizers (UUID dashes would split it)
+    return "o" + re.sub(r"\W", "", owner_id)
+
+def website_document(website) -> Tuple[str, str, str, str, str]:
+    """(kind, doc_id, scope, title, body) for a Website or a row with the same attributes"""
+    return (
+        WEBSITE, website.id, _scope_token(website.owner_id), website.name or "",
+        _body(website.description, website.meta_keywords, website.content)
+    )
+
+def template_document(template) -> Tuple[str, str, str, str, str]:
+    return (
+        TEMPLATE, template.id, TEMPLATE_SCOPE, template.name or "",
+        _body(template.description, template.category, template.tags, template.default_content)
+    )
+
+# === INDEX MAINTENANCE ===
+
+def _entry_ids(connection, kind: str, doc_ids: Iterable[str]) -> Dict[str, int]:
+    table = SearchEntry.__table__
+    rows = connection.execute(
+        select(table.c.doc_id, table.c.id).where(table.c.kind == kind, table.c.doc_id.in_(list(doc_ids)))
+    )
+    return {row.doc_id: row.id for row in rows}
+
+def index_documents(connection, documents: List[Tuple[str, str, str, str, str]]):
+    """Insert or replace documents in the index (the caller commits)"""
+    if not documents:
+        return
+
+    table = SearchEntry.__table__
+    statement = dialect_insert(connection.dialect.name, table)
+    if hasattr(statement, "on_conflict_do_nothing"):
+        statement = statement.on_conflict_do_nothing(index_elements=["kind", "doc_id"])
+        connection.execute(statement, [{"kind": kind, "doc_id": doc_id} for kind, doc_id, *_ in documents])
+    entry_ids = {
+        (kind, doc_id): entry_id
+        for kind in {kind for kind, *_ in documents}
+        for doc_id, entry_id in _entry_ids(connection, kind, (d[1] for d in documents if d[0] == kind)).items()
+    }
+
+    rows = [
+        {"entry_id": entry_ids[(kind, doc_id)], "scope": scope, "title": title, "body": body}
+        for kind, doc_id, scope, title, body in documents
+    ]
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            "INSERT INTO search_index (entry_id, document) VALUES (:entry_id, "
+            "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B') "
+            "|| setweight(to_tsvector('simple', :scope), 'D')) "
+            "ON CONFLICT (entry_id) DO UPDATE SET document = excluded.document"
+        ), rows)
+    else:
+        connection.execute(text("DELETE FROM search_index WHERE rowid = :entry_id"), rows)
+        connection.execute(text(
+            "INSERT INTO search_index (rowid, scope, title, body) VALUES (:entry_id, :scope, :title, :body)"
+        ), rows)
+
+def remove_documents(connection, kind: str, doc_ids: Iterable[str]):
+    """Drop documents from the index (the caller commits)"""
+    entry_ids = list(_entry_ids(connection, kind, doc_ids).values())
+    if not entry_ids:
+        return
+
+    key = "entry_id" if connection.dialect.name == "postgresql" else "rowid"
+    connection.execute(text(f"DELETE FROM search_index WHERE {key} = :entry_id"), [{"entry_id": i} for i in entry_ids])
+    connection.execute(SearchEntry.__table__.delete().where(SearchEntry.__table__.c.id.in_(entry_ids)))
+
+def index_website_ids(connection, website_ids: List[str]):
+    """Index websites written with Core statements (no ORM flush to hook into)"""
+    rows = connection.execute(
+        select(*(getattr(Website, field) for field in ("id",) + WEBSITE_FIELDS)).where(Website.id.in_(website_ids))
+    )
+    index_documents(connection, [website_document(row) for row in rows])
+
+def index_template_ids(connection, template_ids: List[str]):
+    rows = connection.execute(
+        select(*(getattr(Template, field) for field in ("id",) + TEMPLATE_FIELDS)).where(Template.id.in_(template_ids))
+    )
+    index_documents(connection, [template_document(row) for row in rows])
+
+def _changed(obj, fields: Tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.added for field in fields)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_search_index(session, flush_context):
+    """Re-index websites and templates whose searchable fields changed in this flush"""
+    documents = []
+    removed: Dict[str, List[str]] = {WEBSITE: [], TEMPLATE: []}
+
+    for obj in (*session.new, *session.dirty):
+        if obj in session.deleted:
+            continue
+        if isinstance(obj, Website) and (obj in session.new or _changed(obj, WEBSITE_FIELDS)):
+            documents.append(website_document(obj))
+        elif isinstance(obj, Template) and (obj in session.new or _changed(obj, TEMPLATE_FIELDS)):
+            documents.append(template_document(obj))
+
+    for obj in session.deleted:
+        if isinstance(obj, Website):
+            removed[WEBSITE].append(obj.id)
+        elif isinstance(obj, Template):
+            removed[TEMPLATE].append(obj.id)
+
+    if documents or removed[WEBSITE] or removed[TEMPLATE]:
+        connection = session.connection()
+        index_documents(connection, documents)
+        for kind, doc_ids in removed.items():
+            remove_documents(connection, kind, doc_ids)
+
+# === QUERIES ===
+
+def query_terms(query: str) -> List[str]:
+    return TERM_PATTERN.findall(query.lower())[:MAX_QUERY_TERMS]
+
+async def search(db: AsyncSession, kind: str, scope: str, query: str, limit: int = 20) -> List[str]:
+    """IDs of the best matching documents of `kind` in `scope`, every term matched as a prefix"""
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    if db.bind.dialect.name == "postgresql":
+        statement = text(
+            "SELECT e.doc_id FROM search_index s JOIN search_entries e ON e.id = s.entry_id "
+            "WHERE e.kind = :kind AND s.document @@ (to_tsquery('simple', :scope) && to_tsquery('simple', :terms)) "
+            "ORDER BY ts_rank_cd(s.document, to_tsquery('simple', :terms)) DESC LIMIT :limit"
+        )
+        params = {"terms": " & ".join(f"{term}:*" for term in terms)}
+    else:
+        # bm25 column weights (scope 0, title 10, body 1) are stored as the table's rank function
+        statement = text(
+            "SELECT e.doc_id FROM search_index JOIN search_entries e ON e.id = search_index.rowid "
+            "WHERE search_index MATCH :match AND e.kind = :kind ORDER BY rank LIMIT :limit"
+        )
+        quoted = " AND ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+        params = {"match": f'scope : "{scope}" AND ({quoted})'}
+
+    rows = await db.execute(statement, {**params, "kind": kind, "scope": scope, "limit": limit})
+    return [row.doc_id for row in rows]
+
+async def search_websites(db: AsyncSession, owner_id: str, query: str, limit: int = 20) -> List[str]:
+    return await search(db, WEBSITE, _scope_token(owner_id), query, limit)
+
+async def search_templates(db: AsyncSession, query: str, limit: int = 20) -> List[str]:
+    return await search(db, TEMPLATE, TEMPLATE_SCOPE, query, limit)
+
+# === REINDEX ===
+
+def reindex(connection, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Rebuild the documents of every website and template, keyset-paginated on id"""
+    batch_size = batch_size or REINDEX_BATCH_SIZE
+    counts = {}
+    for kind, model, fields, to_document in (
+        (WEBSITE, Website, WEBSITE_FIELDS, website_document),
+        (TEMPLATE, Template, TEMPLATE_FIELDS, template_document),
+    ):
+        counts[kind] = 0
+        last_id = ""
+        while True:
+            rows = connection.execute(
+                select(*(getattr(model, field) for field in ("id",) + fields))
+                .where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            index_documents(connection, [to_document(row) for row in rows])
+            counts[kind] += len(rows)
+            last_id = rows[-1].id
+    return counts
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["reindex"]:
+        print(__doc__)
+        sys.exit(1)
+
+    from database import engine, init_db
+
+    init_db()
+    with engine.begin() as connection:
+        print(f"✅ Search index rebuilt: {reindex(connection)}")
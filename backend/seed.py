@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Seeding CLI: sample templates plus synthetic users, websites and hosted site trees at scale.
+
+Every row has a deterministic ID derived from its index and is inserted with ON CONFLICT DO NOTHING,
+so re-running the same command is idempotent and an interrupted run can simply be restarted.
+Rows are generated lazily and written in batches with executemany; throughput is reported per batch.
+
+Usage:
+    python seed.py --templates
+    python seed.py --users 10000 --websites 1000000 --hosted-fraction 0.01 --hosted-trees
+    python seed.py --websites 50000 --content-mix small=50,medium=40,large=10 --batch-size 2000
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List
+
+from sqlalchemy import select
+
+from database import engine, init_db
+from models import User, Website, Template
+from slug_allocator import dialect_insert
+from init_templates import SAMPLE_TEMPLATES, upsert_templates
+from hosting_manager import HostingManager
+from search import index_documents, website_document
+
+SEED_NAMESPACE = uuid.UUID("6f1c7a52-0c1e-4d55-9a59-52a4c3f0e9b1")
+SEED_PASSWORD = "seed-passw0rd"
+
+# Approximate serialized content size of each profile, in bytes
+CONTENT_SIZES = {"small": 1_000, "medium": 10_000, "large": 100_000}
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+    "et dolore magna aliqua design studio portfolio projet services contact équipe boutique produit"
+).split()
+
+def seed_id(kind: str, index: int) -> str:
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{kind}-{index}"))
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in CONTENT_SIZES or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid content mix entry: {part!r}")
+        mix[name] = int(weight)
+    return mix
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+# A section is about 600 bytes once serialized
+SECTION_SIZE = 600
+SECTION_POOL_SIZE = 4096
+
+def make_section_pool(rng: random.Random) -> List[Dict[str, Any]]:
+    """Pre-generated sections: content is assembled from the pool instead of drawing every word"""
+    return [
+        {"title": _text(rng, 4), "body": _text(rng, 60), "items": [_text(rng, 8) for _ in range(3)]}
+        for _ in range(SECTION_POOL_SIZE)
+    ]
+
+def make_content(rng: random.Random, size: str, pool: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Website content shaped like the templates' default_content, about CONTENT_SIZES[size] bytes"""
+    count = max(1, CONTENT_SIZES[size] // SECTION_SIZE)
+    start = rng.randrange(len(pool))
+    sections = [pool[(start + offset) % len(pool)] for offset in range(count)]
+    return {"hero": {"title": _text(rng, 3), "subtitle": _text(rng, 6)}, "sections": sections}
+
+# === GENERATORS ===
+
+def generate_users(count: int, hashed_password: str) -> Iterator[Dict[str, Any]]:
+    now = datetime.utcnow()
+    for index in range(count):
+        yield {
+            "id": seed_id("user", index),
+            "email": f"seed-user-{index}@example.com",
+            "username": f"seed_user_{index}",
+            "full_name": f"Seed User {index}",
+            "hashed_password": hashed_password,
+            "is_active": True,
+            "is_verified": True,
+            "created_at": now,
+            "updated_at": now
+        }
+
+def generate_websites(
+    count: int,
+    user_count: int,
+    template_ids: List[str],
+    mix: Dict[str, int],
+    hosted_fraction: float,
+    hosting_url: str,
+    seed: int
+) -> Iterator[Dict[str, Any]]:
+    now = datetime.utcnow()
+    sizes, weights = zip(*mix.items())
+    pool = make_section_pool(random.Random(seed))
+    for index in range(count):
+        # Per-row generator: the same index always yields the same row, whatever the batch size
+        rng = random.Random(f"{seed}-{index}")
+        # Skewed ownership: a few users own many sites, most own a handful
+        owner = int(user_count * rng.random() ** 2)
+        created_at = now - timedelta(days=rng.uniform(0, 365))
+        updated_at = created_at + (now - created_at) * rng.random()
+        hosted = rng.random() < hosted_fraction
+        subdomain = f"seed-site-{index}" if hosted else None
+        yield {
+            "id": seed_id("website", index),
+            "name": f"Seed Site {index}",
+            "slug": f"seed-site-{index}",
+            "description": _text(rng, 12),
+            "template_id": rng.choice(template_ids) if template_ids else None,
+            "content": make_content(rng, rng.choices(sizes, weights)[0], pool),
+            "settings": {"theme": rng.choice(["light", "dark"])},
+            "status": "published" if hosted else rng.choice(["draft", "draft", "archived"]),
+            "is_public": hosted,
+            "is_hosted": hosted,
+            "hosting_subdomain": subdomain,
+            "hosting_url": hosting_url.format(subdomain=subdomain) if hosted else None,
+            "ssl_enabled": True,
+            "deployed_at": updated_at if hosted else None,
+            "view_count": int(rng.paretovariate(1.2)) if hosted else 0,
+            "owner_id": seed_id("user", owner),
+            "version": 1,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+# === WRITERS ===
+
+def insert_batches(
+    table,
+    rows: Iterator[Dict[str, Any]],
+    total: int,
+    batch_size: int,
+    label: str,
+    on_batch: Callable[[List[Dict[str, Any]]], None] = None,
+    in_transaction: Callable[[Any, List[Dict[str, Any]]], None] = None
+) -> int:
+    """
+    executemany INSERT ... ON CONFLICT DO NOTHING, one transaction per batch; returns rows inserted.
+    `in_transaction(connection, batch)` runs in the batch's transaction, `on_batch(batch)` after its commit.
+    """
+    statement = dialect_insert(engine.dialect.name, table)
+    if hasattr(statement, "on_conflict_do_nothing"):
+        statement = statement.on_conflict_do_nothing()
+
+    inserted = 0
+    done = 0
+    start = time.perf_counter()
+    batch: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal inserted, done
+        with engine.begin() as connection:
+            result = connection.execute(statement, batch)
+            if in_transaction:
+                in_transaction(connection, batch)
+        inserted += max(result.rowcount, 0)
+        done += len(batch)
+        if on_batch:
+            on_batch(batch)
+        elapsed = time.perf_counter() - start
+        print(f"  {label}: {done}/{total} ({done / elapsed:,.0f} rows/s)", flush=True)
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {label}: {inserted} inserted, {done - inserted} already present, "
+          f"{elapsed:.1f}s ({done / elapsed if elapsed else 0:,.0f} rows/s)")
+    return inserted
+
+def index_website_rows(connection, rows: List[Dict[str, Any]]):
+    """Full-text index entries for a batch, as the API would write them"""
+    index_documents(connection, [website_document(SimpleNamespace(**{"meta_keywords": None, **row})) for row in rows])
+
+def write_hosted_trees(hosting_manager: HostingManager, rows: List[Dict[str, Any]]):
+    """Minimal hosted site tree (index.html + metadata) for each hosted website of the batch"""
+    for row in rows:
+        if not row["is_hosted"]:
+            continue
+        deploy_path = hosting_manager.hosting_root / row["hosting_subdomain"]
+        deploy_path.mkdir(parents=True, exist_ok=True)
+        (deploy_path / "index.html").write_text(
+            f"<!DOCTYPE html><html><head><title>{row['name']}</title></head>"
+            f"<body><h1>{row['content']['hero']['title']}</h1></body></html>"
+        )
+        with open(deploy_path / ".site_metadata.json", "w") as f:
+            json.dump({
+                "website_id": row["id"],
+                "website_name": row["name"],
+                "subdomain": row["hosting_subdomain"],
+                "hosting_url": row["hosting_url"],
+                "deployed_at": row["deployed_at"].isoformat(),
+                "ssl_enabled": True,
+                "owner_id": row["owner_id"],
+                "status": "active"
+            }, f, indent=2)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Seed the database with templates and synthetic data")
+    parser.add_argument("--templates", action="store_true", help="Upsert the sample templates by slug")
+    parser.add_argument("--users", type=int, default=0, help="Number of synthetic users")
+    parser.add_argument("--websites", type=int, default=0, help="Number of synthetic websites")
+    parser.add_argument("--content-mix", type=parse_mix, default=parse_mix("small=70,medium=25,large=5"),
+                        help="Weights of content sizes (small ~1KB, medium ~10KB, large ~100KB)")
+    parser.add_argument("--hosted-fraction", type=float, default=0.05, help="Share of websites marked as hosted")
+    parser.add_argument("--hosted-trees", action="store_true", help="Also write hosted site trees under HOSTING_ROOT")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed, same data)")
+    args = parser.parse_args()
+
+    if args.websites and not args.users:
+        parser.error("--websites needs --users to own them")
+
+    init_db()
+
+    if args.templates:
+        with engine.begin() as connection:
+            print(f"✅ templates: {upsert_templates(connection, SAMPLE_TEMPLATES)} upserted")
+
+    if args.users:
+        from auth import get_password_hash
+        insert_batches(
+            User.__table__, generate_users(args.users, get_password_hash(SEED_PASSWORD)),
+            args.users, args.batch_size, "users"
+        )
+
+    if args.websites:
+        with engine.connect() as connection:
+            template_ids = list(connection.scalars(select(Template.id).where(Template.is_active == True)))
+        hosting_manager = HostingManager()
+        protocol = "https" if hosting_manager.use_ssl else "http"
+        insert_batches(
+            Website.__table__,
+            generate_websites(
+                args.websites, args.users, template_ids, args.content_mix,
+                args.hosted_fraction, f"{protocol}://{{subdomain}}.{hosting_manager.base_domain}", args.seed
+            ),
+            args.websites, args.batch_size, "websites",
+            on_batch=(lambda batch: write_hosted_trees(hosting_manager, batch)) if args.hosted_trees else None,
+            in_transaction=index_website_rows
+        )
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
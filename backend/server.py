@@ -1,27 +1,56 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import IntegrityError
 from datetime import timedelta, datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+import asyncio
 import os
 from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
 
 # Import local modules
-from database import get_db, init_db
-from models import User, Website, Template
+from database import get_async_db, get_read_db, LAST_WRITE_HEADER, init_db, SessionLocal, AsyncSessionLocal, get_pool_stats
+from models import User, Website, Template, WebsiteRevision, GenerationHistory
 from schemas import (
-    UserCreate, UserResponse, UserUpdate, LoginRequest, Token,
-    WebsiteCreate, WebsiteResponse, WebsiteUpdate,
+    UserCreate, UserResponse, UserUpdate, LoginRequest, Token, RefreshRequest,
+    WebsiteCreate, WebsiteResponse, WebsiteUpdate, WebsiteSummary, WebsitePatch, WebsitePatchResponse,
     TemplateCreate, TemplateResponse, TemplateUpdate,
-    MessageResponse, ErrorResponse, PaginatedResponse
+    MessageResponse, ErrorResponse, PaginatedResponse, CursorPaginatedResponse,
+    TrafficAnalyticsResponse, WebsiteRevisionSummary, WebsiteRevisionResponse,
+    WebsiteBulkRequest, WebsiteBulkResult, WebsiteBulkResponse,
+    WebsiteSearchResponse, TemplateSearchResponse, TemplateListResponse,
+    GenerationUsageBucket, GenerationUsageTotals, GenerationUsageResponse, AccountImportResponse
 )
 from auth import (
-    authenticate_user, create_access_token, create_user, 
+    authenticate_user, create_access_token, create_user, get_user,
     get_current_active_user, ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from auth_sessions import (
+    create_session, rotate_session, logout_session, purge_sessions, revoked_sessions,
+    RefreshTokenError, REFRESH_TOKEN_EXPIRE_DAYS
+)
+from slug_allocator import insert_with_unique_value
+from pagination import encode_cursor, decode_cursor, after_cursor
+from template_catalog import template_catalog
+from json_patch import apply_merge_patch, apply_json_patch, JsonPatchError
+from revisions import get_revision, compact_revisions
+from search import search_websites, search_templates, index_website_ids, remove_documents, WEBSITE
+from template_tags import filter_by_tags, facet_counts, MAX_FILTER_TAGS
+from generation_usage import check_generation_quota, usage_totals, usage_buckets, plan_limits, month_start
+from account_export import export_account, read_records, AccountImporter, AccountImportError
+from password_hasher import password_hasher
+from rate_limiter import RateLimitMiddleware, rate_limiter, RATE_LIMIT_HEADERS
 from website_exporter import WebsiteExporter
 from hosting_manager import HostingManager
+from hosting_reconciler import HostingReconciler
+from view_counter import view_counter
+from counters import counters, template_usage
+from traffic_analytics import traffic_store
 
 # Load environment variables
 load_dotenv()
@@ -35,6 +64,9 @@ app = FastAPI(
     redoc_url="/api/redoc"
 )
 
+# Rate limiting (added first so that CORS wraps it and 429s carry CORS headers)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 # CORS middleware
 origins = [
     "http://localhost:3000",
@@ -48,21 +80,157 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER, *RATE_LIMIT_HEADERS],
 )
 
+# Background maintenance jobs
+background_tasks: List[asyncio.Task] = []
+
+async def run_periodically(interval: float, job):
+    """Run a blocking job every `interval` seconds without blocking the event loop"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(job)
+        except Exception as e:
+            print(f"Background job {job.__name__} failed: {e}")
+
+site_host = None
+hosting_reconciler = None
+
+def flush_view_counts():
+    """Flush buffered hosted site views to websites.view_count"""
+    db = SessionLocal()
+    try:
+        view_counter.flush(db)
+    finally:
+        db.close()
+
+def flush_counters():
+    """Flush buffered counters (template usage, ratings) as atomic increments"""
+    db = SessionLocal()
+    try:
+        counters.flush_all(db)
+    finally:
+        db.close()
+
+def compact_website_revisions():
+    """Thin out old revision history, one batch of websites per run"""
+    db = SessionLocal()
+    try:
+        compact_revisions(db)
+    finally:
+        db.close()
+
+def flush_traffic_analytics():
+    """Write buffered hosted site hits to the per-website traffic series"""
+    db = SessionLocal()
+    try:
+        traffic_store.flush(db)
+    finally:
+        db.close()
+
+def rollup_traffic_analytics():
+    """Downsample old per-minute traffic counters to hourly slots"""
+    traffic_store.rollup()
+
+def poll_revoked_sessions():
+    """Pick up sessions revoked by other workers"""
+    db = SessionLocal()
+    try:
+        revoked_sessions.poll(db)
+    finally:
+        db.close()
+
+def purge_auth_sessions():
+    """Delete long expired or revoked refresh sessions"""
+    db = SessionLocal()
+    try:
+        purge_sessions(db)
+    finally:
+        db.close()
+
+def reconcile_hosted_sites():
+    """Reclaim one bounded batch of orphaned hosted site trees"""
+    db = SessionLocal()
+    try:
+        report = hosting_reconciler.reconcile_batch(db)
+        if report["reclaimed"]:
+            print(f"🗑️  Reclaimed orphaned hosted sites: {', '.join(report['reclaimed'])}")
+    finally:
+        db.close()
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
+    global site_host, hosting_reconciler
     print("🚀 Starting AI Website Generator API...")
     init_db()
     print("✅ Database initialized")
+
+    async with AsyncSessionLocal() as db:
+        await template_catalog.load(db)
+    print("✅ Template catalog loaded")
+
+    site_host = HostingManager()
+
+    # Replay views spilled by a previous worker, then flush periodically
+    await run_in_threadpool(flush_view_counts)
+    view_flush_interval = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "10"))
+    background_tasks.append(asyncio.create_task(run_periodically(view_flush_interval, flush_view_counts)))
+    background_tasks.append(asyncio.create_task(run_periodically(view_flush_interval, flush_traffic_analytics)))
+
+    counter_flush_interval = float(os.getenv("COUNTER_FLUSH_INTERVAL_SECONDS", "5"))
+    background_tasks.append(asyncio.create_task(run_periodically(counter_flush_interval, flush_counters)))
+
+    rollup_interval = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "3600"))
+    background_tasks.append(asyncio.create_task(run_periodically(rollup_interval, rollup_traffic_analytics)))
+
+    compact_interval = float(os.getenv("REVISION_COMPACT_INTERVAL_SECONDS", "3600"))
+    background_tasks.append(asyncio.create_task(run_periodically(compact_interval, compact_website_revisions)))
+
+    await run_in_threadpool(poll_revoked_sessions)
+    revocation_interval = float(os.getenv("SESSION_REVOCATION_POLL_SECONDS", "5"))
+    background_tasks.append(asyncio.create_task(run_periodically(revocation_interval, poll_revoked_sessions)))
+    background_tasks.append(asyncio.create_task(run_periodically(3600, purge_auth_sessions)))
+
+    gc_interval = float(os.getenv("HOSTING_GC_INTERVAL_SECONDS", "300"))
+    if os.getenv("HOSTING_GC_ENABLED", "false").lower() == "true" and gc_interval > 0:
+        hosting_reconciler = HostingReconciler(site_host)
+        background_tasks.append(asyncio.create_task(run_periodically(gc_interval, reconcile_hosted_sites)))
+
     print("🌟 Server ready!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    await run_in_threadpool(flush_view_counts)
+    await run_in_threadpool(flush_counters)
+    await run_in_threadpool(flush_traffic_analytics)
+    view_counter.close()
+    traffic_store.close()
+
 # Health check
 @app.get("/api/health", response_model=MessageResponse)
 async def health_check():
     return MessageResponse(message="API is healthy and running!")
 
+@app.get("/api/health/db", response_model=Dict[str, Any])
+async def database_health():
+    """Connection pool occupancy and checkout wait metrics"""
+    return get_pool_stats()
+
+@app.get("/api/health/auth", response_model=Dict[str, Any])
+async def auth_health():
+    """Password hashing pool occupancy, queue wait and rejection metrics"""
+    return password_hasher.stats()
+
+@app.get("/api/health/rate-limits", response_model=Dict[str, Any])
+async def rate_limit_health():
+    """Rate limit rules, live buckets and rejection counts"""
+    return rate_limiter.stats()
+
 # Root endpoint
 @app.get("/api", response_model=MessageResponse)
 async def root():
@@ -71,10 +239,10 @@ async def root():
 # === AUTHENTICATION ENDPOINTS ===
 
 @app.post("/api/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
-        user = create_user(db, user_data)
+        user = await create_user(db, user_data)
         return UserResponse.from_orm(user)
     except HTTPException as e:
         raise e
@@ -85,9 +253,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 @app.post("/api/auth/login", response_model=Token)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login user and return JWT token"""
-    user = authenticate_user(db, login_data.email, login_data.password)
+    user = await authenticate_user(db, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -95,17 +263,54 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    session_id, refresh_token = await create_session(db, user.id)
+    await db.commit()
+    return issue_tokens(user.id, session_id, refresh_token)
+
+def issue_tokens(user_id: str, session_id: str, refresh_token: str) -> Token:
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.id}, expires_delta=access_token_expires
+        data={"sub": user_id, "sid": session_id}, expires_delta=access_token_expires
     )
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        expires_in=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token,
+        refresh_expires_in=REFRESH_TOKEN_EXPIRE_DAYS * 86400
     )
 
+@app.post("/api/auth/refresh", response_model=Token)
+async def refresh_token(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Exchange a refresh token for a new access token and a new refresh token (no password check)"""
+    try:
+        user_id, session_id, new_refresh_token = await rotate_session(db, refresh_data.refresh_token)
+        user = await get_user(db, user_id)
+        if user is None or not user.is_active:
+            raise RefreshTokenError("Inactive user")
+    except RefreshTokenError as e:
+        # Keeps a reuse revocation
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    await db.commit()
+    return issue_tokens(user_id, session_id, new_refresh_token)
+
+@app.post("/api/auth/logout", response_model=MessageResponse)
+async def logout(refresh_data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """Revoke the session of a refresh token; its access tokens are rejected from then on"""
+    try:
+        await logout_session(db, refresh_data.refresh_token)
+    except RefreshTokenError:
+        pass
+    await db.commit()
+    return MessageResponse(message="Logged out")
+
 @app.get("/api/auth/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
     """Get current user information"""
@@ -115,14 +320,14 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def update_current_user(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user information"""
     for field, value in user_update.dict(exclude_unset=True).items():
         setattr(current_user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return UserResponse.from_orm(current_user)
 
 # === WEBSITE ENDPOINTS ===
@@ -131,67 +336,100 @@ async def update_current_user(
 async def create_website(
     website_data: WebsiteCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new website"""
-    # Generate unique slug
+    # Insert with a unique slug
     from slugify import slugify
     import uuid
     
-    base_slug = slugify(website_data.name)
-    slug = base_slug
-    counter = 1
+    website_id = str(uuid.uuid4())
+    await insert_with_unique_value(db, Website, {
+        "id": website_id,
+        "name": website_data.name,
+        "description": website_data.description,
+        "template_id": website_data.template_id,
+        "owner_id": current_user.id
+    }, "slug", slugify(website_data.name))
+    await db.run_sync(lambda session: index_website_ids(session.connection(), [website_id]))
     
-    while db.query(Website).filter(Website.slug == slug).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
-    website = Website(
-        name=website_data.name,
-        slug=slug,
-        description=website_data.description,
-        template_id=website_data.template_id,
-        owner_id=current_user.id
-    )
-    
-    db.add(website)
-    db.commit()
-    db.refresh(website)
+    await db.commit()
+    website = await db.get(Website, website_id)
     
     return WebsiteResponse.from_orm(website)
 
-@app.get("/api/websites", response_model=PaginatedResponse)
+# Columns loaded for summary listings; content, settings and custom code stay in the database
+WEBSITE_SUMMARY_COLUMNS = [getattr(Website, field) for field in WebsiteSummary.model_fields]
+
+@app.get("/api/websites", response_model=Union[PaginatedResponse, CursorPaginatedResponse])
 async def get_user_websites(
-    page: int = 1,
+    cursor: Optional[str] = None,
     size: int = 10,
+    include_total: bool = False,
+    page: Optional[int] = None,
+    view: str = Query("full", pattern="^(summary|full)$"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get current user's websites"""
-    offset = (page - 1) * size
+    """
+    Get current user's websites, most recently updated first (keyset pagination on updated_at, id).
+    view=summary only selects the summary columns; fetch a single website for its content.
+    """
+    size = max(1, min(size, 100))
+    websites_query = select(Website).where(Website.owner_id == current_user.id)
+    order = (Website.updated_at.desc(), Website.id.desc())
     
-    websites_query = db.query(Website).filter(Website.owner_id == current_user.id)
-    total = websites_query.count()
-    websites = websites_query.offset(offset).limit(size).all()
+    serialize = WebsiteResponse.from_orm
+    if view == "summary":
+        websites_query = websites_query.options(load_only(*WEBSITE_SUMMARY_COLUMNS, raiseload=True))
+        serialize = WebsiteSummary.from_orm
     
-    return PaginatedResponse.create(
-        items=[WebsiteResponse.from_orm(w) for w in websites],
-        total=total,
-        page=page,
-        size=size
+    if page is not None:
+        # Legacy offset pagination, kept for compatibility
+        offset = (max(page, 1) - 1) * size
+        total = await db.scalar(select(func.count()).select_from(websites_query.subquery()))
+        websites = (await db.scalars(websites_query.order_by(*order).offset(offset).limit(size))).all()
+        
+        return PaginatedResponse.create(
+            items=[serialize(w) for w in websites],
+            total=total,
+            page=page,
+            size=size
+        )
+    
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(websites_query.subquery()))
+    
+    if cursor:
+        updated_at, website_id = decode_cursor(cursor, datetime, str)
+        websites_query = websites_query.where(after_cursor(Website.updated_at, Website.id, updated_at, website_id))
+    
+    websites = (await db.scalars(websites_query.order_by(*order).limit(size + 1))).all()
+    
+    next_cursor = None
+    if len(websites) > size:
+        websites = websites[:size]
+        next_cursor = encode_cursor(websites[-1].updated_at, websites[-1].id)
+    
+    return CursorPaginatedResponse(
+        items=[serialize(w) for w in websites],
+        next_cursor=next_cursor,
+        size=size,
+        total=total
     )
 
 @app.get("/api/websites/{website_id}", response_model=WebsiteResponse)
 async def get_website(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific website"""
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -206,13 +444,13 @@ async def update_website(
     website_id: str,
     website_update: WebsiteUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a website"""
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -223,22 +461,276 @@ async def update_website(
     for field, value in website_update.dict(exclude_unset=True).items():
         setattr(website, field, value)
     
-    db.commit()
-    db.refresh(website)
+    await commit_versioned(db)
+    await db.refresh(website)
     
     return WebsiteResponse.from_orm(website)
 
+PATCHABLE_FIELDS = ("content", "settings")
+
+async def commit_versioned(db: AsyncSession):
+    """Commit, turning a lost optimistic concurrency race into 409 Conflict"""
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Website was modified concurrently, reload and retry"
+        )
+
+@app.patch("/api/websites/{website_id}", response_model=WebsitePatchResponse)
+async def patch_website(
+    website_id: str,
+    patch: WebsitePatch,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply a JSON merge patch (RFC 7396) or JSON Patch operations (RFC 6902) to content and settings"""
+    if (patch.merge_patch is None) == (patch.operations is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide exactly one of merge_patch or operations"
+        )
+
+    website = await db.scalar(select(Website).where(
+        Website.id == website_id,
+        Website.owner_id == current_user.id
+    ))
+    
+    if not website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+
+    if website.version != patch.version:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Website was modified (current version {website.version}), reload and retry"
+        )
+
+    document = {field: getattr(website, field) or {} for field in PATCHABLE_FIELDS}
+    try:
+        if patch.merge_patch is not None:
+            unknown = set(patch.merge_patch) - set(PATCHABLE_FIELDS)
+            if unknown:
+                raise JsonPatchError(f"Only content and settings can be patched, got: {', '.join(sorted(unknown))}")
+            patched, changed_paths = apply_merge_patch(document, patch.merge_patch)
+        else:
+            operations = [operation.dict(by_alias=True, exclude_unset=True) for operation in patch.operations]
+            for operation in operations:
+                for pointer in filter(None, (operation["path"], operation.get("from"))):
+                    root = pointer.split("/")[1] if pointer.startswith("/") else None
+                    if root not in PATCHABLE_FIELDS:
+                        raise JsonPatchError(f"Path must start with /content or /settings: {pointer!r}")
+            patched, changed_paths = apply_json_patch(document, operations)
+    except JsonPatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+
+    for field in PATCHABLE_FIELDS:
+        value = patched.get(field)
+        if value is not None and not isinstance(value, dict):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{field} must remain a JSON object"
+            )
+        if value != document[field]:
+            setattr(website, field, value)
+
+    await commit_versioned(db)
+    await db.refresh(website)
+
+    return WebsitePatchResponse(website=WebsiteResponse.from_orm(website), changed_paths=changed_paths)
+
+async def get_owned_website(db: AsyncSession, website_id: str, user: User) -> Website:
+    website = await db.scalar(select(Website).where(
+        Website.id == website_id,
+        Website.owner_id == user.id
+    ))
+    if not website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return website
+
+@app.get("/api/websites/{website_id}/revisions", response_model=List[WebsiteRevisionSummary])
+async def list_website_revisions(
+    website_id: str,
+    before: Optional[int] = Query(None, ge=1, description="Only revisions older than this number"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revision history of a website's content and custom code, newest first"""
+    await get_owned_website(db, website_id, current_user)
+
+    query = select(WebsiteRevision).options(
+        load_only(WebsiteRevision.number, WebsiteRevision.kind, WebsiteRevision.created_at, raiseload=True)
+    ).where(WebsiteRevision.website_id == website_id)
+    if before is not None:
+        query = query.where(WebsiteRevision.number < before)
+    revisions = (await db.scalars(query.order_by(WebsiteRevision.number.desc()).limit(limit))).all()
+
+    return [WebsiteRevisionSummary.from_orm(revision) for revision in revisions]
+
+@app.get("/api/websites/{website_id}/revisions/{number}", response_model=WebsiteRevisionResponse)
+async def get_website_revision(
+    website_id: str,
+    number: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Content, custom_css and custom_js as of one revision"""
+    await get_owned_website(db, website_id, current_user)
+
+    document = await get_revision(db, website_id, number)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+    return WebsiteRevisionResponse(number=number, **document)
+
+@app.post("/api/websites/{website_id}/revisions/{number}/restore", response_model=WebsiteResponse)
+async def restore_website_revision(
+    website_id: str,
+    number: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Restore a revision (recorded as a new revision, so the restore itself can be undone)"""
+    website = await get_owned_website(db, website_id, current_user)
+
+    document = await get_revision(db, website_id, number)
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Revision not found"
+        )
+
+    for field, value in document.items():
+        setattr(website, field, value)
+
+    await commit_versioned(db)
+    await db.refresh(website)
+
+    return WebsiteResponse.from_orm(website)
+
+BULK_MAX_WEBSITES = int(os.getenv("BULK_MAX_WEBSITES", "500"))
+
+def undeploy_deleted_websites(subdomains: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """
+    Remove the hosted files of deleted websites (website ID -> hosting subdomain).
+    Returns the error per website whose files could not be removed; the hosting reconciler retries those.
+    """
+    hosting_manager = HostingManager()
+    errors = {}
+    for website_id, subdomain in subdomains.items():
+        path = hosting_manager.site_path(subdomain) if subdomain else None
+        if path is None or not path.exists():
+            continue
+        result = hosting_manager.undeploy_website(subdomain)
+        if not result["success"]:
+            errors[website_id] = result.get("error", "Unknown error")
+    return errors
+
+@app.post("/api/websites/bulk", response_model=WebsiteBulkResponse)
+async def bulk_update_websites(
+    bulk: WebsiteBulkRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete, archive or re-template many websites in one transaction, with a result per ID"""
+    website_ids = list(dict.fromkeys(bulk.website_ids))
+    if len(website_ids) > BULK_MAX_WEBSITES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BULK_MAX_WEBSITES} websites per request"
+        )
+
+    if bulk.action == "retemplate":
+        if not bulk.template_id or not await template_catalog.get(db, bulk.template_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Template not found"
+            )
+
+    # One ownership check for every ID
+    owned = {
+        row.id: row for row in await db.execute(
+            select(Website.id, Website.status, Website.template_id, Website.hosting_subdomain)
+            .where(Website.id.in_(website_ids), Website.owner_id == current_user.id)
+        )
+    }
+
+    results: Dict[str, WebsiteBulkResult] = {}
+    targets = []
+    for website_id in website_ids:
+        row = owned.get(website_id)
+        if row is None:
+            results[website_id] = WebsiteBulkResult(id=website_id, status="not_found", detail="Website not found")
+        elif bulk.action == "archive" and row.status == "archived":
+            results[website_id] = WebsiteBulkResult(id=website_id, status="skipped", detail="Already archived")
+        elif bulk.action == "retemplate" and row.template_id == bulk.template_id:
+            results[website_id] = WebsiteBulkResult(id=website_id, status="skipped", detail="Already uses this template")
+        else:
+            targets.append(website_id)
+            results[website_id] = WebsiteBulkResult(id=website_id, status="ok")
+
+    if targets:
+        owned_targets = (Website.id.in_(targets), Website.owner_id == current_user.id)
+        if bulk.action == "delete":
+            await db.execute(
+                update(GenerationHistory).where(GenerationHistory.website_id.in_(targets)).values(website_id=None)
+            )
+            await db.execute(delete(WebsiteRevision).where(WebsiteRevision.website_id.in_(targets)))
+            await db.run_sync(lambda session: remove_documents(session.connection(), WEBSITE, targets))
+            await db.execute(delete(Website).where(*owned_targets))
+        else:
+            values = {"status": "archived"} if bulk.action == "archive" else {"template_id": bulk.template_id}
+            await db.execute(
+                update(Website).where(*owned_targets).values(
+                    **values, version=Website.version + 1, updated_at=datetime.utcnow()
+                )
+            )
+        await db.commit()
+
+        if bulk.action == "delete":
+            errors = await run_in_threadpool(undeploy_deleted_websites, {
+                website_id: owned[website_id].hosting_subdomain for website_id in targets
+            })
+            await run_in_threadpool(traffic_store.remove, targets)
+            for website_id, error in errors.items():
+                results[website_id] = WebsiteBulkResult(
+                    id=website_id, status="failed", detail=f"Website deleted but hosted files were kept: {error}"
+                )
+
+    statuses = [result.status for result in results.values()]
+    return WebsiteBulkResponse(
+        action=bulk.action,
+        succeeded=statuses.count("ok"),
+        skipped=statuses.count("skipped"),
+        not_found=statuses.count("not_found"),
+        failed=statuses.count("failed"),
+        results=[results[website_id] for website_id in website_ids]
+    )
+
 @app.delete("/api/websites/{website_id}", response_model=MessageResponse)
 async def delete_website(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a website"""
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -246,45 +738,129 @@ async def delete_website(
             detail="Website not found"
         )
     
-    db.delete(website)
-    db.commit()
+    subdomain = website.hosting_subdomain
+    await db.delete(website)
+    await db.commit()
+
+    # Files left behind on failure are reclaimed by the hosting reconciler
+    await run_in_threadpool(undeploy_deleted_websites, {website_id: subdomain})
+    await run_in_threadpool(traffic_store.remove, [website_id])
     
     return MessageResponse(message="Website deleted successfully")
 
+# === SEARCH ENDPOINTS ===
+
+@app.get("/api/search/websites", response_model=WebsiteSearchResponse)
+async def search_user_websites(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Full-text search over the user's websites (name, description, keywords, content), best match first"""
+    website_ids = await search_websites(db, current_user.id, q, limit)
+    if not website_ids:
+        return WebsiteSearchResponse(query=q, items=[])
+
+    websites = (await db.scalars(
+        select(Website)
+        .options(load_only(*WEBSITE_SUMMARY_COLUMNS, raiseload=True))
+        .where(Website.id.in_(website_ids), Website.owner_id == current_user.id)
+    )).all()
+    by_id = {website.id: website for website in websites}
+
+    return WebsiteSearchResponse(
+        query=q,
+        items=[WebsiteSummary.from_orm(by_id[website_id]) for website_id in website_ids if website_id in by_id]
+    )
+
+@app.get("/api/search/templates", response_model=TemplateSearchResponse)
+async def search_gallery_templates(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Full-text search over active templates (name, description, category, tags, default content)"""
+    template_ids = await search_templates(db, q, limit)
+    snapshot = await template_catalog.snapshot(db)
+
+    return TemplateSearchResponse(
+        query=q,
+        items=[
+            snapshot.by_id[template_id] for template_id in template_ids
+            if template_id in snapshot.by_id and snapshot.by_id[template_id].is_active
+        ]
+    )
+
 # === TEMPLATE ENDPOINTS ===
 
-@app.get("/api/templates", response_model=PaginatedResponse)
+@app.get("/api/templates", response_model=Union[PaginatedResponse, TemplateListResponse])
 async def get_templates(
-    page: int = 1,
+    cursor: Optional[str] = None,
     size: int = 20,
     category: str = None,
-    db: Session = Depends(get_db)
+    tags: Optional[List[str]] = Query(None, max_length=MAX_FILTER_TAGS),
+    tag_mode: str = Query("all", pattern="^(all|any)$"),
+    facets: bool = False,
+    include_total: bool = False,
+    page: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get available templates"""
-    offset = (page - 1) * size
+    """
+    Get available templates, most used first (keyset pagination on usage_count, id), from the catalog.
+    `tags` (repeatable) keeps templates carrying all of them (tag_mode=all) or any of them (tag_mode=any);
+    the tag filter and the facet counts come from one query on the template_tags index.
+    """
+    size = max(1, min(size, 100))
+    catalog = await template_catalog.snapshot(db)
+    templates = catalog.by_category.get(category, []) if category else catalog.active
+
+    tag_counts = None
+    if tags or facets:
+        listed = {t.id for t in templates}
+        matches = {
+            template_id: template_tags
+            for template_id, template_tags in (await filter_by_tags(db, tags or [], tag_mode == "all")).items()
+            if template_id in listed
+        }
+        if tags:
+            templates = [t for t in templates if t.id in matches]
+        if facets:
+            tag_counts = facet_counts(matches)
+    
+    if page is not None:
+        # Legacy offset pagination, kept for compatibility
+        offset = (max(page, 1) - 1) * size
+        return PaginatedResponse.create(
+            items=templates[offset:offset + size],
+            total=len(templates),
+            page=page,
+            size=size
+        )
     
-    templates_query = db.query(Template).filter(Template.is_active == True)
+    total = len(templates) if include_total else None
     
-    if category:
-        templates_query = templates_query.filter(Template.category == category)
+    if cursor:
+        usage_count, template_id = decode_cursor(cursor, int, str)
+        templates = [t for t in templates if (t.usage_count, t.id) < (usage_count, template_id)]
     
-    total = templates_query.count()
-    templates = templates_query.offset(offset).limit(size).all()
+    next_cursor = None
+    if len(templates) > size:
+        templates = templates[:size]
+        next_cursor = encode_cursor(templates[-1].usage_count, templates[-1].id)
     
-    return PaginatedResponse.create(
-        items=[TemplateResponse.from_orm(t) for t in templates],
+    return TemplateListResponse(
+        items=templates,
+        next_cursor=next_cursor,
+        size=size,
         total=total,
-        page=page,
-        size=size
+        facets=tag_counts
     )
 
 @app.get("/api/templates/{template_id}", response_model=TemplateResponse)
-async def get_template(template_id: str, db: Session = Depends(get_db)):
+async def get_template(template_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get a specific template"""
-    template = db.query(Template).filter(
-        Template.id == template_id,
-        Template.is_active == True
-    ).first()
+    template = await template_catalog.get(db, template_id)
     
     if not template:
         raise HTTPException(
@@ -292,7 +868,7 @@ async def get_template(template_id: str, db: Session = Depends(get_db)):
             detail="Template not found"
         )
     
-    return TemplateResponse.from_orm(template)
+    return template
 
 # === GENERATOR ENDPOINTS (MVP version) ===
 
@@ -302,14 +878,13 @@ async def generate_website_quick(
     website_name: str,
     website_description: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Quick website generation (MVP version)"""
+    await check_generation_quota(db, current_user)
+
     # Verify template exists
-    template = db.query(Template).filter(
-        Template.id == template_id,
-        Template.is_active == True
-    ).first()
+    template = await template_catalog.get(db, template_id)
     
     if not template:
         raise HTTPException(
@@ -317,53 +892,120 @@ async def generate_website_quick(
             detail="Template not found"
         )
     
-    # Generate unique slug
+    # Create website with template default content and a unique slug
     from slugify import slugify
-    base_slug = slugify(website_name)
-    slug = base_slug
-    counter = 1
-    
-    while db.query(Website).filter(Website.slug == slug).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
-    # Create website with template default content
-    website = Website(
-        name=website_name,
-        slug=slug,
-        description=website_description,
-        template_id=template_id,
-        content=template.default_content,
-        settings={"generated": True, "template_name": template.name},
-        owner_id=current_user.id,
-        status="draft"
-    )
+    import uuid
     
-    db.add(website)
+    website_id = str(uuid.uuid4())
+    await insert_with_unique_value(db, Website, {
+        "id": website_id,
+        "name": website_name,
+        "description": website_description,
+        "template_id": template_id,
+        "content": template.default_content,
+        "settings": {"generated": True, "template_name": template.name},
+        "owner_id": current_user.id,
+        "status": "draft"
+    }, "slug", slugify(website_name))
     
-    # Update template usage count
-    template.usage_count += 1
+    # Update template usage count (buffered, flushed by the counter job)
+    await template_usage.increment(db, template_id)
+    await db.run_sync(lambda session: index_website_ids(session.connection(), [website_id]))
+
+    # Counted against the monthly quota (rolled up in the same transaction)
+    db.add(GenerationHistory(
+        user_id=current_user.id,
+        website_id=website_id,
+        generation_type="website",
+        prompt=website_description or website_name,
+        result={"template_id": template_id},
+        ai_service="template",
+        tokens_used=0,
+        cost=0
+    ))
     
-    db.commit()
-    db.refresh(website)
+    await db.commit()
+    website = await db.get(Website, website_id)
     
     return WebsiteResponse.from_orm(website)
 
+@app.get("/api/generate/usage", response_model=GenerationUsageResponse)
+async def get_generation_usage(
+    days: int = Query(30, ge=1, le=366),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Daily generation usage per AI service and model, and the current month against the plan's quotas"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    start = month_start()
+
+    return GenerationUsageResponse(
+        plan=current_user.subscription_plan or "free",
+        since=since,
+        buckets=[GenerationUsageBucket.from_orm(b) for b in await usage_buckets(db, current_user.id, since)],
+        month_start=start,
+        month_totals=GenerationUsageTotals(**await usage_totals(db, current_user.id, start)),
+        month_limits=GenerationUsageTotals(**plan_limits(current_user.subscription_plan))
+    )
+
+# === ACCOUNT ENDPOINTS ===
+
+@app.get("/api/account/export")
+async def export_account_data(current_user: User = Depends(get_current_active_user)):
+    """Full account dump (profile, websites, revisions, generation history, hosting metadata) as streamed NDJSON"""
+    filename = f"account-{current_user.username}-{datetime.utcnow():%Y%m%d}.ndjson"
+    return StreamingResponse(
+        export_account(current_user.id, site_host),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+@app.post("/api/account/import", response_model=AccountImportResponse)
+async def import_account_data(
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Load an account export into the current account, streaming the body in batches, in one transaction.
+    Records whose ID already exists are skipped; imported websites are not deployed.
+    """
+    importer = AccountImporter(db, current_user)
+    try:
+        async for number, kind, data in read_records(request.stream()):
+            await importer.feed(number, kind, data)
+        result = await importer.finish()
+        await db.commit()
+    except AccountImportError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The import conflicts with concurrent changes, please retry"
+        )
+
+    return AccountImportResponse(**result)
+
 # === EXPORT ENDPOINTS ===
 
 @app.get("/api/websites/{website_id}/export")
 async def export_website(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Export website as downloadable ZIP file with HTML/CSS/JS"""
     
     # Get website data
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -372,17 +1014,7 @@ async def export_website(
         )
     
     # Get template data if available
-    template_data = None
-    if website.template_id:
-        template = db.query(Template).filter(Template.id == website.template_id).first()
-        if template:
-            template_data = {
-                'id': template.id,
-                'name': template.name,
-                'category': template.category,
-                'structure': template.structure,
-                'default_content': template.default_content
-            }
+    template_data = await template_catalog.get_export_data(db, website.template_id)
     
     # Prepare website data for export
     website_data = {
@@ -435,15 +1067,15 @@ async def deploy_website(
     website_id: str,
     custom_subdomain: str = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Déploie un site web sur l'hébergement intégré"""
     
     # Vérifier que le site appartient à l'utilisateur
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -452,17 +1084,7 @@ async def deploy_website(
         )
     
     # Récupérer les données du template si disponible
-    template_data = None
-    if website.template_id:
-        template = db.query(Template).filter(Template.id == website.template_id).first()
-        if template:
-            template_data = {
-                'id': template.id,
-                'name': template.name,
-                'category': template.category,
-                'structure': template.structure,
-                'default_content': template.default_content
-            }
+    template_data = await template_catalog.get_export_data(db, website.template_id)
     
     # Préparer les données du site
     website_data = {
@@ -497,8 +1119,14 @@ async def deploy_website(
             website.deployed_at = datetime.utcnow()
             website.status = "published"
             
-            db.commit()
-            db.refresh(website)
+            try:
+                await db.commit()
+            except Exception:
+                # Ne pas laisser de fichiers orphelins si la base refuse le déploiement
+                await db.rollback()
+                hosting_manager.undeploy_website(result['subdomain'])
+                raise
+            await db.refresh(website)
             
             return MessageResponse(
                 message=f"Site déployé avec succès ! Accessible sur {result['hosting_url']}"
@@ -519,14 +1147,14 @@ async def deploy_website(
 async def undeploy_website(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Supprime un site de l'hébergement intégré"""
     
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -552,7 +1180,7 @@ async def undeploy_website(
             website.deployed_at = None
             website.status = "draft"
             
-            db.commit()
+            await db.commit()
             
             return MessageResponse(message="Site retiré de l'hébergement avec succès")
         else:
@@ -571,14 +1199,14 @@ async def undeploy_website(
 async def redeploy_website(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Redéploie un site web avec les dernières modifications"""
     
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -593,17 +1221,7 @@ async def redeploy_website(
         )
     
     # Récupérer les données du template si disponible
-    template_data = None
-    if website.template_id:
-        template = db.query(Template).filter(Template.id == website.template_id).first()
-        if template:
-            template_data = {
-                'id': template.id,
-                'name': template.name,
-                'category': template.category,
-                'structure': template.structure,
-                'default_content': template.default_content
-            }
+    template_data = await template_catalog.get_export_data(db, website.template_id)
     
     # Préparer les données du site
     website_data = {
@@ -632,7 +1250,7 @@ async def redeploy_website(
             # Mettre à jour la date de déploiement
             website.deployed_at = datetime.utcnow()
             
-            db.commit()
+            await db.commit()
             
             return MessageResponse(
                 message=f"Site redéployé avec succès ! Accessible sur {website.hosting_url}"
@@ -653,14 +1271,14 @@ async def redeploy_website(
 async def configure_ssl(
     website_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Configure SSL pour un site hébergé"""
     
-    website = db.query(Website).filter(
+    website = await db.scalar(select(Website).where(
         Website.id == website_id,
         Website.owner_id == current_user.id
-    ).first()
+    ))
     
     if not website:
         raise HTTPException(
@@ -685,7 +1303,7 @@ async def configure_ssl(
             if website.hosting_url and not website.hosting_url.startswith('https://'):
                 website.hosting_url = website.hosting_url.replace('http://', 'https://')
             
-            db.commit()
+            await db.commit()
             
             return MessageResponse(message="SSL configuré avec succès")
         else:
@@ -700,6 +1318,45 @@ async def configure_ssl(
             detail=f"Failed to configure SSL: {str(e)}"
         )
 
+@app.get("/api/websites/{website_id}/analytics", response_model=TrafficAnalyticsResponse)
+async def get_website_analytics(
+    website_id: str,
+    days: int = 30,
+    resolution: str = "day",
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Statistiques de trafic d'un site hébergé (par jour ou par heure)"""
+    
+    website = await db.scalar(select(Website).where(
+        Website.id == website_id,
+        Website.owner_id == current_user.id
+    ))
+    
+    if not website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    
+    if resolution not in ("day", "hour") or not 1 <= days <= 366:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="resolution must be 'day' or 'hour' and days between 1 and 366"
+        )
+    
+    # Kept across undeploy and redeploy: the series belongs to the website, not to its subdomain
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    points = await run_in_threadpool(traffic_store.query, website.id, start, end, resolution)
+    
+    return TrafficAnalyticsResponse(
+        website_id=website.id,
+        resolution=resolution,
+        total=sum(point["views"] for point in points),
+        points=points
+    )
+
 @app.get("/api/hosting/sites", response_model=List[Dict[str, Any]])
 async def list_hosted_sites(
     current_user: User = Depends(get_current_active_user)
@@ -723,13 +1380,33 @@ async def list_hosted_sites(
             detail=f"Failed to list hosted sites: {str(e)}"
         )
 
+# === STATIC SERVING OF HOSTED SITES ===
+
+@app.get("/sites/{subdomain}/{file_path:path}")
+async def serve_hosted_site(subdomain: str, file_path: str = ""):
+    """Sert les fichiers statiques d'un site hébergé et comptabilise les pages vues"""
+    site_file = site_host.get_site_file(subdomain, file_path)
+    
+    if site_file is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Page not found"
+        )
+    
+    if site_file.suffix == ".html":
+        view_counter.record(subdomain)
+        traffic_store.record(subdomain)
+    
+    return FileResponse(site_file)
+
 # === ERROR HANDLERS ===
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
-        content=ErrorResponse(error=exc.detail).dict()
+        content=ErrorResponse(error=exc.detail).dict(),
+        headers=getattr(exc, "headers", None)
     )
 
 @app.exception_handler(Exception)
@@ -0,0 +1,107 @@
+"""
+Unique slug / username allocation
+One indexed range query reads `base` and the `base-N` values in use (and only those: the range
+starts at the first digit and a pattern keeps digit-only suffixes, so unrelated slugs sharing the
+prefix, such as `base-design`, are never read); the row is then inserted
+optimistically with ON CONFLICT DO NOTHING and retried with the next suffix if a concurrent
+request won the race.
+"""
+import re
+from typing import Any, Dict, Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MAX_ATTEMPTS = 10
+
+async def next_free_value(
+    db: AsyncSession,
+    column,
+    base: str,
+    separator: str = "-",
+    taken: Iterable[str] = ()
+) -> str:
+    """Return `base` if free, otherwise `base{separator}N` above the highest suffix in use"""
+    rows = await db.scalars(suffixed_values_statement(db.bind.dialect.name, column, base, separator))
+    used = set(rows) | set(taken)
+
+    if base not in used:
+        return base
+
+    suffix_pattern = re.compile(rf"^{re.escape(base)}{re.escape(separator)}(\d+)$")
+    highest = max(
+        (int(match.group(1)) for match in map(suffix_pattern.match, used) if match),
+        default=0
+    )
+    return f"{base}{separator}{highest + 1}"
+
+def _glob_escape(value: str) -> str:
+    return re.sub(r"([*?\[])", r"[\1]", value)
+
+def suffixed_values_statement(dialect_name: str, column, base: str, separator: str = "-"):
+    """
+    Values equal to `base` or `base{separator}<digits>`. Every "base-N" sorts between "base-0" and
+    "base-:" (':' follows '9'), so the unique index serves both branches; the digit-only pattern then
+    drops values such as "base-2024-old" inside that range.
+    """
+    prefix = base + separator
+    if dialect_name == "sqlite":
+        pattern = _glob_escape(prefix)
+        digits_only = and_(column.op("GLOB")(pattern + "[0-9]*"), ~column.op("GLOB")(pattern + "*[^0-9]*"))
+    elif dialect_name == "postgresql":
+        digits_only = column.op("~")("^" + re.escape(prefix) + "[0-9]+$")
+    else:
+        digits_only = true()
+    return select(column).where(or_(
+        column == base,
+        and_(column >= prefix + "0", column < prefix + ":", digits_only)
+    ))
+
+def dialect_insert(dialect_name: str, table):
+    """INSERT construct supporting ON CONFLICT on PostgreSQL and SQLite, plain insert() elsewhere"""
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    return table.insert()
+
+def _insert_ignoring_conflicts(db: AsyncSession, table, column_name: str, values: Dict[str, Any]):
+    statement = dialect_insert(db.bind.dialect.name, table).values(**values)
+    if hasattr(statement, "on_conflict_do_nothing"):
+        return statement.on_conflict_do_nothing(index_elements=[column_name])
+    # Other backends raise IntegrityError on conflict instead of skipping the row
+    return statement
+
+async def insert_with_unique_value(
+    db: AsyncSession,
+    model,
+    values: Dict[str, Any],
+    column_name: str,
+    base: str,
+    separator: str = "-"
+) -> str:
+    """
+    Insert a row whose `column_name` is `base` or the next free `base{separator}N`.
+    The caller commits; returns the allocated value.
+    """
+    table = model.__table__
+    column = getattr(model, column_name)
+    taken = set()
+
+    for _ in range(MAX_ATTEMPTS):
+        candidate = await next_free_value(db, column, base, separator, taken)
+        result = await db.execute(
+            _insert_ignoring_conflicts(db, table, column_name, {**values, column_name: candidate})
+        )
+        if result.rowcount == 1:
+            return candidate
+
+        # Lost the race for this value: try the next suffix
+        taken.add(candidate)
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Could not allocate a unique {column_name}, please retry"
+    )
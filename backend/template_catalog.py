@@ -0,0 +1,136 @@
+"""
+Template Catalog Module
+In-process, versioned snapshot of the templates table indexed by ID, slug and category.
+Any ORM flush that touches a Template bumps catalog_versions["templates"]; each worker compares
+that single integer at most every TEMPLATE_CATALOG_CHECK_SECONDS and reloads when it changed.
+"""
+import os
+import time
+import asyncio
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Template, CatalogVersion
+from schemas import TemplateResponse
+
+CATALOG_NAME = "templates"
+
+class CatalogSnapshot:
+    """Immutable view of every template, swapped atomically on reload"""
+
+    def __init__(self, version: Optional[int], templates: List[TemplateResponse]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.by_id: Dict[str, TemplateResponse] = {t.id: t for t in templates}
+        self.by_slug: Dict[str, TemplateResponse] = {t.slug: t for t in templates}
+
+        # Active templates in listing order: usage_count DESC, id DESC
+        self.active = sorted(
+            (t for t in templates if t.is_active),
+            key=lambda t: (t.usage_count, t.id),
+            reverse=True
+        )
+        self.by_category: Dict[str, List[TemplateResponse]] = defaultdict(list)
+        for template in self.active:
+            self.by_category[template.category].append(template)
+
+class TemplateCatalog:
+    """Versioned in-memory template cache shared by all requests of a worker"""
+
+    def __init__(self, check_interval: Optional[float] = None, max_age: Optional[float] = None):
+        self.check_interval = check_interval if check_interval is not None else float(
+            os.getenv("TEMPLATE_CATALOG_CHECK_SECONDS", "2")
+        )
+        # Reload even without a version change so usage counts do not drift forever
+        self.max_age = max_age if max_age is not None else float(
+            os.getenv("TEMPLATE_CATALOG_MAX_AGE_SECONDS", "300")
+        )
+        self._snapshot = CatalogSnapshot(None, [])
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncSession) -> CatalogSnapshot:
+        """Load every template and the current version in one pass"""
+        version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_NAME))
+        templates = (await db.scalars(select(Template))).all()
+        self._snapshot = CatalogSnapshot(version, [TemplateResponse.from_orm(t) for t in templates])
+        self._last_check = time.monotonic()
+        return self._snapshot
+
+    async def snapshot(self, db: AsyncSession) -> CatalogSnapshot:
+        """Current snapshot; at most one cheap version query per check interval"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self._snapshot
+
+        async with self._lock:
+            if now - self._last_check < self.check_interval:
+                return self._snapshot
+
+            version = await db.scalar(select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_NAME))
+            if (
+                self._snapshot.version is None
+                or version != self._snapshot.version
+                or now - self._snapshot.loaded_at > self.max_age
+            ):
+                return await self.load(db)
+
+            self._last_check = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a reload on the next access"""
+        self._snapshot = CatalogSnapshot(None, self._snapshot.by_id.values())
+        self._last_check = 0.0
+
+    async def get(self, db: AsyncSession, template_id: str, active_only: bool = True) -> Optional[TemplateResponse]:
+        template = (await self.snapshot(db)).by_id.get(template_id)
+        if template is None or (active_only and not template.is_active):
+            return None
+        return template
+
+    async def get_export_data(self, db: AsyncSession, template_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Template fields used by the exporter and the hosting manager"""
+        template = (await self.snapshot(db)).by_id.get(template_id) if template_id else None
+        if template is None:
+            return None
+        return {
+            'id': template.id,
+            'name': template.name,
+            'category': template.category,
+            'structure': template.structure,
+            'default_content': template.default_content
+        }
+
+template_catalog = TemplateCatalog()
+
+# === INVALIDATION ===
+
+@event.listens_for(Session, "before_flush")
+def _track_template_changes(session, flush_context, instances):
+    if any(isinstance(obj, Template) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["templates_changed"] = True
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_version(session, flush_context):
+    """Bump the version in the same transaction as the template change"""
+    if not session.info.pop("templates_changed", False):
+        return
+
+    bump_catalog_version(session.connection())
+
+def bump_catalog_version(connection):
+    """Signal every worker to reload; call in the transaction of template changes made with Core statements"""
+    result = connection.execute(
+        update(CatalogVersion.__table__)
+        .where(CatalogVersion.__table__.c.name == CATALOG_NAME)
+        .values(version=CatalogVersion.__table__.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(CatalogVersion.__table__).values(name=CATALOG_NAME, version=1))
+
+    template_catalog.invalidate()
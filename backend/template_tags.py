@@ -0,0 +1,107 @@
+"""
+Template Tags Module
+Inverted index of Template.tags: one template_tags row per (normalized tag, template), so tag filters
+are index lookups instead of decoding every template's JSON. Rows are rewritten in the transaction
+that changes a template's tags.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, exists, select, inspect
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Template, TemplateTag
+
+MAX_FILTER_TAGS = 10
+
+def normalize_tags(tags: Optional[Iterable[str]]) -> List[str]:
+    """Stripped, lowercased, de-duplicated tags (order kept)"""
+    seen = {}
+    for tag in tags or []:
+        if isinstance(tag, str) and tag.strip():
+            seen.setdefault(tag.strip().lower(), None)
+    return list(seen)
+
+# === INDEX MAINTENANCE ===
+
+def write_template_tags(connection, tags_by_template: Dict[str, Optional[List[str]]]):
+    """Replace the index rows of the given templates (the caller commits)"""
+    if not tags_by_template:
+        return
+
+    table = TemplateTag.__table__
+    connection.execute(table.delete().where(table.c.template_id.in_(list(tags_by_template))))
+    _insert_rows(connection, tags_by_template)
+
+def _insert_rows(connection, tags_by_template: Dict[str, Optional[List[str]]]):
+    rows = [
+        {"tag": tag, "template_id": template_id}
+        for template_id, tags in tags_by_template.items()
+        for tag in normalize_tags(tags)
+    ]
+    if rows:
+        connection.execute(TemplateTag.__table__.insert(), rows)
+
+def sync_template_tags(connection, template_ids: List[str]):
+    """Index templates written with Core statements (no ORM flush to hook into)"""
+    rows = connection.execute(select(Template.id, Template.tags).where(Template.id.in_(template_ids)))
+    write_template_tags(connection, {row.id: row.tags for row in rows})
+
+@event.listens_for(Session, "after_flush")
+def _maintain_template_tags(session, flush_context):
+    changed = {}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Template):
+            continue
+        if obj in session.deleted:
+            changed[obj.id] = None
+        elif obj in session.new or inspect(obj).attrs.tags.history.added:
+            changed[obj.id] = obj.tags
+
+    if changed:
+        write_template_tags(session.connection(), changed)
+
+# === QUERIES ===
+
+def tag_filter_statement(tags: List[str], match_all: bool = True):
+    """
+    (template_id, tag) of every tag of the templates matching the filter, in one statement.
+    match_all: templates carrying every tag (driven by the first tag, one primary-key probe per other tag);
+    otherwise templates carrying any of them. No tags: the whole index.
+    """
+    statement = select(TemplateTag.template_id, TemplateTag.tag)
+    if not tags:
+        return statement
+
+    if match_all:
+        first = aliased(TemplateTag)
+        matching = select(first.template_id).where(first.tag == tags[0])
+        for tag in tags[1:]:
+            other = aliased(TemplateTag)
+            matching = matching.where(
+                exists().where(other.template_id == first.template_id, other.tag == tag)
+            )
+    else:
+        matching = select(TemplateTag.template_id).where(TemplateTag.tag.in_(tags))
+
+    return statement.where(TemplateTag.template_id.in_(matching))
+
+async def filter_by_tags(db: AsyncSession, tags: List[str], match_all: bool = True) -> Dict[str, List[str]]:
+    """Matching template ID -> its tags"""
+    matches: Dict[str, List[str]] = {}
+    for template_id, tag in await db.execute(tag_filter_statement(normalize_tags(tags), match_all)):
+        matches.setdefault(template_id, []).append(tag)
+    return matches
+
+def facet_counts(matches: Dict[str, List[str]]) -> Dict[str, int]:
+    """Number of matching templates per tag, most frequent first"""
+    counts = Counter(tag for tags in matches.values() for tag in tags)
+    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+def reindex(connection) -> int:
+    """Rebuild the whole index from Template.tags"""
+    connection.execute(TemplateTag.__table__.delete())
+    rows = connection.execute(select(Template.id, Template.tags)).all()
+    _insert_rows(connection, {row.id: row.tags for row in rows})
+    return len(rows)
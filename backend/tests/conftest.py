@@ -0,0 +1,80 @@
+"""
+Test configuration: the application modules read their settings at import time, so the storage
+(SQLite database, hosted sites, analytics, spill files) is pointed at a throwaway directory first.
+"""
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+TEST_ROOT = Path(tempfile.mkdtemp(prefix="webai-tests-"))
+
+os.environ.update({
+    "DEBUG": "False",
+    "DATABASE_URL": f"sqlite:///{TEST_ROOT}/app.db",
+    "HOSTING_ROOT": str(TEST_ROOT / "hosted_sites"),
+    "ANALYTICS_ROOT": str(TEST_ROOT / "analytics"),
+    "VIEW_COUNTER_SPILL_FILE": str(TEST_ROOT / "spill" / "view_counts.spill"),
+    "HOSTING_GC_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "COUNTERS_EXACT": "False",
+})
+(TEST_ROOT / "hosted_sites").mkdir()
+(TEST_ROOT / "spill").mkdir()
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+@pytest.fixture(scope="session")
+def app_client(migrated):
+    """The API with its startup hooks run (migrations, template catalog)"""
+    from fastapi.testclient import TestClient
+    import server
+    import init_templates
+
+    with TestClient(server.app) as client:
+        init_templates.create_sample_templates()
+        yield client
+
+@pytest.fixture(scope="session")
+def migrated():
+    from database import init_db
+
+    init_db()
+
+@pytest.fixture
+def db(migrated):
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def user(db):
+    from models import User
+
+    name = f"user-{uuid.uuid4().hex[:8]}"
+    user = User(email=f"{name}@example.com", username=name, hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def make_website(db, user):
+    """Factory for websites owned by `user`"""
+    from models import Website
+
+    def make(**values):
+        values.setdefault("name", "Site")
+        values.setdefault("slug", f"site-{uuid.uuid4().hex[:8]}")
+        website = Website(owner_id=user.id, **values)
+        db.add(website)
+        db.commit()
+        return website
+
+    return make
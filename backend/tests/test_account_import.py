@@ -0,0 +1,74 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from auth import get_current_active_user
+from models import Website
+
+@pytest.fixture
+def as_user(app_client, user):
+    import server
+
+    server.app.dependency_overrides[get_current_active_user] = lambda: user
+    yield app_client
+    server.app.dependency_overrides.pop(get_current_active_user, None)
+
+def export_body(*websites):
+    records = [{"type": "header", "data": {"format": "account-export", "version": 1}}]
+    records += [{"type": "website", "data": website} for website in websites]
+    return "\n".join(json.dumps(record) for record in records).encode()
+
+def import_account(client, body):
+    return client.post("/api/account/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+
+def test_only_whitelisted_website_fields_are_imported(as_user, db, user, make_website):
+    other = make_website()
+    website_id = str(uuid.uuid4())
+    response = import_account(as_user, export_body({
+        "id": website_id,
+        "slug": f"imported-{website_id[:8]}",
+        "name": "Imported",
+        "description": "From another account",
+        "content": {"hero": {"title": "Hello"}},
+        "meta_title": "Imported site",
+        "custom_css": "body {}",
+        # Everything below comes from the exporting account and must not be trusted
+        "owner_id": other.owner_id,
+        "status": "published",
+        "is_public": True,
+        "domain": "victim.example.com",
+        "is_hosted": True,
+        "hosting_subdomain": "victim",
+        "view_count": 123456,
+        "version": 99,
+        "created_at": "2001-01-01T00:00:00",
+        "last_published": "2001-01-02T00:00:00",
+    }))
+    assert response.status_code == 200, response.text
+
+    website = db.scalar(select(Website).where(Website.id == website_id))
+    assert (website.name, website.description, website.meta_title, website.custom_css) == (
+        "Imported", "From another account", "Imported site", "body {}"
+    )
+    assert website.content == {"hero": {"title": "Hello"}}
+    assert website.owner_id == user.id
+    assert (website.status, website.is_public, website.domain) == ("draft", False, None)
+    assert (website.is_hosted, website.hosting_subdomain, website.last_published) == (False, None, None)
+    assert (website.view_count, website.version) == (0, 1)
+    assert website.created_at.year > 2001
+
+@pytest.mark.parametrize("website", [
+    {"name": None},
+    {"name": ["not", "a", "string"]},
+    {"name": "Site", "meta_keywords": {"a": 1}},
+    {"name": "Site", "slug": 42},
+], ids=["missing name", "name type", "meta type", "slug type"])
+def test_malformed_website_records_are_rejected(as_user, db, website):
+    website_id = str(uuid.uuid4())
+    response = import_account(as_user, export_body({"id": website_id, **website}))
+
+    assert response.status_code == 400
+    assert response.json()["error"].startswith("Line 2:")
+    assert db.scalar(select(Website.id).where(Website.id == website_id)) is None
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from auth_sessions import (
+    RefreshTokenError, RevokedSessionIndex, create_session, revoke_session, revoked_sessions, rotate_session
+)
+from database import AsyncSessionLocal, SessionLocal
+from models import AuthSession
+
+def run(action):
+    """Run `action(db)` on a new async session, committed even when it raises (as the endpoints do)"""
+    async def main():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await action(db)
+            finally:
+                await db.commit()
+    return asyncio.run(main())
+
+def login(user):
+    return run(lambda db: create_session(db, user.id))
+
+def refresh(client, refresh_token):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+def test_rotation_replaces_the_refresh_token(user):
+    session_id, token = login(user)
+
+    user_id, rotated_id, rotated = run(lambda db: rotate_session(db, token))
+
+    assert (user_id, rotated_id) == (user.id, session_id)
+    assert rotated != token and rotated.startswith(f"{session_id}.")
+    assert run(lambda db: rotate_session(db, rotated))[1] == session_id
+
+def test_reusing_a_rotated_token_revokes_the_session(user, db):
+    session_id, token = login(user)
+    _, _, rotated = run(lambda db: rotate_session(db, token))
+
+    with pytest.raises(RefreshTokenError, match="reuse"):
+        run(lambda db: rotate_session(db, token))
+
+    # The legitimate holder of the newer token is logged out as well
+    with pytest.raises(RefreshTokenError, match="Invalid"):
+        run(lambda db: rotate_session(db, rotated))
+    assert db.get(AuthSession, session_id).revoked_reason == "reuse"
+    assert revoked_sessions.is_revoked(session_id)
+
+def test_poll_picks_up_revocations_of_other_workers(user):
+    session_id, _ = login(user)
+    other_worker = RevokedSessionIndex()
+    with SessionLocal() as db:
+        other_worker.poll(db)
+
+    assert run(lambda db: revoke_session(db, session_id, "logout"))
+    assert not other_worker.is_revoked(session_id)
+
+    with SessionLocal() as db:
+        assert other_worker.poll(db) >= 1
+    assert other_worker.is_revoked(session_id)
+
+def test_refresh_endpoint_rotates_and_detects_reuse(app_client, user):
+    _, token = login(user)
+
+    response = refresh(app_client, token)
+    assert response.status_code == 200
+    rotated = response.json()["refresh_token"]
+    assert rotated != token
+
+    reused = refresh(app_client, token)
+    assert reused.status_code == 401
+    assert "reuse" in reused.json()["error"]
+    assert refresh(app_client, rotated).status_code == 401
+
+def test_logout_rejects_the_sessions_access_tokens(app_client, user):
+    _, token = login(user)
+    tokens = refresh(app_client, token).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert app_client.get("/api/auth/me", headers=headers).status_code == 200
+
+    response = app_client.post("/api/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+
+    assert response.status_code == 200
+    assert app_client.get("/api/auth/me", headers=headers).status_code == 401
+    assert refresh(app_client, tokens["refresh_token"]).status_code == 401
@@ -0,0 +1,59 @@
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from auth import get_current_active_user
+from hosting_manager import HostingManager
+from models import Website
+
+HOSTING_ROOT = Path(os.environ["HOSTING_ROOT"])
+
+@pytest.fixture
+def as_user(app_client, user):
+    import server
+
+    server.app.dependency_overrides[get_current_active_user] = lambda: user
+    yield app_client
+    server.app.dependency_overrides.pop(get_current_active_user, None)
+
+def hosted_website(make_website):
+    subdomain = f"site-{uuid.uuid4().hex[:8]}"
+    (HOSTING_ROOT / subdomain).mkdir()
+    (HOSTING_ROOT / subdomain / "index.html").write_text("<h1>site</h1>")
+    return make_website(is_hosted=True, hosting_subdomain=subdomain)
+
+def bulk_delete(client, website_ids):
+    response = client.post("/api/websites/bulk", json={"action": "delete", "website_ids": website_ids})
+    assert response.status_code == 200
+    return response.json()
+
+def test_bulk_delete_undeploys_hosted_websites(as_user, db, make_website):
+    hosted = hosted_website(make_website)
+    plain = make_website()
+
+    body = bulk_delete(as_user, [hosted.id, plain.id])
+
+    assert body["succeeded"] == 2
+    assert not (HOSTING_ROOT / hosted.hosting_subdomain).exists()
+    assert db.scalars(select(Website.id).where(Website.id.in_([hosted.id, plain.id]))).all() == []
+
+def test_bulk_delete_reports_not_found_apart_from_failures(as_user, make_website, monkeypatch):
+    hosted = hosted_website(make_website)
+    monkeypatch.setattr(
+        HostingManager, "undeploy_website", lambda self, subdomain: {"success": False, "error": "Permission denied"}
+    )
+
+    body = bulk_delete(as_user, [hosted.id, "missing"])
+
+    assert (body["succeeded"], body["skipped"], body["not_found"], body["failed"]) == (0, 0, 1, 1)
+    results = {result["id"]: result["status"] for result in body["results"]}
+    assert results == {hosted.id: "failed", "missing": "not_found"}
+
+def test_single_delete_undeploys_the_hosted_website(as_user, make_website):
+    hosted = hosted_website(make_website)
+
+    assert as_user.delete(f"/api/websites/{hosted.id}").status_code == 200
+    assert not (HOSTING_ROOT / hosted.hosting_subdomain).exists()
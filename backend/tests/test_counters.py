@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, SessionLocal
+from models import Template
+from counters import CounterBuffer
+
+@pytest.fixture
+def template(db):
+    template = Template(name="Counted", slug=f"counted-{uuid.uuid4().hex[:8]}", category="blog", structure={}, usage_count=0)
+    db.add(template)
+    db.commit()
+    return template
+
+def usage_count(template_id: str) -> int:
+    with SessionLocal() as session:
+        return session.scalar(select(Template.usage_count).where(Template.id == template_id))
+
+def increment(counter: CounterBuffer, key: str, delta: int = 1, commit: bool = True):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await counter.increment(db, key, delta)
+            if commit:
+                await db.commit()
+            else:
+                await db.rollback()
+    asyncio.run(run())
+
+class FailingCommit:
+    """Session whose commit fails after the UPDATE was issued"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def execute(self, *args, **kwargs):
+        return self.session.execute(*args, **kwargs)
+
+    def commit(self):
+        raise RuntimeError("commit failed")
+
+    def rollback(self):
+        self.session.rollback()
+
+def test_exact_increment_is_applied_once_in_the_callers_transaction(db, template):
+    counter = CounterBuffer(Template.__table__, "usage_count", exact=True)
+
+    increment(counter, template.id, 2)
+    assert usage_count(template.id) == 2
+    assert counter.pending() == {}
+
+    # Nothing buffered: take / restore / flush never apply it a second time
+    counter.restore(counter.take())
+    assert counter.flush(db) == 0
+    assert usage_count(template.id) == 2
+
+def test_exact_increment_is_discarded_with_its_transaction(template):
+    counter = CounterBuffer(Template.__table__, "usage_count", exact=True)
+    increment(counter, template.id, 5, commit=False)
+    assert usage_count(template.id) == 0
+    assert counter.pending() == {}
+
+def test_buffered_increment_survives_take_and_restore(db, template):
+    counter = CounterBuffer(Template.__table__, "usage_count", exact=False)
+    increment(counter, template.id)
+    increment(counter, template.id, 2)
+    assert usage_count(template.id) == 0
+
+    counter.restore(counter.take())
+    assert counter.pending() == {template.id: 3}
+    assert counter.flush(db) == 1
+    assert counter.flush(db) == 0
+    assert usage_count(template.id) == 3
+
+def test_failed_commit_is_restored_and_applied_once(db, template):
+    counter = CounterBuffer(Template.__table__, "usage_count", exact=False)
+    increment(counter, template.id, 4)
+
+    with pytest.raises(RuntimeError):
+        counter.flush(FailingCommit(db))
+    assert counter.pending() == {template.id: 4}
+    assert usage_count(template.id) == 0
+
+    counter.flush(db)
+    counter.flush(db)
+    assert usage_count(template.id) == 4
+    assert counter.pending() == {}
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import func, select
+
+import generation_usage
+from auth import get_current_active_user
+from generation_usage import load_plan_limits
+from models import GenerationHistory, GenerationUsage, Template
+
+@pytest.fixture
+def as_user(app_client, user):
+    import server
+
+    server.app.dependency_overrides[get_current_active_user] = lambda: user
+    yield app_client
+    server.app.dependency_overrides.pop(get_current_active_user, None)
+
+@pytest.fixture
+def template_id(app_client, db):
+    return db.scalar(select(Template.id).where(Template.is_active == True).limit(1))
+
+def generate(client, template_id, name):
+    return client.post("/api/generate/website", params={"template_id": template_id, "website_name": name})
+
+def test_quick_generation_is_counted_and_capped(as_user, db, user, template_id, monkeypatch):
+    monkeypatch.setitem(generation_usage.PLAN_LIMITS, "free", {"generations": 2, "tokens_used": None, "cost": None})
+
+    assert generate(as_user, template_id, "First").status_code == 201
+    assert generate(as_user, template_id, "Second").status_code == 201
+    assert generate(as_user, template_id, "Third").status_code == 429
+
+    assert db.scalar(select(func.count()).where(GenerationHistory.user_id == user.id)) == 2
+    assert db.scalar(select(func.sum(GenerationUsage.generations)).where(GenerationUsage.user_id == user.id)) == 2
+
+def test_plan_limits_come_from_the_plans_with_env_overrides(monkeypatch):
+    monkeypatch.setenv("GENERATION_MONTHLY_LIMITS", "free=50,team=none,custom=7")
+    monkeypatch.delenv("TOKEN_MONTHLY_LIMITS", raising=False)
+
+    limits = load_plan_limits()
+
+    assert limits["free"]["generations"] == 50
+    assert limits["free"]["tokens_used"] == generation_usage.SUBSCRIPTION_PLANS["free"]["tokens_used"]
+    assert limits["team"]["generations"] is None
+    assert limits["pro"] == generation_usage.SUBSCRIPTION_PLANS["pro"]
+    assert limits["custom"] == {"generations": 7, "tokens_used": None, "cost": None}
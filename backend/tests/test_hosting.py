@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from hosting_manager import HostingManager
+
+@pytest.fixture
+def hosting(tmp_path, monkeypatch):
+    root = tmp_path / "hosted_sites"
+    root.mkdir()
+    (root / "mysite").mkdir()
+    (root / "mysite" / "index.html").write_text("<h1>site</h1>")
+    (root / "mysite" / "assets").mkdir()
+    (root / "mysite" / "assets" / "app.css").write_text("body {}")
+    (root / "mysite" / ".site_metadata.json").write_text("{}")
+    (root / "mysite" / ".git").mkdir()
+    (root / "mysite" / ".git" / "config").write_text("secret")
+    (tmp_path / "app.db").write_text("database")
+    monkeypatch.setenv("HOSTING_ROOT", str(root))
+    return HostingManager()
+
+def test_site_file_resolves_inside_site(hosting):
+    assert hosting.get_site_file("mysite").name == "index.html"
+    assert hosting.get_site_file("mysite", "assets/app.css").name == "app.css"
+
+@pytest.mark.parametrize("subdomain", ["..", ".", "", "../hosted_sites", "MySite", "my/site", "-site"])
+def test_invalid_subdomain_is_rejected(hosting, subdomain):
+    assert hosting.get_site_file(subdomain, "app.db") is None
+    assert hosting.get_site_info(subdomain) is None
+    assert hosting.undeploy_website(subdomain)["success"] is False
+
+@pytest.mark.parametrize("file_path", [
+    "../../app.db", "assets/../../../app.db", ".site_metadata.json", ".git/config", "assets/.hidden", "/etc/passwd",
+])
+def test_traversal_and_hidden_paths_are_rejected(hosting, file_path):
+    assert hosting.get_site_file("mysite", file_path) is None
+
+def test_undeploy_never_leaves_the_hosting_root(hosting):
+    hosting.undeploy_website("..")
+    assert hosting.hosting_root.exists()
+
+@pytest.mark.parametrize("path", [
+    "/sites/%2e%2e/app.db",
+    "/sites/%2E%2E/app.db",
+    "/sites/%2e%2e/hosted_sites/mysite/index.html",
+    "/sites/mysite/%2e%2e/%2e%2e/app.db",
+    "/sites/mysite/assets/%2e%2e/%2e%2e/%2e%2e/app.db",
+    "/sites/mysite/%2esite_metadata.json",
+])
+def test_encoded_traversal_is_not_served(app_client, path):
+    import server
+    from conftest import TEST_ROOT
+
+    site = server.site_host.hosting_root / "mysite"
+    site.mkdir(exist_ok=True)
+    (site / "index.html").write_text("<h1>site</h1>")
+    (site / ".site_metadata.json").write_text("{}")
+
+    assert app_client.get("/sites/mysite/").status_code == 200
+    response = app_client.get(path)
+    assert response.status_code == 404
+    assert (TEST_ROOT / "app.db").exists()
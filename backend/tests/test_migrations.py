@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+from alembic import command
+from sqlalchemy import create_engine, text
+
+import search
+from database import get_alembic_config
+
+def upgrade(connection, revision):
+    config = get_alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+def test_full_text_search_migration_indexes_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        upgrade(connection, "0006")
+        connection.execute(text(
+            "INSERT INTO users (id, email, username, hashed_password) VALUES ('u-1', 'a@example.com', 'a', 'x')"
+        ))
+        connection.execute(text(
+            "INSERT INTO websites (id, name, slug, description, meta_keywords, content, owner_id, version) "
+            "VALUES ('w-1', 'Bakery', 'bakery', 'Fresh bread', 'croissant', '{\"hero\": {\"title\": \"Sourdough\"}}', 'u-1', 1)"
+        ))
+        connection.execute(text(
+            "INSERT INTO templates (id, name, slug, description, category, structure, tags, default_content) "
+            "VALUES ('t-1', 'Studio', 'studio', 'Portfolio', 'portfolio', '{}', '[\"photo\"]', '{\"about\": \"Lens\"}')"
+        ))
+
+        upgrade(connection, "0007")
+
+        indexed = connection.execute(text(
+            "SELECT e.kind, e.doc_id, s.scope, s.title, s.body "
+            "FROM search_entries e JOIN search_index s ON s.rowid = e.id ORDER BY e.kind"
+        )).all()
+
+    engine.dispose()
+    assert [tuple(row) for row in indexed] == [
+        ("template", "t-1", search.TEMPLATE_SCOPE, "Studio", "Portfolio portfolio photo Lens"),
+        search.website_document(SimpleNamespace(
+            id="w-1", name="Bakery", description="Fresh bread", meta_keywords="croissant",
+            content={"hero": {"title": "Sourdough"}}, owner_id="u-1"
+        )),
+    ]
+
+def test_template_tags_migration_indexes_existing_templates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        upgrade(connection, "0007")
+        connection.execute(text(
+            "INSERT INTO templates (id, name, slug, category, structure, tags) "
+            "VALUES ('t-1', 'Studio', 'studio', 'portfolio', '{}', '[\" Photo\", \"photo\", \"Dark\", 3]')"
+        ))
+
+        upgrade(connection, "0008")
+
+        rows = connection.execute(text("SELECT tag, template_id FROM template_tags ORDER BY tag")).all()
+
+    engine.dispose()
+    assert [tuple(row) for row in rows] == [("dark", "t-1"), ("photo", "t-1")]
+
+def test_generation_usage_migration_rolls_up_existing_history(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with engine.begin() as connection:
+        upgrade(connection, "0008")
+        connection.execute(text(
+            "INSERT INTO users (id, email, username, hashed_password) VALUES ('u-1', 'a@example.com', 'a', 'x')"
+        ))
+        connection.execute(text(
+            "INSERT INTO generation_history (id, user_id, generation_type, prompt, ai_service, model_used, "
+            "tokens_used, cost, created_at) VALUES "
+            "('g-1', 'u-1', 'text', 'p', 'openai', 'gpt', 10, 1, '2026-03-01 08:00:00.000000'), "
+            "('g-2', 'u-1', 'text', 'p', 'openai', 'gpt', 5, NULL, '2026-03-01 22:00:00.000000'), "
+            "('g-3', 'u-1', 'text', 'p', 'openai', NULL, NULL, 2, '2026-03-02 09:00:00.000000')"
+        ))
+
+        upgrade(connection, "0009")
+
+        rows = connection.execute(text(
+            "SELECT user_id, day, ai_service, model_used, generations, tokens_used, cost "
+            "FROM generation_usage ORDER BY day"
+        )).all()
+
+    engine.dispose()
+    assert [tuple(row) for row in rows] == [
+        ("u-1", "2026-03-01", "openai", "gpt", 2, 15, 1),
+        ("u-1", "2026-03-02", "openai", "", 1, 0, 2),
+    ]
+
+def test_migrations_run_without_an_outer_transaction(tmp_path, monkeypatch):
+    """Every revision can leave its transaction, as the PostgreSQL CREATE INDEX CONCURRENTLY branches do"""
+    from contextlib import contextmanager
+
+    from alembic.runtime.migration import MigrationContext
+    from sqlalchemy import inspect
+
+    from database import upgrade_database
+
+    autocommitted = []
+    begin_transaction = MigrationContext.begin_transaction
+
+    @contextmanager
+    def begin_transaction_then_autocommit(self, _per_migration=False):
+        with begin_transaction(self, _per_migration) as transaction:
+            if _per_migration:
+                with self.autocommit_block():
+                    autocommitted.append(self.connection.get_execution_options().get("isolation_level"))
+            yield transaction
+
+    monkeypatch.setattr(MigrationContext, "begin_transaction", begin_transaction_then_autocommit)
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    upgrade_database(engine)
+
+    assert autocommitted == ["AUTOCOMMIT"] * 11
+    with engine.connect() as connection:
+        assert "generation_usage" in inspect(connection).get_table_names()
+        assert connection.scalar(text("SELECT version_num FROM alembic_version")) == "0011"
+    engine.dispose()
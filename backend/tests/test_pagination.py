@@ -0,0 +1,52 @@
+import base64
+import json
+
+import pytest
+
+from auth import get_current_active_user
+from pagination import encode_cursor
+
+@pytest.fixture
+def as_user(app_client, user):
+    import server
+
+    server.app.dependency_overrides[get_current_active_user] = lambda: user
+    yield app_client
+    server.app.dependency_overrides.pop(get_current_active_user, None)
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+TAMPERED = [raw_cursor([1, 2]), raw_cursor(["not a date", "id"]), raw_cursor([None, "id"]),
+            raw_cursor([{"a": 1}, ["b"]]), raw_cursor(["x"]), "%%%", raw_cursor("text")]
+
+@pytest.mark.parametrize("cursor", TAMPERED)
+def test_tampered_website_cursor_is_rejected(as_user, cursor):
+    response = as_user.get("/api/websites", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid pagination cursor"
+
+@pytest.mark.parametrize("cursor", TAMPERED + [raw_cursor([True, "id"]), raw_cursor(["2026-01-01T00:00:00", "id"])])
+def test_tampered_template_cursor_is_rejected(app_client, cursor):
+    response = app_client.get("/api/templates", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid pagination cursor"
+
+def test_cursors_walk_every_website_once(as_user, make_website):
+    created = {make_website().id for _ in range(5)}
+
+    seen, cursor = [], None
+    while True:
+        body = as_user.get("/api/websites", params={"size": 2, **({"cursor": cursor} if cursor else {})}).json()
+        seen += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(created)
+
+def test_template_cursor_continues_the_listing(app_client):
+    first = app_client.get("/api/templates", params={"size": 1}).json()
+    second = app_client.get("/api/templates", params={"size": 1, "cursor": first["next_cursor"]}).json()
+    assert first["items"][0]["id"] != second["items"][0]["id"]
+    assert encode_cursor(first["items"][0]["usage_count"], first["items"][0]["id"]) == first["next_cursor"]
@@ -0,0 +1,89 @@
+"""
+Query plans of the hot endpoint statements on a database built from the migrations: each one must
+be answered from an index (no table SCAN, no temporary B-tree for sorting or DISTINCT).
+"""
+import re
+from datetime import datetime, date
+
+import pytest
+from sqlalchemy import select, update, delete, or_, bindparam
+
+from database import engine
+from models import User, Website, Template, WebsiteRevision, GenerationHistory, GenerationUsage, SearchEntry, AuthSession
+from revisions import _replay_statement
+from template_tags import tag_filter_statement
+from account_export import _account_statements
+from counters import user_last_login
+from pagination import after_cursor
+from slug_allocator import suffixed_values_statement
+
+def endpoint_queries():
+    """The statements issued by the API, keyed by a readable name"""
+    now = datetime.utcnow()
+    return {
+        "get_user (auth)": select(User).where(User.id == "u"),
+        "get_user_by_email (login)": select(User).where(User.email == "e"),
+        "website by id and owner": select(Website).where(Website.id == "w", Website.owner_id == "u"),
+        "get_user_websites first page": select(Website)
+            .where(Website.owner_id == "u")
+            .order_by(Website.updated_at.desc(), Website.id.desc()).limit(11),
+        "get_user_websites next page": select(Website)
+            .where(Website.owner_id == "u", after_cursor(Website.updated_at, Website.id, now, "w"))
+            .order_by(Website.updated_at.desc(), Website.id.desc()).limit(11),
+        "get_templates": select(Template)
+            .where(Template.is_active == True)
+            .order_by(Template.usage_count.desc(), Template.id.desc()).limit(21),
+        "get_templates by category": select(Template)
+            .where(Template.is_active == True, Template.category == "blog"),
+        "template tags, all of": tag_filter_statement(["blog", "personnel", "articles"], match_all=True),
+        "template tags, any of": tag_filter_statement(["blog", "vente"], match_all=False),
+        "get_template": select(Template).where(Template.id == "t", Template.is_active == True),
+        "slug allocation": suffixed_values_statement("sqlite", Website.slug, "site"),
+        "hosted sites of a template": select(Website.id)
+            .where(Website.template_id == "t", Website.is_hosted == True),
+        "hosting reconciler batch": select(Website.hosting_subdomain)
+            .where(Website.hosting_subdomain.in_(["a", "b"]), Website.is_hosted == True),
+        "view count flush": update(Website.__table__)
+            .where(Website.__table__.c.hosting_subdomain == bindparam("b_key"))
+            .values(view_count=Website.__table__.c.view_count + bindparam("b_delta")),
+        "last_login flush": user_last_login._update_stmt,
+        "refresh token rotation": update(AuthSession)
+            .where(AuthSession.id == "s", AuthSession.token_hash == "h", AuthSession.revoked_at.is_(None),
+                   AuthSession.expires_at > now)
+            .values(token_hash="n", generation=AuthSession.generation + 1),
+        "session revocation poll": select(AuthSession.id, AuthSession.revoked_at).where(AuthSession.revoked_at >= now),
+        "session purge": delete(AuthSession).where(or_(AuthSession.expires_at < now, AuthSession.revoked_at < now)),
+        "bulk ownership check": select(Website.id, Website.status, Website.template_id, Website.hosting_subdomain)
+            .where(Website.id.in_(["a", "b"]), Website.owner_id == "u"),
+        "bulk delete: detach generation history": update(GenerationHistory)
+            .where(GenerationHistory.website_id.in_(["a", "b"])).values(website_id=None),
+        "generation quota (month totals)": select(GenerationUsage.generations, GenerationUsage.cost)
+            .where(GenerationUsage.user_id == "u", GenerationUsage.day >= date(2026, 1, 1)),
+        "generation usage buckets": select(GenerationUsage)
+            .where(GenerationUsage.user_id == "u", GenerationUsage.day >= date(2026, 1, 1))
+            .order_by(GenerationUsage.day, GenerationUsage.ai_service, GenerationUsage.model_used),
+        "search entry lookup": select(SearchEntry.doc_id, SearchEntry.id)
+            .where(SearchEntry.kind == "website", SearchEntry.doc_id.in_(["a", "b"])),
+        "revision history": select(WebsiteRevision.number)
+            .where(WebsiteRevision.website_id == "w").order_by(WebsiteRevision.number.desc()).limit(50),
+        "revision replay": _replay_statement("w", 10),
+        **{f"account export: {kind}s": statement for kind, statement in _account_statements("u")},
+        "revision compaction batch": select(WebsiteRevision.website_id)
+            .where(WebsiteRevision.compacted == False, WebsiteRevision.created_at < now).distinct().limit(50),
+    }
+
+SCAN = re.compile(r"^SCAN ")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE")
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple("x" for _ in compiled.positiontup or ())
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize("name", list(endpoint_queries()))
+def test_hot_query_uses_an_index(migrated, name):
+    statement = endpoint_queries()[name]
+    with engine.connect() as connection:
+        plan = explain(connection, statement)
+    assert not [step for step in plan if SCAN.match(step) or TEMP_SORT.search(step)], " | ".join(plan)
@@ -0,0 +1,69 @@
+import pytest
+
+from rate_limiter import MemoryBuckets, RateLimiter, SharedBuckets
+
+RULES = {
+    "generate": ("user", ("POST /api/generate/website",), "5/hour"),
+    "api": ("user", ("* /api/*",), "1/hour"),
+}
+
+@pytest.fixture(params=["memory", "shared"])
+def limiter(request, tmp_path, monkeypatch):
+    monkeypatch.delenv("RATE_LIMITS", raising=False)
+    store = MemoryBuckets() if request.param == "memory" else SharedBuckets(str(tmp_path / "buckets"), slots=64)
+    return RateLimiter(RULES, store=store, enabled=True)
+
+def check(limiter, *names):
+    return limiter.check([rule for rule in limiter.rules if rule.name in names], "10.0.0.1", "u-1")
+
+def test_rejection_by_one_rule_takes_no_token_from_the_others(limiter):
+    assert check(limiter, "generate", "api").allowed
+
+    decision = check(limiter, "generate", "api")
+    assert not decision.allowed
+    assert decision.rule.name == "api"
+    assert limiter.rejected == {"generate": 0, "api": 1}
+
+    # Only the admitted request was charged to "generate"
+    assert int(check(limiter, "generate").tokens) == 3
+
+def test_admitted_request_takes_one_token_from_every_rule(limiter):
+    decision = check(limiter, "generate", "api")
+
+    assert decision.allowed
+    assert decision.rule.name == "api"  # Tightest bucket drives the headers
+    assert decision.headers()["RateLimit-Remaining"] == "0"
+    assert int(check(limiter, "generate").tokens) == 3
+    assert limiter.allowed == {"generate": 2, "api": 1}
+
+@pytest.mark.parametrize("peer, forwarded_for, client", [
+    ("10.0.0.5", "203.0.113.7", "203.0.113.7"),
+    # Hops prepended by the client are not believed
+    ("10.0.0.5", "198.51.100.1, 203.0.113.7, 10.0.0.9", "203.0.113.7"),
+    ("10.0.0.5", "", "10.0.0.5"),
+    ("10.0.0.5", "10.0.0.9", "10.0.0.9"),
+    # Direct clients cannot choose their address
+    ("203.0.113.7", "198.51.100.1", "203.0.113.7"),
+])
+def test_client_ip_behind_trusted_proxies(peer, forwarded_for, client):
+    limiter = RateLimiter(RULES, store=MemoryBuckets(), enabled=True, trusted_proxies="10.0.0.0/8, ::1")
+    assert limiter.client_ip(peer, forwarded_for) == client
+
+def test_middleware_limits_each_client_behind_the_proxy():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from rate_limiter import RateLimitMiddleware
+
+    app = FastAPI()
+    app.get("/api/ping")(lambda: {})
+    limiter = RateLimiter(RULES, store=MemoryBuckets(), enabled=True, trusted_proxies="10.0.0.0/8")
+    limited = RateLimitMiddleware(app, limiter)
+
+    async def behind_proxy(scope, receive, send):
+        await limited({**scope, "client": ("10.0.0.5", 443)}, receive, send)
+
+    client = TestClient(behind_proxy)
+    ping = lambda ip: client.get("/api/ping", headers={"X-Forwarded-For": ip}).status_code
+
+    assert [ping("203.0.113.7"), ping("203.0.113.8"), ping("203.0.113.7")] == [200, 200, 429]
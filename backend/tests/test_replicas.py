@@ -0,0 +1,103 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import database
+from database import LAST_WRITE_HEADER, ReplicaRouter, get_async_db, get_read_db
+from models import Website
+
+WINDOW = 0.5
+
+@pytest.fixture
+def replica(migrated, make_website, tmp_path):
+    """A second SQLite file copied from the primary once, then never updated: a replica lagging forever"""
+    website = make_website(name="Before")
+    path = tmp_path / "replica.db"
+    with sqlite3.connect(database.engine.url.database) as source, sqlite3.connect(path) as target:
+        source.backup(target)
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield engine, website
+    asyncio.run(engine.dispose())
+
+@pytest.fixture
+def client(replica, monkeypatch):
+    engine, website = replica
+    monkeypatch.setattr(database, "replica_engines", [engine])
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter([engine], WINDOW))
+
+    app = FastAPI()
+
+    @app.post("/websites/{website_id}/name/{name}")
+    async def rename(website_id: str, name: str, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(update(Website).where(Website.id == website_id).values(name=name))
+        await db.commit()
+        return {}
+
+    @app.get("/websites/{website_id}/name")
+    async def read_name(website_id: str, db: AsyncSession = Depends(get_read_db)):
+        return await db.scalar(select(Website.name).where(Website.id == website_id))
+
+    return TestClient(app), website.id
+
+ALICE = {"Authorization": "Bearer alice"}
+BOB = {"Authorization": "Bearer bob"}
+
+def test_client_reads_its_own_write_while_the_replica_lags(client):
+    client, website_id = client
+
+    response = client.post(f"/websites/{website_id}/name/After", headers=ALICE)
+    assert LAST_WRITE_HEADER in response.headers
+
+    # The writer reads the primary; another client still reads the stale replica
+    assert client.get(f"/websites/{website_id}/name", headers=ALICE).json() == "After"
+    assert client.get(f"/websites/{website_id}/name", headers=BOB).json() == "Before"
+
+def test_echoed_last_write_routes_another_worker_to_the_primary(client, monkeypatch):
+    client, website_id = client
+    last_write = client.post(f"/websites/{website_id}/name/After", headers=ALICE).headers[LAST_WRITE_HEADER]
+
+    # A worker that did not serve the write only knows about it from the header
+    monkeypatch.setattr(database, "replica_router", ReplicaRouter(database.replica_engines, WINDOW))
+    assert client.get(f"/websites/{website_id}/name", headers=ALICE).json() == "Before"
+    assert client.get(
+        f"/websites/{website_id}/name", headers={**ALICE, LAST_WRITE_HEADER: last_write}
+    ).json() == "After"
+
+def test_reads_return_to_the_replica_after_the_window(client):
+    client, website_id = client
+    last_write = client.post(f"/websites/{website_id}/name/After", headers=ALICE).headers[LAST_WRITE_HEADER]
+    assert client.get(f"/websites/{website_id}/name", headers=ALICE).json() == "After"
+
+    time.sleep(WINDOW + 0.1)
+    headers = {**ALICE, LAST_WRITE_HEADER: last_write}
+    assert client.get(f"/websites/{website_id}/name", headers=headers).json() == "Before"
+
+def test_reads_without_a_write_use_the_replica(client):
+    client, website_id = client
+    assert client.get(f"/websites/{website_id}/name", headers=ALICE).json() == "Before"
+
+def test_each_engine_keeps_its_own_pool_metrics(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    from database import InstrumentedQueuePool
+
+    primary, replica = (
+        create_engine(f"sqlite:///{tmp_path / name}", poolclass=InstrumentedQueuePool) for name in ("a.db", "b.db")
+    )
+    for _ in range(3):
+        with primary.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    metrics = primary.pool.metrics
+
+    primary.dispose()
+
+    assert primary.pool.metrics is metrics and metrics.checkouts == 3
+    assert replica.pool.metrics.checkouts == 0
+    replica.dispose()
@@ -0,0 +1,112 @@
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+import revisions
+from database import AsyncSessionLocal, SessionLocal
+from models import Website, WebsiteRevision
+from revisions import compact_revisions, get_revision
+
+EDITS = 24
+
+def initial_content():
+    return {"sections": [{"title": f"Section {i}", "text": "lorem ipsum " * 40} for i in range(10)]}
+
+def edited(content, step):
+    content = copy.deepcopy(content)
+    content["sections"][step % 10]["title"] = f"Edit {step}"
+    return content
+
+def stored_revisions(website_id):
+    with SessionLocal() as session:
+        return session.scalars(
+            select(WebsiteRevision).where(WebsiteRevision.website_id == website_id).order_by(WebsiteRevision.number)
+        ).all()
+
+def revision_content(website_id, number):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await get_revision(db, website_id, number)
+    return asyncio.run(run())
+
+def assert_mostly_deltas(website_id):
+    kinds = [revision.kind for revision in stored_revisions(website_id)]
+    assert len(kinds) == EDITS + 1
+    assert kinds.count("snapshot") == 1 + EDITS // revisions.SNAPSHOT_INTERVAL
+
+def test_sync_session_edits_are_stored_as_deltas(db, make_website):
+    content = initial_content()
+    website = make_website(content=content)
+
+    for step in range(EDITS):
+        # SessionLocal expires on commit: the pre-flush value is not in the attribute history
+        content = edited(content, step)
+        website.content = content
+        db.commit()
+
+    assert_mostly_deltas(website.id)
+
+def test_async_session_edits_are_stored_as_deltas(make_website):
+    content = initial_content()
+    website_id = make_website(content=content).id
+
+    async def run(content):
+        async with AsyncSessionLocal() as db:
+            for step in range(EDITS):
+                website = await db.get(Website, website_id)
+                content = edited(content, step)
+                website.content = content
+                await db.commit()
+
+    asyncio.run(run(content))
+    assert_mostly_deltas(website_id)
+
+def test_every_revision_replays_to_its_content(db, make_website):
+    content = initial_content()
+    website = make_website(content=content, custom_css="body {}\n")
+    expected = {1: (content, "body {}\n")}
+
+    for step in range(EDITS):
+        content = edited(content, step)
+        website.content = content
+        website.custom_css = f"body {{}}\nh1 {{ margin: {step}px }}\n"
+        db.commit()
+        expected[step + 2] = (content, website.custom_css)
+
+    for number, (content, css) in expected.items():
+        revision = revision_content(website.id, number)
+        assert revision["content"] == content
+        assert revision["custom_css"] == css
+    assert revision_content(website.id, EDITS + 2) is None
+
+def test_compaction_keeps_the_last_revision_of_each_day(db, make_website):
+    content = initial_content()
+    website = make_website(content=content)
+    contents = {1: content}
+    for step in range(EDITS):
+        content = edited(content, step)
+        website.content = content
+        db.commit()
+        contents[step + 2] = content
+
+    # Spread the history over days of 5 revisions each, all older than the cutoff
+    start = datetime.utcnow() - timedelta(days=60)
+    for number in contents:
+        db.execute(
+            update(WebsiteRevision)
+            .where(WebsiteRevision.website_id == website.id, WebsiteRevision.number == number)
+            .values(created_at=start + timedelta(days=(number - 1) // 5, minutes=number))
+        )
+    db.commit()
+
+    while compact_revisions(db, older_than=timedelta(days=30)):
+        pass
+
+    kept = stored_revisions(website.id)
+    assert [revision.number for revision in kept] == [5, 10, 15, 20, 25]
+    assert kept[0].kind == "snapshot"
+    assert all(revision.compacted for revision in kept)
+    for revision in kept:
+        assert revision_content(website.id, revision.number)["content"] == contents[revision.number]
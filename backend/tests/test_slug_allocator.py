@@ -0,0 +1,38 @@
+import asyncio
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, engine
+from models import Website
+from slug_allocator import insert_with_unique_value, suffixed_values_statement
+
+BASE = "portfolio"
+UNRELATED = ["portfolio-design", "portfolio-2024-old", "portfolio-x1", "portfolio2", "portfolios"]
+
+def test_only_base_and_numeric_suffixes_are_read(make_website):
+    for slug in [BASE, f"{BASE}-2", f"{BASE}-10", *UNRELATED]:
+        make_website(slug=slug)
+
+    with engine.connect() as connection:
+        read = set(connection.scalars(suffixed_values_statement("sqlite", Website.slug, BASE)))
+    assert read == {BASE, f"{BASE}-2", f"{BASE}-10"}
+
+def test_allocation_skips_past_highest_suffix(make_website, user):
+    async def allocate():
+        async with AsyncSessionLocal() as db:
+            slug = await insert_with_unique_value(
+                db, Website, {"name": "Portfolio", "owner_id": user.id}, "slug", "gallery"
+            )
+            await db.commit()
+            return slug
+
+    for slug in ["gallery-design", "gallery-2024-old", "gallery-99-draft"]:
+        make_website(slug=slug)
+    assert asyncio.run(allocate()) == "gallery"
+    make_website(slug="gallery-7")
+    assert asyncio.run(allocate()) == "gallery-8"
+    assert asyncio.run(allocate()) == "gallery-9"
+
+    with engine.connect() as connection:
+        slugs = set(connection.scalars(select(Website.slug).where(Website.slug.like("gallery%"))))
+    assert {"gallery", "gallery-7", "gallery-8", "gallery-9"} <= slugs
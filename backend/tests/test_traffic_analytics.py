@@ -0,0 +1,98 @@
+import multiprocessing
+import uuid
+from datetime import date, datetime
+
+import pytest
+
+from traffic_analytics import TrafficStore
+
+WHEN = datetime(2026, 3, 14, 15, 9)
+SLOT = WHEN.hour * 60 + WHEN.minute
+PROCESSES = 4
+FLUSHES_PER_PROCESS = 5000
+
+def _apply_hits(root: str, start):
+    store = TrafficStore(root=root)
+    store.apply({("shared-site", WHEN.date()): {SLOT: 0}})  # Map the file before the race starts
+    start.wait()
+    for _ in range(FLUSHES_PER_PROCESS):
+        store.apply({("shared-site", WHEN.date()): {SLOT: 1, SLOT + 60: 2}})
+    store.close()
+
+def test_concurrent_flushes_do_not_lose_increments(tmp_path):
+    context = multiprocessing.get_context("fork")
+    start = context.Barrier(PROCESSES)
+    workers = [context.Process(target=_apply_hits, args=(str(tmp_path), start)) for _ in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+
+    store = TrafficStore(root=str(tmp_path))
+    points = store.query("shared-site", WHEN.date(), WHEN.date(), resolution="hour")
+    assert points[15]["views"] == PROCESSES * FLUSHES_PER_PROCESS
+    assert points[16]["views"] == 2 * PROCESSES * FLUSHES_PER_PROCESS
+
+def test_rollup_keeps_every_hit(tmp_path):
+    store = TrafficStore(root=str(tmp_path), minute_retention_days=7)
+    store.apply({("site", WHEN.date()): {SLOT: 3, SLOT + 60: 2}})
+
+    other_worker = TrafficStore(root=str(tmp_path), minute_retention_days=7)
+    assert other_worker.rollup(today=date(2026, 4, 1)) == 1
+    assert store.rollup(today=date(2026, 4, 1)) == 0
+
+    points = TrafficStore(root=str(tmp_path)).query("site", WHEN.date(), WHEN.date(), resolution="hour")
+    assert points[15]["views"] == 3 and points[16]["views"] == 2
+    store.close()
+
+@pytest.fixture
+def store(tmp_path):
+    store = TrafficStore(root=str(tmp_path))
+    yield store
+    store.close()
+
+def hourly_views(store, website_id):
+    return [point["views"] for point in store.query(website_id, WHEN.date(), WHEN.date(), resolution="hour")]
+
+def test_hits_are_buffered_until_the_flush_resolves_their_website(store, tmp_path, db, make_website):
+    subdomain = f"site-{uuid.uuid4().hex[:8]}"
+    website = make_website(is_hosted=True, hosting_subdomain=subdomain)
+
+    for _ in range(3):
+        store.record(subdomain, WHEN)
+    store.record("not-hosted", WHEN)
+    assert not any(tmp_path.iterdir())  # Nothing touches the disk on the serving path
+
+    assert store.flush(db) == 1
+    assert hourly_views(store, website.id)[15] == 3
+    assert store.take() == {}
+    assert [path.name for path in tmp_path.iterdir()] == [website.id]
+
+def test_series_follows_the_website_not_the_subdomain(store, db, make_website):
+    subdomain = f"site-{uuid.uuid4().hex[:8]}"
+    first = make_website(is_hosted=True, hosting_subdomain=subdomain)
+    store.record(subdomain, WHEN, hits=5)
+    store.flush(db)
+
+    # Undeployed, then the subdomain goes to another site
+    first.is_hosted, first.hosting_subdomain = False, None
+    second = make_website(is_hosted=True, hosting_subdomain=subdomain)
+    store.record(subdomain, WHEN, hits=2)
+    store.flush(db)
+
+    assert hourly_views(store, first.id)[15] == 5
+    assert hourly_views(store, second.id)[15] == 2
+
+def test_remove_deletes_the_series(store):
+    store.apply({("gone", WHEN.date()): {SLOT: 4}, ("kept", WHEN.date()): {SLOT: 1}})
+
+    store.remove(["gone", "../kept"])
+
+    assert sum(hourly_views(store, "gone")) == 0
+    assert sum(hourly_views(store, "kept")) == 1
+
+def test_unsafe_series_keys_never_touch_the_filesystem(store, tmp_path):
+    assert store.apply({("../escape", WHEN.date()): {SLOT: 1}}) == 0
+    assert not (tmp_path.parent / "escape").exists()
+    assert sum(hourly_views(store, "../escape")) == 0
@@ -0,0 +1,91 @@
+import uuid
+
+import pytest
+
+from database import SessionLocal
+from models import Website
+from view_counter import ViewCounter
+
+@pytest.fixture
+def sites(make_website):
+    return [make_website(is_hosted=True, hosting_subdomain=f"views-{uuid.uuid4().hex[:8]}", view_count=0) for i in range(2)]
+
+def view_counts(db, sites):
+    db.expire_all()
+    return [db.get(Website, site.id).view_count for site in sites]
+
+def test_buffers_sharing_a_spill_directory_apply_each_batch_once(db, sites, tmp_path):
+    first = ViewCounter(str(tmp_path / "views.spill"))
+    second = ViewCounter(str(tmp_path / "views.spill"))
+    a, b = sites[0].hosting_subdomain, sites[1].hosting_subdomain
+
+    for _ in range(3):
+        first.record(a, 2)
+        second.record(a)
+        second.record(b, 5)
+        first.flush(db)
+        second.flush(db)
+    first.flush(db)
+    second.flush(db)
+
+    assert view_counts(db, sites) == [9, 15]
+    assert first.spill_path != second.spill_path
+    first.close()
+    second.close()
+    assert list(tmp_path.glob("*.spill")) == []
+
+def test_concurrent_flushes_do_not_reapply_each_others_batches(db, sites, tmp_path, monkeypatch):
+    first = ViewCounter(str(tmp_path / "views.spill"))
+    second = ViewCounter(str(tmp_path / "views.spill"))
+    a, b = sites[0].hosting_subdomain, sites[1].hosting_subdomain
+    first.record(a, 3)
+    second.record(b, 4)
+
+    # The second worker runs a whole flush while the first one is between loading and committing
+    apply = first.apply
+    def apply_during_other_flush(session, deltas):
+        other = SessionLocal()
+        try:
+            second.flush(other)
+        finally:
+            other.close()
+        apply(session, deltas)
+    monkeypatch.setattr(first, "apply", apply_during_other_flush)
+
+    first.flush(db)
+    monkeypatch.undo()
+    first.flush(db)
+    second.flush(db)
+    assert view_counts(db, sites) == [3, 4]
+    first.close()
+    second.close()
+
+def test_spill_of_a_dead_buffer_is_adopted_once(db, sites, tmp_path, monkeypatch):
+    dead = ViewCounter(str(tmp_path / "views.spill"))
+    survivors = [ViewCounter(str(tmp_path / "views.spill")) for _ in range(2)]
+    subdomain = sites[0].hosting_subdomain
+
+    # The batch reaches the spill file but not the database, then the worker goes away
+    dead.record(subdomain, 7)
+    monkeypatch.setattr(dead, "apply", lambda db, deltas: (_ for _ in ()).throw(RuntimeError("database down")))
+    with pytest.raises(RuntimeError):
+        dead.flush(db)
+    db.rollback()
+
+    # A live worker's file is never adopted
+    survivors[0].flush(db)
+    assert view_counts(db, sites)[0] == 0
+
+    dead.close()
+    survivors[0].flush(db)
+    survivors[1].flush(db)
+    assert view_counts(db, sites)[0] == 7
+    assert not dead.spill_path.exists()
+
+def test_legacy_shared_spill_file_is_replayed(db, sites, tmp_path):
+    (tmp_path / "views.spill").write_text(f'{{"batch": "x", "deltas": {{"{sites[1].hosting_subdomain}": 4}}}}\n')
+    counter = ViewCounter(str(tmp_path / "views.spill"))
+    counter.flush(db)
+    counter.flush(db)
+    assert view_counts(db, sites)[1] == 4
+    counter.close()
@@ -0,0 +1,291 @@
+"""
+Traffic Analytics Module
+Per-site time series stored as fixed-width uint32 arrays: one memory-mapped file per website per day,
+one slot per minute. Days older than the retention window are rolled up to one slot per hour.
+Hits are counted in memory on the serving path (by subdomain, O(1), no I/O) and written by the periodic
+flush, which resolves subdomains to website IDs and applies each day file's slots under one exclusive
+flock (every worker maps the same files). Series are keyed by website ID, so they survive undeploy and
+are never inherited by the next site claiming the subdomain; deleting a website removes its series.
+Hits buffered by a worker that dies before its next flush are lost.
+"""
+import os
+import re
+import mmap
+import fcntl
+import shutil
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Website
+
+MINUTE_SLOTS = 24 * 60
+HOUR_SLOTS = 24
+SLOT_TYPE = 'I'  # uint32
+SLOT_SIZE = array(SLOT_TYPE).itemsize
+
+SERIES_KEY_PATTERN = re.compile(r"^[0-9A-Za-z][0-9A-Za-z_-]*$")
+
+# (website ID, day) -> {minute slot: hits}
+DayDeltas = Dict[Tuple[str, date], Dict[int, int]]
+
+class _DayMap:
+    """A day file mapped in memory and viewed as an array of counters"""
+
+    def __init__(self, path: Path):
+        size = MINUTE_SLOTS * SLOT_SIZE
+        # Kept open for flock: the read-modify-write of slots must not interleave across processes
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        self.slots = memoryview(self.mm).cast(SLOT_TYPE)
+
+    def add(self, hits_by_slot: Dict[int, int]):
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        try:
+            for slot, hits in hits_by_slot.items():
+                self.slots[slot] += hits
+        finally:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        self.slots.release()
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+class TrafficStore:
+    """Array-backed traffic counters for hosted sites"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        max_open_days: Optional[int] = None,
+        minute_retention_days: Optional[int] = None
+    ):
+        self.root = Path(root or os.getenv("ANALYTICS_ROOT", "./analytics"))
+        self.max_open_days = max_open_days or int(os.getenv("ANALYTICS_MAX_OPEN_DAYS", "1024"))
+        self.minute_retention_days = minute_retention_days or int(
+            os.getenv("ANALYTICS_MINUTE_RETENTION_DAYS", "7")
+        )
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[Tuple[str, date], _DayMap]" = OrderedDict()
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[Tuple[str, date, int], int] = defaultdict(int)
+
+    def _site_dir(self, website_id: str) -> Optional[Path]:
+        # IDs can come from account imports: never let one name a path outside the root
+        if not website_id or not SERIES_KEY_PATTERN.match(website_id):
+            return None
+        return self.root / website_id
+
+    def _day_path(self, site_dir: Path, day: date, resolution: str) -> Path:
+        suffix = "min" if resolution == "minute" else "hour"
+        return site_dir / f"{day:%Y%m%d}.{suffix}"
+
+    def _get_day_map(self, site_dir: Path, day: date) -> _DayMap:
+        """Return the mapped minute file for a day, keeping at most `max_open_days` maps open (LRU)"""
+        key = (site_dir.name, day)
+        day_map = self._open.get(key)
+        if day_map is not None:
+            self._open.move_to_end(key)
+            return day_map
+
+        path = self._day_path(site_dir, day, "minute")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        day_map = self._open[key] = _DayMap(path)
+
+        if len(self._open) > self.max_open_days:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+
+        return day_map
+
+    # === WRITES ===
+
+    def record(self, subdomain: str, when: Optional[datetime] = None, hits: int = 1):
+        """Count a hit on a hosted site (called on the serving path: memory only)"""
+        when = when or datetime.utcnow()
+        with self._pending_lock:
+            self._pending[(subdomain, when.date(), when.hour * 60 + when.minute)] += hits
+
+    def take(self) -> Dict[Tuple[str, date, int], int]:
+        """Swap out the buffered hits"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        return pending
+
+    def restore(self, pending: Dict[Tuple[str, date, int], int]):
+        """Put hits back after a failed flush so they are retried"""
+        with self._pending_lock:
+            for key, hits in pending.items():
+                self._pending[key] += hits
+
+    def apply(self, deltas: DayDeltas) -> int:
+        """Add hits to the day files, one flock per file; returns the number of files written"""
+        written = []
+        with self._lock:
+            for (website_id, day), hits_by_slot in deltas.items():
+                site_dir = self._site_dir(website_id)
+                if site_dir is None or not hits_by_slot:
+                    continue
+                day_map = self._get_day_map(site_dir, day)
+                day_map.add(hits_by_slot)
+                written.append(day_map)
+            for day_map in written:
+                day_map.mm.flush()
+        return len(written)
+
+    def flush(self, db: Session) -> int:
+        """
+        Write buffered hits to the series of the websites currently serving those subdomains.
+        Hits of subdomains no longer hosted are dropped. Returns the number of day files written.
+        """
+        pending = self.take()
+        if not pending:
+            return 0
+        try:
+            subdomains = {subdomain for subdomain, _, _ in pending}
+            website_ids = dict(db.execute(
+                select(Website.hosting_subdomain, Website.id).where(Website.hosting_subdomain.in_(subdomains))
+            ).all())
+
+            deltas: DayDeltas = defaultdict(lambda: defaultdict(int))
+            for (subdomain, day, slot), hits in pending.items():
+                website_id = website_ids.get(subdomain)
+                if website_id is not None:
+                    deltas[(website_id, day)][slot] += hits
+            return self.apply(deltas)
+        except Exception:
+            self.restore(pending)
+            raise
+
+    def remove(self, website_ids: Iterable[str]):
+        """Delete the series of deleted websites"""
+        with self._lock:
+            for website_id in website_ids:
+                site_dir = self._site_dir(website_id)
+                if site_dir is None:
+                    continue
+                for key in [key for key in self._open if key[0] == website_id]:
+                    self._open.pop(key).close()
+                shutil.rmtree(site_dir, ignore_errors=True)
+
+    # === READS ===
+
+    def _read_hours(self, site_dir: Path, day: date) -> Optional[array]:
+        """Hourly counters for a day, from the open map, the minute file or the rolled-up hour file"""
+        with self._lock:
+            day_map = self._open.get((site_dir.name, day))
+            if day_map is not None:
+                minutes = array(SLOT_TYPE, day_map.slots.tobytes())
+                return _minutes_to_hours(minutes)
+
+        minute_path = self._day_path(site_dir, day, "minute")
+        hour_path = self._day_path(site_dir, day, "hour")
+        try:
+            if minute_path.exists():
+                return _minutes_to_hours(_read_slots(minute_path))
+            if hour_path.exists():
+                return _read_slots(hour_path)
+        except FileNotFoundError:
+            # Rolled up between the existence check and the read
+            return self._read_hours(site_dir, day)
+        return None
+
+    def query(self, website_id: str, start: date, end: date, resolution: str = "day") -> List[Dict[str, Any]]:
+        """
+        Views of a website between `start` and `end` (inclusive) at hourly or daily resolution.
+        Each day is one contiguous buffer; days without traffic are returned as zero.
+        """
+        site_dir = self._site_dir(website_id)
+        points = []
+        day = start
+        while day <= end:
+            hours = self._read_hours(site_dir, day) if site_dir is not None else None
+            hours = hours or array(SLOT_TYPE, bytes(HOUR_SLOTS * SLOT_SIZE))
+            day_start = datetime(day.year, day.month, day.day)
+
+            if resolution == "hour":
+                points.extend(
+                    {"timestamp": day_start + timedelta(hours=hour), "views": views}
+                    for hour, views in enumerate(hours)
+                )
+            else:
+                points.append({"timestamp": day_start, "views": sum(hours)})
+
+            day += timedelta(days=1)
+        return points
+
+    def rollup(self, today: Optional[date] = None) -> int:
+        """
+        Downsample minute files older than the retention window to hourly files.
+        Returns the number of days rolled up.
+        """
+        cutoff = (today or datetime.utcnow().date()) - timedelta(days=self.minute_retention_days)
+        rolled_up = 0
+
+        if not self.root.exists():
+            return 0
+
+        for site_dir in self.root.iterdir():
+            if not site_dir.is_dir():
+                continue
+
+            for minute_path in site_dir.glob("*.min"):
+                day = datetime.strptime(minute_path.stem, "%Y%m%d").date()
+                if day >= cutoff:
+                    continue
+
+                with self._lock:
+                    day_map = self._open.pop((site_dir.name, day), None)
+                    if day_map is not None:
+                        day_map.close()
+
+                    try:
+                        minute_file = open(minute_path, 'rb')
+                    except FileNotFoundError:
+                        # Rolled up by another worker
+                        continue
+                    with minute_file:
+                        # Waits for in-flight increments of other workers
+                        fcntl.flock(minute_file.fileno(), fcntl.LOCK_EX)
+                        if not minute_path.exists():
+                            continue
+                        minutes = array(SLOT_TYPE)
+                        minutes.frombytes(minute_file.read())
+                        hours = _minutes_to_hours(minutes)
+                        hour_path = self._day_path(site_dir, day, "hour")
+                        tmp_path = hour_path.with_suffix(".tmp")
+                        with open(tmp_path, 'wb') as f:
+                            hours.tofile(f)
+                        os.replace(tmp_path, hour_path)
+                        minute_path.unlink()
+
+                rolled_up += 1
+
+        return rolled_up
+
+    def close(self):
+        with self._lock:
+            while self._open:
+                _, day_map = self._open.popitem()
+                day_map.close()
+
+def _read_slots(path: Path) -> array:
+    slots = array(SLOT_TYPE)
+    with open(path, 'rb') as f:
+        slots.frombytes(f.read())
+    return slots
+
+def _minutes_to_hours(minutes: array) -> array:
+    return array(SLOT_TYPE, (sum(minutes[hour * 60:(hour + 1) * 60]) for hour in range(HOUR_SLOTS)))
+
+traffic_store = TrafficStore()
@@ -0,0 +1,137 @@
+"""
+View counting for hosted sites
+Hits are aggregated in memory and flushed to websites.view_count in one batched UPDATE per interval.
+Each buffer spills to its own file (<name>.<pid>-<token>.spill next to VIEW_COUNTER_SPILL_FILE) and
+holds an exclusive lock on it while alive; a flush also adopts the files of dead workers, whose lock
+has been released, so their batches are applied exactly once by a single survivor.
+"""
+import os
+import json
+import uuid
+import fcntl
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import Website
+from counters import CounterBuffer
+
+class ViewCounter(CounterBuffer):
+    """In-memory per-subdomain hit counters with a per-process append-only spill file"""
+
+    def __init__(self, spill_path: Optional[str] = None):
+        # Views are never applied inline: the serving path has no database session
+        super().__init__(Website.__table__, "view_count", key_column_name="hosting_subdomain", exact=False)
+        base = Path(spill_path or os.getenv("VIEW_COUNTER_SPILL_FILE", "./view_counts.spill"))
+        self.spill_dir = base.parent
+        self.spill_stem, self.spill_suffix = base.stem, base.suffix
+        # Spill file written by releases that shared one file between workers
+        self.legacy_spill_path = base
+        self.spill_path = base.with_name(f"{base.stem}.{os.getpid()}-{uuid.uuid4().hex[:8]}{base.suffix}")
+        self._spill_file: Optional[IO[str]] = None
+        self._flush_lock = threading.Lock()
+
+    def record(self, subdomain: str, hits: int = 1):
+        """Record hits for a hosted site (called on the serving path, O(1))"""
+        super().record(subdomain, hits)
+
+    def _own_file(self) -> IO[str]:
+        if self._spill_file is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, 'a+')
+            # Held until close() or process exit: marks the file as owned by a live worker
+            fcntl.flock(self._spill_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return self._spill_file
+
+    def _spill(self, counts: Dict[str, int]):
+        """Append a batch to this worker's spill file so it survives a restart before it reaches the DB"""
+        f = self._own_file()
+        f.write(json.dumps({"deltas": counts}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def _read_batches(f: IO[str], deltas: Dict[str, int]):
+        f.seek(0)
+        for line in f:
+            try:
+                batch = json.loads(line)
+            except ValueError:
+                # Partial line from a crash mid-write
+                continue
+            for subdomain, delta in batch["deltas"].items():
+                deltas[subdomain] += delta
+
+    def _adopt_orphans(self) -> List[Tuple[Path, IO[str]]]:
+        """Lock the spill files of dead workers (their lock is gone); kept locked until applied"""
+        candidates = set(self.spill_dir.glob(f"{self.spill_stem}.*{self.spill_suffix}"))
+        candidates.add(self.legacy_spill_path)
+        candidates.discard(self.spill_path)
+
+        adopted = []
+        for path in sorted(candidates):
+            try:
+                f = open(path, 'r')
+            except OSError:
+                continue
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                # Another flusher may have applied and unlinked it between our open and lock
+                if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                    raise FileNotFoundError(path)
+            except OSError:
+                f.close()
+                continue
+            adopted.append((path, f))
+        return adopted
+
+    def flush(self, db: Session) -> int:
+        """
+        Write pending deltas (including batches spilled by dead workers) to the database.
+        Returns the number of sites updated.
+        """
+        with self._flush_lock:
+            counts = self.take()
+            if counts:
+                self._spill(counts)
+
+            deltas: Dict[str, int] = defaultdict(int)
+            if self._spill_file is not None:
+                self._read_batches(self._spill_file, deltas)
+            adopted = self._adopt_orphans()
+            try:
+                for _, f in adopted:
+                    self._read_batches(f, deltas)
+                if not deltas:
+                    for path, _ in adopted:
+                        path.unlink(missing_ok=True)
+                    return 0
+
+                self.apply(db, deltas)
+                db.commit()
+
+                # Everything in these files is now in the database
+                if self._spill_file is not None:
+                    self._spill_file.truncate(0)
+                for path, _ in adopted:
+                    path.unlink(missing_ok=True)
+                return len(deltas)
+            finally:
+                for _, f in adopted:
+                    f.close()
+
+    def close(self):
+        """Release this worker's spill file (removed when empty, otherwise left for adoption)"""
+        with self._flush_lock:
+            if self._spill_file is None:
+                return
+            empty = os.fstat(self._spill_file.fileno()).st_size == 0
+            if empty:
+                self.spill_path.unlink(missing_ok=True)
+            self._spill_file.close()
+            self._spill_file = None
+
+view_counter = ViewCounter()
@@ -86,6 +86,7 @@ export const AuthProvider = ({ children }) => {
       } catch (error) {
         // Token is invalid, clear storage
         localStorage.removeItem('token');
+        localStorage.removeItem('refreshToken');
         localStorage.removeItem('user');
       } finally {
         dispatch({
@@ -104,14 +105,16 @@ export const AuthProvider = ({ children }) => {
       dispatch({ type: AUTH_ACTIONS.SET_LOADING, payload: true });
       
       const response = await authAPI.login(credentials);
-      const { access_token } = response.data;
+      const { access_token, refresh_token } = response.data;
+
+      // Store the tokens first: the request interceptor reads them
+      localStorage.setItem('token', access_token);
+      localStorage.setItem('refreshToken', refresh_token);
 
       // Get user data
       const userResponse = await authAPI.getCurrentUser();
       const userData = userResponse.data;
 
-      // Store in localStorage
-      localStorage.setItem('token', access_token);
       localStorage.setItem('user', JSON.stringify(userData));
 
       dispatch({
@@ -152,8 +155,14 @@ export const AuthProvider = ({ children }) => {
   };
 
   // Logout function
-  const logout = () => {
+  const logout = async () => {
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      // Revoke the session server-side; logging out locally must not depend on it
+      await authAPI.logout(refreshToken).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
     localStorage.removeItem('user');
     
     dispatch({ type: AUTH_ACTIONS.LOGOUT });
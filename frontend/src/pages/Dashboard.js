@@ -39,7 +39,7 @@ const Dashboard = () => {
   const fetchWebsites = async () => {
     try {
       setLoading(true);
-      const response = await websiteAPI.getWebsites();
+      const response = await websiteAPI.getWebsites({ view: 'summary' });
       const sitesData = response.data.items || [];
       setWebsites(sitesData);
       
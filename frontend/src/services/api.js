@@ -18,6 +18,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Read-your-writes: reads right after a write are served by the primary database
+    const lastWrite = sessionStorage.getItem('lastWrite');
+    if (lastWrite) {
+      config.headers['X-Last-Write'] = lastWrite;
+    }
     return config;
   },
   (error) => {
@@ -27,11 +32,29 @@ api.interceptors.request.use(
 
 // Response interceptor to handle errors
 api.interceptors.response.use(
-  (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      // Token expired or invalid
+  (response) => {
+    const lastWrite = response.headers['x-last-write'];
+    if (lastWrite) {
+      sessionStorage.setItem('lastWrite', lastWrite);
+    }
+    return response;
+  },
+  async (error) => {
+    const original = error.config;
+    const isAuthCall = ['/auth/login', '/auth/refresh', '/auth/logout'].includes(original?.url);
+    if (error.response?.status === 401 && !isAuthCall && !original._retried) {
+      // Access token expired: renew it once with the refresh token, then replay the request
+      const refreshed = await refreshAccessToken();
+      if (refreshed) {
+        original._retried = true;
+        original.headers.Authorization = `Bearer ${localStorage.getItem('token')}`;
+        return api(original);
+      }
+    }
+    if (error.response?.status === 401 && !isAuthCall) {
+      // Session expired or revoked
       localStorage.removeItem('token');
+      localStorage.removeItem('refreshToken');
       localStorage.removeItem('user');
       window.location.href = '/login';
     }
@@ -39,9 +62,34 @@ api.interceptors.response.use(
   }
 );
 
+// Single refresh in flight: concurrent 401s wait for the same rotation
+let refreshPromise = null;
+
+const refreshAccessToken = () => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) {
+    return Promise.resolve(false);
+  }
+  if (!refreshPromise) {
+    refreshPromise = api.post('/auth/refresh', { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('token', response.data.access_token);
+        localStorage.setItem('refreshToken', response.data.refresh_token);
+        return true;
+      })
+      .catch(() => false)
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Auth API calls
 export const authAPI = {
   login: (credentials) => api.post('/auth/login', credentials),
+  refresh: (refreshToken) => api.post('/auth/refresh', { refresh_token: refreshToken }),
+  logout: (refreshToken) => api.post('/auth/logout', { refresh_token: refreshToken }),
   register: (userData) => api.post('/auth/register', userData),
   getCurrentUser: () => api.get('/auth/me'),
   updateProfile: (userData) => api.put('/auth/me', userData),
@@ -53,7 +101,9 @@ export const websiteAPI = {
   getWebsite: (id) => api.get(`/websites/${id}`),
   createWebsite: (data) => api.post('/websites', data),
   updateWebsite: (id, data) => api.put(`/websites/${id}`, data),
+  patchWebsite: (id, version, patch) => api.patch(`/websites/${id}`, { version, ...patch }),
   deleteWebsite: (id) => api.delete(`/websites/${id}`),
+  bulkWebsites: (action, websiteIds, templateId) => api.post('/websites/bulk', { action, website_ids: websiteIds, template_id: templateId }),
   generateWebsite: (data) => api.post('/generate/website', null, { params: data }),
   exportWebsite: (id) => api.get(`/websites/${id}/export`, { 
     responseType: 'blob',